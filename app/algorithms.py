@@ -0,0 +1,182 @@
+from array import array
+from operator import itemgetter
+from typing import NamedTuple, Optional, Sequence
+
+
+class TopologicalSort(NamedTuple):
+    # Node indices in topological order. Only the acyclic part when ``cycle`` is set.
+    order: list
+    # Node indices along a cycle, first index repeated at the end, or None for a DAG.
+    cycle: Optional[list]
+
+
+def index_edges(node_names: Sequence[str], edge_pairs: Sequence[tuple]) -> tuple:
+    """Translate ``(source_name, target_name)`` pairs into two lists of node indices."""
+    index = {name: i for i, name in enumerate(node_names)}.__getitem__
+    sources = list(map(index, map(itemgetter(0), edge_pairs)))
+    targets = list(map(index, map(itemgetter(1), edge_pairs)))
+    return sources, targets
+
+
+def topological_sort(node_count: int, sources: Sequence[int], targets: Sequence[int]) -> TopologicalSort:
+    """Kahn's algorithm over integer-indexed edge arrays, O(V + E) and iterative.
+
+    Nodes without predecessors are emitted in index order, so the result is
+    deterministic for a given input.
+    """
+    successors = [[] for _ in range(node_count)]
+    for src, tgt in zip(sources, targets):
+        successors[src].append(tgt)
+    indegree = [0] * node_count
+    for tgt in targets:
+        indegree[tgt] += 1
+
+    order = [i for i in range(node_count) if not indegree[i]]
+    emit = order.append
+    # ``order`` grows while it is iterated and doubles as the work queue.
+    for node in order:
+        for nxt in successors[node]:
+            indegree[nxt] -= 1
+            if not indegree[nxt]:
+                emit(nxt)
+
+    if len(order) == node_count:
+        return TopologicalSort(order, None)
+    return TopologicalSort(order, _find_cycle(indegree, sources, targets))
+
+
+def topological_sort_compact(node_count: int, sources: Sequence[int], targets: Sequence[int]) -> TopologicalSort:
+    """Same result as ``topological_sort`` using flat int arrays (CSR) instead of per-node lists.
+
+    Roughly 6x less memory for the work structures at the cost of being up to
+    2x slower; meant for very large graphs such as streaming imports.
+    """
+    offsets = array("i", bytes(4 * (node_count + 1)))
+    indegree = array("i", bytes(4 * node_count))
+    for src in sources:
+        offsets[src + 1] += 1
+    for tgt in targets:
+        indegree[tgt] += 1
+    total = 0
+    for i in range(node_count + 1):
+        total += offsets[i]
+        offsets[i] = total
+    successors = array("i", bytes(4 * len(targets)))
+    fill = array("i", offsets)
+    for src, tgt in zip(sources, targets):
+        successors[fill[src]] = tgt
+        fill[src] += 1
+    del fill
+
+    order = array("i", [i for i in range(node_count) if not indegree[i]])
+    emit = order.append
+    head = 0
+    while head < len(order):
+        node = order[head]
+        head += 1
+        for pos in range(offsets[node], offsets[node + 1]):
+            nxt = successors[pos]
+            indegree[nxt] -= 1
+            if not indegree[nxt]:
+                emit(nxt)
+
+    if len(order) == node_count:
+        return TopologicalSort(order, None)
+    return TopologicalSort(order, _find_cycle(indegree, sources, targets))
+
+
+def _find_cycle(indegree: Sequence[int], sources: Sequence[int], targets: Sequence[int]) -> list:
+    # Every node Kahn could not emit still has a predecessor that was not
+    # emitted either, so walking those predecessors must eventually repeat.
+    predecessor = {}
+    for src, tgt in zip(sources, targets):
+        if indegree[src] and indegree[tgt]:
+            predecessor[tgt] = src
+
+    node = next(iter(predecessor))
+    position = {}
+    walk = []
+    while node not in position:
+        position[node] = len(walk)
+        walk.append(node)
+        node = predecessor[node]
+    cycle = walk[position[node]:]
+    cycle.reverse()
+    cycle.append(cycle[0])
+    return cycle
+
+
+def bfs_levels(offsets: Sequence[int], targets: Sequence[int], start: int,
+               max_depth: Optional[int] = None) -> list:
+    """Nodes reachable from ``start`` over a CSR adjacency, grouped by distance.
+
+    ``levels[0]`` holds the nodes at distance 1; ``start`` itself is not included.
+    """
+    seen = {start}
+    levels = []
+    frontier = [start]
+    while frontier and (max_depth is None or len(levels) < max_depth):
+        level = []
+        for node in frontier:
+            for pos in range(offsets[node], offsets[node + 1]):
+                nxt = targets[pos]
+                if nxt not in seen:
+                    seen.add(nxt)
+                    level.append(nxt)
+        if not level:
+            break
+        levels.append(level)
+        frontier = level
+    return levels
+
+
+def shortest_path(offsets: Sequence[int], targets: Sequence[int], start: int, goal: int,
+                  max_depth: Optional[int] = None) -> Optional[list]:
+    """Fewest-edges path from ``start`` to ``goal`` as a list of nodes, or None."""
+    if start == goal:
+        return [start]
+    parent = {start: start}
+    frontier = [start]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        level = []
+        for node in frontier:
+            for pos in range(offsets[node], offsets[node + 1]):
+                nxt = targets[pos]
+                if nxt in parent:
+                    continue
+                parent[nxt] = node
+                if nxt == goal:
+                    path = [goal]
+                    while path[-1] != start:
+                        path.append(parent[path[-1]])
+                    path.reverse()
+                    return path
+                level.append(nxt)
+        frontier = level
+    return None
+
+
+def topological_levels(offsets: Sequence[int], targets: Sequence[int], indegree: Sequence[int]) -> list:
+    """Kahn's algorithm run level by level over a CSR adjacency of a DAG.
+
+    ``levels[k]`` holds the nodes whose longest path from a source has ``k``
+    edges. No edge joins two nodes of one level, so each level is an antichain
+    that can be scheduled in parallel once the previous ones are done, and the
+    number of levels is the node count of the critical path.
+    """
+    indegree = list(indegree)
+    levels = []
+    frontier = [node for node, degree in enumerate(indegree) if not degree]
+    while frontier:
+        levels.append(frontier)
+        level = []
+        for node in frontier:
+            for pos in range(offsets[node], offsets[node + 1]):
+                nxt = targets[pos]
+                indegree[nxt] -= 1
+                if not indegree[nxt]:
+                    level.append(nxt)
+        frontier = level
+    return levels
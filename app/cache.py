@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+GRAPH_CACHE_ENABLED = os.environ.get("GRAPH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GRAPH_CACHE_MAX_ENTRIES = int(os.environ.get("GRAPH_CACHE_MAX_ENTRIES", "1024"))
+GRAPH_CACHE_MAX_BYTES = int(os.environ.get("GRAPH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Check each cache hit against graphs.version, so writes made by other workers are seen.
+GRAPH_CACHE_VALIDATE = os.environ.get("GRAPH_CACHE_VALIDATE", "true").lower() in ("1", "true", "yes")
+# Keep the encoded JSON of each read view next to the snapshot and serve it as is.
+GRAPH_CACHE_BODIES = os.environ.get("GRAPH_CACHE_BODIES", "true").lower() in ("1", "true", "yes")
+
+
+class GraphCache:
+    """LRU cache of per-graph snapshots, bounded by entry count and approximate bytes.
+
+    Entries must expose an ``nbytes`` attribute. The cache is per process:
+    every worker keeps and invalidates its own copy, see
+    ``main.current_snapshots`` for how writes of the others are noticed.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so a snapshot loaded before a write
+        # commits cannot be stored after that write has invalidated the key.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, graph_id: int):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(graph_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(graph_id)
+            self.hits += 1
+            return entry
+
+    def put(self, graph_id: int, entry, generation: Optional[int] = None) -> None:
+        if not self.enabled or entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            previous = self._entries.pop(graph_id, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[graph_id] = entry
+            self._bytes += entry.nbytes
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def grow(self, graph_id: int, entry, nbytes: int) -> None:
+        """Account for ``nbytes`` attached to ``entry`` after it was stored."""
+        with self._lock:
+            entry.nbytes += nbytes
+            if self._entries.get(graph_id) is not entry:
+                return
+            self._bytes += nbytes
+            if self._bytes > self.max_bytes:
+                self._evict_locked()
+
+    def holds(self, graph_id: int, entry) -> bool:
+        """Whether ``entry`` is the one stored for ``graph_id``; not counted as a hit or miss."""
+        with self._lock:
+            return self._entries.get(graph_id) is entry
+
+    def invalidate(self, graph_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.pop(graph_id, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+graph_cache = GraphCache(GRAPH_CACHE_MAX_ENTRIES, GRAPH_CACHE_MAX_BYTES, GRAPH_CACHE_ENABLED)
@@ -0,0 +1,236 @@
+import sys
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Sequence
+
+from sqlalchemy import Integer, cast, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app import models
+from app.algorithms import topological_levels
+from app.encoding import dumps, msgpack_dumps
+
+
+class CompactGraph:
+    """Read-only, array-backed snapshot of a stored graph.
+
+    Nodes are numbered ``0..n-1`` in id order and their names are interned.
+    Edges are stored twice in CSR form: the successors of node ``i`` are
+    ``fwd_targets[fwd_offsets[i]:fwd_offsets[i + 1]]`` and its predecessors
+    the same slice of ``rev_targets``/``rev_offsets``. Each slice is sorted by
+    name, which is the order the adjacency endpoints return. ``bodies`` holds
+    encoded responses built from the snapshot, keyed by view, and
+    ``reach_index`` a reachability index once one has been built.
+    ``version`` is the ``graphs.version`` the snapshot was loaded at.
+    """
+
+    __slots__ = ("graph_id", "version", "names", "fwd_offsets", "fwd_targets", "rev_offsets", "rev_targets",
+                 "nbytes", "bodies", "reach_index", "_index")
+
+    def __init__(self, graph_id: int, names: Sequence[str], sources: Sequence[int], targets: Sequence[int],
+                 version: int = 0):
+        self.graph_id = graph_id
+        self.version = version
+        self.names = tuple(map(sys.intern, names))
+        node_count = len(self.names)
+        # Rank of each node by name, so that sorting indices by rank sorts by name.
+        rank = [0] * node_count
+        for position, node in enumerate(sorted(range(node_count), key=self.names.__getitem__)):
+            rank[node] = position
+        self.fwd_offsets, self.fwd_targets = _csr(node_count, sources, targets, rank)
+        self.rev_offsets, self.rev_targets = _csr(node_count, targets, sources, rank)
+        self.bodies = {}
+        self.reach_index = None
+        self._index = None
+        self.nbytes = (
+            sys.getsizeof(self.names)
+            + sum(sys.getsizeof(name) for name in self.names)
+            + sum(a.itemsize * len(a) for a in (self.fwd_offsets, self.fwd_targets,
+                                                self.rev_offsets, self.rev_targets))
+        )
+
+    def __getstate__(self):
+        # Pickled for worker processes: names and arrays only, not the cached bodies or index.
+        return (self.graph_id, self.version, self.names, self.fwd_offsets, self.fwd_targets,
+                self.rev_offsets, self.rev_targets, self.nbytes)
+
+    def __setstate__(self, state):
+        (self.graph_id, self.version, self.names, self.fwd_offsets, self.fwd_targets,
+         self.rev_offsets, self.rev_targets, self.nbytes) = state
+        self.bodies = {}
+        self.reach_index = None
+        self._index = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.fwd_targets)
+
+    @property
+    def index(self) -> dict:
+        """Node name -> node index, built on first use."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    def successors(self, node: int) -> array:
+        return self.fwd_targets[self.fwd_offsets[node]:self.fwd_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> array:
+        return self.rev_targets[self.rev_offsets[node]:self.rev_offsets[node + 1]]
+
+    def edges(self):
+        """Yield ``(source_index, target_index)`` pairs grouped by source."""
+        offsets, targets = self.fwd_offsets, self.fwd_targets
+        for node in range(len(self.names)):
+            for pos in range(offsets[node], offsets[node + 1]):
+                yield node, targets[pos]
+
+    def adjacency(self) -> dict:
+        return _named_lists(self.names, self.fwd_offsets, self.fwd_targets)
+
+    def reverse_adjacency(self) -> dict:
+        return _named_lists(self.names, self.rev_offsets, self.rev_targets)
+
+    def index_levels(self) -> list:
+        """Node indices by execution level, see ``topological_levels``."""
+        rev_offsets = self.rev_offsets
+        indegree = [rev_offsets[i + 1] - rev_offsets[i] for i in range(len(self.names))]
+        return topological_levels(self.fwd_offsets, self.fwd_targets, indegree)
+
+    def levels(self) -> list:
+        """Node names by execution level, each level sorted by name."""
+        lookup = self.names.__getitem__
+        return [sorted(map(lookup, level)) for level in self.index_levels()]
+
+
+def graph_document(graph: CompactGraph) -> dict:
+    names = graph.names
+    return {
+        "id": graph.graph_id,
+        "nodes": [{"name": name} for name in names],
+        "edges": [{"source": names[src], "target": names[tgt]} for src, tgt in graph.edges()],
+    }
+
+
+def columnar_document(graph: CompactGraph) -> dict:
+    """The graph as a name table plus parallel lists of edge endpoint indices into it."""
+    offsets = graph.fwd_offsets
+    return {
+        "id": graph.graph_id,
+        "nodes": list(graph.names),
+        "sources": [node for node in range(graph.node_count) for _ in range(offsets[node + 1] - offsets[node])],
+        "targets": graph.fwd_targets.tolist(),
+    }
+
+
+# Read views served from a snapshot, by the key they are cached under in ``bodies``.
+VIEWS = {
+    "graph": graph_document,
+    "columnar": columnar_document,
+    "adjacency": lambda graph: {"adjacency_list": graph.adjacency()},
+    "reverse": lambda graph: {"adjacency_list": graph.reverse_adjacency()},
+    "topological_order": lambda graph: {"nodes": [name for level in graph.levels() for name in level]},
+    "levels": lambda graph: _levels_document(graph.levels()),
+}
+
+
+def _levels_document(levels: list) -> dict:
+    return {"levels": levels, "critical_path_length": len(levels)}
+
+
+ENCODERS = {"json": dumps, "msgpack": msgpack_dumps}
+
+
+def encode_view(graph: CompactGraph, view: str, encoding: str = "json") -> bytes:
+    return ENCODERS[encoding](VIEWS[view](graph))
+
+
+def _csr(node_count: int, sources: Sequence[int], targets: Sequence[int], rank: list) -> tuple:
+    counts = Counter(sources)
+    offsets = array("i", accumulate((counts.get(i, 0) for i in range(node_count)), initial=0))
+    # One composite key per edge groups by source and orders neighbours by name.
+    keys = [src * node_count + rank[tgt] for src, tgt in zip(sources, targets)]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return offsets, array("i", map(targets.__getitem__, order))
+
+
+def _named_lists(names: tuple, offsets: array, targets: array) -> dict:
+    lookup = names.__getitem__
+    return {
+        names[node]: list(map(lookup, targets[offsets[node]:offsets[node + 1]]))
+        for node in range(len(names))
+    }
+
+
+def load_graph_arrays(db: Session, graph_ids: Sequence[int]) -> dict:
+    """``(names, sources, targets, version)`` of the existing graphs among ``graph_ids``, keyed by id.
+
+    Two projected round trips however many graphs are asked for: graphs LEFT
+    JOIN nodes (existence and names), then the edge ids of all of them. Edges
+    are node indices in id order, ready for ``CompactGraph``; building that is
+    left to the caller, so it can run off the event loop.
+
+    The two statements do not share a snapshot, so a write can commit between
+    them. The second one also returns ``graphs.version``, read together with
+    the edges; graphs whose version moved since the first are loaded again,
+    and edges to nodes the first statement did not see are dropped meanwhile.
+    """
+    if not graph_ids:
+        return {}
+    nodes = {}
+    versions = {}
+    for graph_id, version, node_id, name in db.execute(
+        select(models.Graph.id, models.Graph.version, models.Node.id, models.Node.name)
+        .outerjoin(models.Node, models.Node.graph_id == models.Graph.id)
+        .where(models.Graph.id.in_(graph_ids))
+        .order_by(models.Graph.id, models.Node.id)
+    ):
+        graph_nodes = nodes.setdefault(graph_id, ([], []))
+        versions[graph_id] = version
+        if node_id is not None:
+            graph_nodes[0].append(node_id)
+            graph_nodes[1].append(name)
+    if not nodes:
+        return {}
+
+    edges = {graph_id: (array("i"), array("i")) for graph_id in nodes}
+    index = {node_id: i for ids, _ in nodes.values() for i, node_id in enumerate(ids)}.get
+    edge_versions = {}
+    moved = set()
+    # Version rows have no target.
+    for graph_id, source_id, target_id in db.execute(union_all(
+        select(models.Edge.graph_id, models.Edge.source_id, models.Edge.target_id)
+        .where(models.Edge.graph_id.in_(list(nodes))),
+        select(models.Graph.id, models.Graph.version, cast(null(), Integer))
+        .where(models.Graph.id.in_(list(nodes))),
+    )):
+        if target_id is None:
+            edge_versions[graph_id] = source_id
+            continue
+        source, target = index(source_id), index(target_id)
+        if source is None or target is None:
+            moved.add(graph_id)
+            continue
+        sources, targets = edges[graph_id]
+        sources.append(source)
+        targets.append(target)
+    moved.update(graph_id for graph_id in nodes if edge_versions.get(graph_id) != versions[graph_id])
+    arrays = {
+        graph_id: (names, *edges[graph_id], versions[graph_id])
+        for graph_id, (_, names) in nodes.items() if graph_id not in moved
+    }
+    if moved:
+        arrays.update(load_graph_arrays(db, sorted(moved)))
+    return arrays
+
+
+def graph_versions(db: Session, graph_ids: Sequence[int]) -> dict:
+    """``graphs.version`` of the existing graphs among ``graph_ids``, keyed by id: a primary key lookup."""
+    if not graph_ids:
+        return {}
+    return dict(db.execute(select(models.Graph.id, models.Graph.version).where(models.Graph.id.in_(graph_ids))).all())
@@ -1,13 +1,243 @@
+import asyncio
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from app.metrics import observe_pool_checkout, run_in_threadpool
+
 DATABASE_URL = os.environ.get(
     "DATABASE_URL", "postgresql://postgres:postgres@db:5432/graphdb"
 )
+# Read-only handlers get their sessions from a separate pool on this URL (a
+# replica of DATABASE_URL) when it is set; writes always go to DATABASE_URL.
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL") or None
+# With a replica, reads of a graph this process wrote less than this many
+# seconds ago still go to the primary, so a lagging replica cannot serve (and
+# the graph cache cannot keep) the version from before the write.
+DB_READ_PRIMARY_AFTER_WRITE = float(os.environ.get("DB_READ_PRIMARY_AFTER_WRITE", "5"))
+
+# Serve requests through an AsyncEngine (asyncpg / aiosqlite) instead of the threadpool.
+DB_ASYNC = os.environ.get("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "-1"))
+# Bring the schema up to date on every worker start. Turn off when migrations
+# are run once per deploy with ``python -m app.migrations``.
+DB_MIGRATE_ON_STARTUP = os.environ.get("DB_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Connections opened at startup, so the first requests do not pay for connecting.
+DB_POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP", "0"))
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(bind=engine)
\ No newline at end of file
+def engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    # SQLite picks its own pool class (e.g. SingletonThreadPool for :memory:),
+    # which does not take the QueuePool sizing arguments.
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS[parsed.get_backend_name()]
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _enable_sqlite_foreign_keys(sync_engine):
+    # SQLite ignores foreign keys (and therefore ON DELETE CASCADE) unless asked.
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+_lock = threading.Lock()
+_engines = {}
+_NAMES = ("engine", "SessionLocal", "async_engine", "AsyncSessionLocal",
+          "read_engine", "ReadSessionLocal", "async_read_engine", "AsyncReadSessionLocal")
+
+
+def _create_engines() -> dict:
+    primary = _engines_for(DATABASE_URL)
+    read = _engines_for(DATABASE_READ_URL) if DATABASE_READ_URL is not None else primary
+    return dict(zip(_NAMES, (*primary, *read)))
+
+
+def _engines_for(url: str) -> tuple:
+    """``(engine, sessionmaker, async engine, async sessionmaker)`` for ``url``; the async pair only with DB_ASYNC."""
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        _enable_sqlite_foreign_keys(engine)
+    if not DB_ASYNC:
+        return engine, sessionmaker(bind=engine), None, None
+    async_engine = create_async_engine(async_url(url), **engine_options(url))
+    if async_engine.dialect.name == "sqlite":
+        _enable_sqlite_foreign_keys(async_engine.sync_engine)
+    return engine, sessionmaker(bind=engine), async_engine, async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+def __getattr__(name: str):
+    """``engine``, ``SessionLocal``, ``async_engine``, ``AsyncSessionLocal`` and their
+    ``read_``/``Read`` counterparts, created on first access.
+
+    Importing the app neither loads the database driver nor connects, so a
+    preloading server can import it before forking its workers. Without
+    DATABASE_READ_URL the read ones are the primary ones.
+    """
+    if name not in _NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _get(name)
+
+
+def _get(name: str):
+    if not _engines:
+        with _lock:
+            if not _engines:
+                _engines.update(_create_engines())
+    return _engines[name]
+
+
+def after_fork() -> None:
+    """Drop connections inherited from a parent process without closing them for the parent."""
+    for engine in _distinct("engine", "read_engine"):
+        engine.dispose(close=False)
+    for engine in _distinct("async_engine", "async_read_engine"):
+        engine.sync_engine.dispose(close=False)
+
+
+def _distinct(*names: str) -> list:
+    engines = []
+    for name in names:
+        engine = _engines.get(name)
+        if engine is not None and engine not in engines:
+            engines.append(engine)
+    return engines
+
+
+async def warm_up(connections: int) -> None:
+    """Open ``connections`` connections at once in each pool and return them to it."""
+    if connections <= 0:
+        return
+    _get("engine")
+    async_engines = _distinct("async_engine", "async_read_engine")
+    for async_engine in async_engines:
+        opened = await asyncio.gather(*(async_engine.connect() for _ in range(connections)))
+        for connection in opened:
+            await connection.close()
+    if not async_engines:
+        for engine in _distinct("engine", "read_engine"):
+            await run_in_threadpool(_warm_up_sync, engine, connections)
+
+
+def _warm_up_sync(engine, connections: int) -> None:
+    opened = [engine.connect() for _ in range(connections)]
+    for connection in opened:
+        connection.close()
+
+
+class Database:
+    """Request-scoped session handle used by the route handlers in both modes.
+
+    Data access is written once as plain functions of a ``Session`` and handed
+    to ``run``: in sync mode they execute on the threadpool, in async mode
+    through ``AsyncSession.run_sync`` on the event loop. ``replica`` handles
+    come from the read pool.
+    """
+
+    def __init__(self, session, replica: bool = False):
+        self.session = session
+        self.replica = replica
+        self._after_commit = []
+        self._checked_out = False
+
+    @classmethod
+    def open(cls, replica: bool = False) -> "Database":
+        if replica:
+            factory = _get("AsyncReadSessionLocal" if DB_ASYNC else "ReadSessionLocal")
+        else:
+            factory = _get("AsyncSessionLocal" if DB_ASYNC else "SessionLocal")
+        return cls(factory(), replica)
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.session, AsyncSession)
+
+    async def run(self, fn, *args, **kwargs):
+        if self.is_async:
+            if not self._checked_out:
+                started = time.perf_counter()
+                await self.session.connection()
+                self._observe_checkout(started)
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(self._run_sync, fn, *args, **kwargs)
+
+    def _run_sync(self, fn, *args, **kwargs):
+        if not self._checked_out:
+            started = time.perf_counter()
+            self.session.connection()
+            self._observe_checkout(started)
+        return fn(self.session, *args, **kwargs)
+
+    def _observe_checkout(self, started: float) -> None:
+        # The first statement of a request checks a connection out of the pool;
+        # acquiring it explicitly separates that wait from the query itself.
+        self._checked_out = True
+        observe_pool_checkout(time.perf_counter() - started)
+
+    def after_commit(self, callback) -> None:
+        """Call ``callback()`` once the request's transaction has been committed."""
+        self._after_commit.append(callback)
+
+    async def commit(self):
+        if self.is_async:
+            await self.session.commit()
+        else:
+            await run_in_threadpool(self.session.commit)
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    async def rollback(self):
+        self._after_commit.clear()
+        if self.is_async:
+            await self.session.rollback()
+        else:
+            await run_in_threadpool(self.session.rollback)
+
+    async def close(self):
+        if self.is_async:
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
+
+
+_recent_writes = OrderedDict()
+
+
+def graph_written(graph_id: int) -> None:
+    """Record a committed write to ``graph_id`` for ``read_from_replica``."""
+    if DATABASE_READ_URL is None:
+        return
+    now = time.monotonic()
+    _recent_writes.pop(graph_id, None)
+    _recent_writes[graph_id] = now
+    while _recent_writes and next(iter(_recent_writes.values())) < now - DB_READ_PRIMARY_AFTER_WRITE:
+        _recent_writes.popitem(last=False)
+
+
+def read_from_replica(graph_id: int) -> bool:
+    """False while ``graph_id`` was written by this process within DB_READ_PRIMARY_AFTER_WRITE."""
+    written = _recent_writes.get(graph_id)
+    return written is None or written < time.monotonic() - DB_READ_PRIMARY_AFTER_WRITE
@@ -0,0 +1,74 @@
+import hashlib
+import json
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+elif msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def dumps(obj) -> bytes:
+        return _msgspec_encoder.encode(obj)
+
+    loads = _msgspec_decoder.decode
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+
+# Errors raised by ``loads`` on malformed input, whichever decoder is in use.
+DecodeError = (ValueError, msgspec.DecodeError) if msgspec is not None else ValueError
+
+# MessagePack counterparts of ``dumps``/``loads``; None when neither msgpack
+# nor msgspec is installed.
+if msgpack is not None:
+    def msgpack_dumps(obj) -> bytes:
+        return msgpack.packb(obj)
+
+    def msgpack_loads(data: bytes):
+        return msgpack.unpackb(data)
+elif msgspec is not None:
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+
+    def msgpack_dumps(obj) -> bytes:
+        return _msgpack_encoder.encode(obj)
+
+    msgpack_loads = _msgpack_decoder.decode
+else:
+    msgpack_dumps = msgpack_loads = None
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
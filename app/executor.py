@@ -0,0 +1,62 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app import metrics
+
+# Worker processes for CPU-bound work on large graphs; 0 keeps everything on
+# the threadpool.
+CPU_POOL_WORKERS = int(os.environ.get("CPU_POOL_WORKERS", "2"))
+# Graphs with at least this many edges are offloaded to the pool.
+CPU_OFFLOAD_MIN_EDGES = int(os.environ.get("CPU_OFFLOAD_MIN_EDGES", "50000"))
+# Jobs running or queued in the pool before new ones are refused with a 503.
+CPU_POOL_MAX_PENDING = int(os.environ.get("CPU_POOL_MAX_PENDING", str(max(1, CPU_POOL_WORKERS) * 2)))
+
+
+class CpuPool:
+    """Process pool for validation, cycle checks and response encoding of large graphs.
+
+    Small inputs never reach it. Work on large ones runs outside the server
+    process, so its GIL stays free for other requests. Arguments and results
+    are pickled, so callers pass flat lists and int arrays rather than models.
+    The pool starts on first use with the "spawn" method, which is safe in a
+    process that already runs threads.
+    """
+
+    def __init__(self, workers: int, min_edges: int, max_pending: int):
+        self.workers = workers
+        self.min_edges = min_edges
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def offloads(self, edge_count: int) -> bool:
+        return self.workers > 0 and edge_count >= self.min_edges
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` in a worker process; 503 if too many jobs are already pending."""
+        if self.pending >= self.max_pending:
+            metrics.CPU_POOL_REJECTED.inc()
+            raise HTTPException(status_code=503, detail="Server is busy, try again later",
+                                headers={"Retry-After": "1"})
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.pending += 1
+        metrics.CPU_POOL_PENDING.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            metrics.CPU_POOL_PENDING.dec()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+cpu_pool = CpuPool(CPU_POOL_WORKERS, CPU_OFFLOAD_MIN_EDGES, CPU_POOL_MAX_PENDING)
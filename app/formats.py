@@ -0,0 +1,120 @@
+import gzip
+import os
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app import schemas, validation
+from app.encoding import DecodeError, loads, msgpack_loads
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses at least this large are compressed when the client accepts gzip or zstd.
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", str(64 * 1024)))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.environ.get("ZSTD_LEVEL", "3"))
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+COLUMNAR_JSON = "application/vnd.dag.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.dag.columnar+msgpack"
+
+# Media type -> (columnar, encoding). Columnar types only apply to whole graphs.
+MEDIA_TYPES = {
+    JSON: (False, "json"),
+    MSGPACK: (False, "msgpack"),
+    "application/msgpack": (False, "msgpack"),
+    COLUMNAR_JSON: (True, "json"),
+    COLUMNAR_MSGPACK: (True, "msgpack"),
+}
+
+# Content codings in the order the server prefers them.
+CODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def _available(media_type: str) -> bool:
+    return MEDIA_TYPES[media_type][1] != "msgpack" or msgpack_loads is not None
+
+
+def _preferences(header: Optional[str]) -> list:
+    """Values of an Accept or Accept-Encoding header with q > 0, most preferred first."""
+    ranges = []
+    for position, part in enumerate((header or "").split(",")):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.lower().startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, value.lower()))
+    return [value for _, _, value in sorted(ranges)]
+
+
+def negotiate(accept: Optional[str], columnar: bool = False) -> tuple:
+    """``(media type, columnar, encoding)`` of the response for an Accept header; JSON by default.
+
+    ``columnar`` tells whether the route has a columnar form.
+    """
+    for media_type in _preferences(accept):
+        if media_type in MEDIA_TYPES and _available(media_type) and (columnar or not MEDIA_TYPES[media_type][0]):
+            return (media_type, *MEDIA_TYPES[media_type])
+    return JSON, False, "json"
+
+
+def content_coding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The content coding to compress a large response with, or None."""
+    accepted = _preferences(accept_encoding)
+    for coding in CODINGS:
+        if coding in accepted or "*" in accepted:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decode_graph(content_type: Optional[str], body: bytes) -> tuple:
+    """Parse a create request body into ``(node names, edge sources, edge targets)``.
+
+    Accepts GraphCreate or ColumnarGraphCreate as JSON or MessagePack. Schema
+    errors are raised as RequestValidationError located under ``body``, like
+    the ones FastAPI raises for a declared body.
+    """
+    media_type = (content_type or JSON).split(";")[0].strip().lower()
+    if media_type not in MEDIA_TYPES or not _available(media_type):
+        raise HTTPException(status_code=415, detail="Unsupported media type")
+    columnar, encoding = MEDIA_TYPES[media_type]
+    try:
+        data = loads(body) if encoding == "json" else msgpack_loads(body)
+    except DecodeError:
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",),
+                                       "msg": f"Malformed {encoding} body", "input": None}])
+    model = schemas.ColumnarGraphCreate if columnar else schemas.GraphCreate
+    try:
+        graph = model.model_validate(data)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)])
+    if not columnar:
+        edges = graph.edges
+        return [node.name for node in graph.nodes], [edge.source for edge in edges], [edge.target for edge in edges]
+    names = graph.nodes
+    if not all(map(validation.node_name_re.fullmatch, names)):
+        raise validation.InvalidGraph(validation.INVALID_NODE_NAME)
+    node_count = len(names)
+    if not all(0 <= index < node_count for index in (*graph.sources, *graph.targets)):
+        raise validation.InvalidGraph(validation.UNDEFINED_NODE)
+    return names, [names[index] for index in graph.sources], [names[index] for index in graph.targets]
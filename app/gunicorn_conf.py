@@ -0,0 +1,35 @@
+"""Gunicorn settings for running several uvicorn workers behind one master.
+
+    gunicorn -c python:app.gunicorn_conf app.main:app
+
+The app is imported once in the master (``preload_app``) and the workers are
+forked from it, so they start without importing it again. The schema is
+migrated once in the master before the workers are started instead of by
+every worker. Each worker still has its own connection pool and graph cache.
+"""
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8080")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+_migrate = os.environ.get("DB_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Read by app.database when the app is imported, which happens after this file.
+os.environ["DB_MIGRATE_ON_STARTUP"] = "false"
+
+
+def on_starting(server):
+    if _migrate:
+        from app import database
+        from app.migrations import upgrade
+
+        with database.engine.begin() as conn:
+            upgrade(conn)
+        database.engine.dispose()
+
+
+def post_fork(server, worker):
+    from app import database
+
+    database.after_fork()
@@ -0,0 +1,151 @@
+import os
+from typing import Optional, Sequence
+
+from sqlalchemy import Integer, String, bindparam, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Return the id of an identical stored graph instead of storing another copy.
+GRAPH_DEDUP = os.environ.get("GRAPH_DEDUP", "false").lower() in ("1", "true", "yes")
+
+# PostgreSQL: the whole node list goes in as one array parameter, so a graph of
+# any size costs a single INSERT ... RETURNING and a single edge INSERT.
+_PG_INSERT_NODES = text(
+    "INSERT INTO nodes (graph_id, name, topo_index) "
+    "SELECT :graph_id, n.name, n.topo_index "
+    "FROM unnest(:names, :topo_index) WITH ORDINALITY AS n(name, topo_index, pos) "
+    "ORDER BY n.pos "
+    "RETURNING id, name"
+).bindparams(
+    bindparam("graph_id", type_=Integer),
+    bindparam("names", type_=ARRAY(String)),
+    bindparam("topo_index", type_=ARRAY(Integer)),
+)
+
+_PG_INSERT_EDGES = text(
+    "INSERT INTO edges (graph_id, source_id, target_id) "
+    "SELECT :graph_id, e.source_id, e.target_id "
+    "FROM unnest(:source_ids, :target_ids) AS e(source_id, target_id)"
+).bindparams(
+    bindparam("graph_id", type_=Integer),
+    bindparam("source_ids", type_=ARRAY(Integer)),
+    bindparam("target_ids", type_=ARRAY(Integer)),
+)
+
+_PG_SET_TOPO_INDEX = text(
+    "UPDATE nodes SET topo_index = v.topo_index "
+    "FROM unnest(:node_ids, :topo_index) AS v(id, topo_index) "
+    "WHERE nodes.id = v.id"
+).bindparams(
+    bindparam("node_ids", type_=ARRAY(Integer)),
+    bindparam("topo_index", type_=ARRAY(Integer)),
+)
+
+
+def insert_graph(db: Session,
+                 node_names: Sequence[str],
+                 sources: Sequence[int],
+                 targets: Sequence[int],
+                 topo_index: Sequence[int],
+                 content_hash: Optional[str] = None) -> int:
+    """Store an already validated graph and return its id.
+
+    Edges are given as indices into ``node_names``; ``topo_index[i]`` is the
+    topological position of node ``i``. Rows are written with Core statements,
+    so no ORM objects are created for nodes or edges regardless of graph size.
+    """
+    graph_id = new_graph_id(db, content_hash)
+    if not node_names:
+        return graph_id
+
+    postgresql = db.get_bind().dialect.name == "postgresql"
+    if postgresql:
+        id_by_name = _insert_nodes_postgresql(db, graph_id, node_names, topo_index)
+    else:
+        id_by_name = _insert_nodes_executemany(db, graph_id, node_names, topo_index)
+
+    if not sources:
+        return graph_id
+
+    node_ids = [id_by_name[name] for name in node_names]
+    source_ids = [node_ids[s] for s in sources]
+    target_ids = [node_ids[t] for t in targets]
+    if postgresql:
+        db.execute(_PG_INSERT_EDGES, {"graph_id": graph_id, "source_ids": source_ids, "target_ids": target_ids})
+    else:
+        db.execute(
+            insert(models.Edge.__table__),
+            [{"graph_id": graph_id, "source_id": s, "target_id": t} for s, t in zip(source_ids, target_ids)],
+        )
+    return graph_id
+
+
+def new_graph_id(db: Session, content_hash: Optional[str] = None) -> int:
+    new_graph = models.Graph(content_hash=content_hash)
+    db.add(new_graph)
+    db.flush()
+    return new_graph.id
+
+
+def find_graph(db: Session, content_hash: str) -> Optional[int]:
+    """Id of the oldest graph stored with ``content_hash`` and not changed since, if any."""
+    return db.execute(
+        select(models.Graph.id).where(models.Graph.content_hash == content_hash).order_by(models.Graph.id).limit(1)
+    ).scalar_one_or_none()
+
+
+def _insert_nodes_postgresql(db: Session, graph_id: int, node_names: Sequence[str],
+                             topo_index: Sequence[int]) -> dict:
+    rows = db.execute(_PG_INSERT_NODES, {"graph_id": graph_id,
+                                         "names": list(node_names),
+                                         "topo_index": list(topo_index)})
+    return {name: node_id for node_id, name in rows}
+
+
+def _insert_nodes_executemany(db: Session, graph_id: int, node_names: Sequence[str],
+                              topo_index: Sequence[int]) -> dict:
+    db.execute(
+        insert(models.Node.__table__),
+        [{"graph_id": graph_id, "name": name, "topo_index": position}
+         for name, position in zip(node_names, topo_index)],
+    )
+    rows = db.execute(
+        select(models.Node.id, models.Node.name).where(models.Node.graph_id == graph_id)
+    )
+    return {name: node_id for node_id, name in rows}
+
+
+def insert_nodes(db: Session, graph_id: int, node_names: Sequence[str]) -> dict:
+    """Insert one batch of nodes with a provisional ``topo_index`` of 0; return name -> id."""
+    rows = db.execute(
+        insert(models.Node.__table__).returning(models.Node.id, models.Node.name),
+        [{"graph_id": graph_id, "name": name, "topo_index": 0} for name in node_names],
+    )
+    return {name: node_id for node_id, name in rows}
+
+
+def insert_new_edges(db: Session, graph_id: int, pairs: Sequence[tuple]) -> set:
+    """Insert ``(source_id, target_id)`` pairs, skipping ones already stored; return the inserted pairs."""
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    table = models.Edge.__table__
+    rows = db.execute(
+        dialect_insert(table).on_conflict_do_nothing().returning(table.c.source_id, table.c.target_id),
+        [{"graph_id": graph_id, "source_id": s, "target_id": t} for s, t in pairs],
+    )
+    return set(map(tuple, rows))
+
+
+def set_topo_index(db: Session, node_ids: Sequence[int], topo_index: Sequence[int]) -> None:
+    if not node_ids:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(_PG_SET_TOPO_INDEX, {"node_ids": list(node_ids), "topo_index": list(topo_index)})
+        return
+    table = models.Node.__table__
+    db.execute(
+        update(table).where(table.c.id == bindparam("node_id")).values(topo_index=bindparam("position")),
+        [{"node_id": node_id, "position": position} for node_id, position in zip(node_ids, topo_index)],
+    )
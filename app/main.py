@@ -1,18 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException, Path, Request, Response
-from fastapi.responses import JSONResponse
+from typing import Literal, Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
-from app import models, schemas
-from app.database import Base, engine, SessionLocal
-import re
+from app import database, formats, metrics, models, mutations, schemas, traversal, validation
+from app.database import DB_MIGRATE_ON_STARTUP, DB_POOL_WARMUP, Database, warm_up
+from app.cache import GRAPH_CACHE_BODIES, GRAPH_CACHE_VALIDATE, graph_cache
+from app.compact import ENCODERS, CompactGraph, encode_view, graph_versions, load_graph_arrays
+from app.encoding import etag_matches, make_etag
+from app.executor import cpu_pool
+from app.ingest import GRAPH_DEDUP, find_graph, insert_graph
+from app.metrics import run_in_threadpool
+from app.migrations import upgrade
+from app.ndjson import NDJSON_MEDIA_TYPE, GraphImport, export_lines, export_lines_async
+from app.reachability import REACH_INDEX_ENABLED, build_reach_index
+from app.traversal import TRAVERSAL_ENGINE
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    if DB_MIGRATE_ON_STARTUP:
+        if database.async_engine is not None:
+            async with database.async_engine.begin() as conn:
+                await conn.run_sync(upgrade)
+        else:
+            with database.engine.begin() as conn:
+                upgrade(conn)
+    await warm_up(DB_POOL_WARMUP)
     yield
+    cpu_pool.shutdown()
 
 app = FastAPI(title="FastAPI", version="0.1.0", lifespan=lifespan)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.exception_handler(HTTPException)
@@ -23,45 +47,205 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         content = {"message": exc.detail["message"]}
     else:
         content = {"message": exc.detail}
-    return JSONResponse(status_code=exc.status_code, content=content)
+    return JSONResponse(status_code=exc.status_code, content=content, headers=exc.headers)
+
+
+@app.exception_handler(validation.InvalidGraph)
+async def invalid_graph_handler(request: Request, exc: validation.InvalidGraph):
+    return JSONResponse(status_code=400, content={"message": str(exc)})
+
 
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    # Node names are checked by the schema pattern; keep answering those with
+    # the 400 and message the API has always used. Anything else stays a 422.
+    errors = exc.errors()
+    if errors and all(error["type"] == "string_pattern_mismatch" and error["loc"][-1] == "name" for error in errors):
+        return JSONResponse(status_code=400, content={"message": validation.INVALID_NODE_NAME})
+    return await request_validation_exception_handler(request, exc)
 
-def get_db():
-    db = SessionLocal()
+
+async def get_db():
+    db = Database.open()
     try:
         yield db
-        db.commit()
+        with metrics.phase("commit"):
+            await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
     finally:
-        db.close()
-
-
-def detect_cycle(nodes: list, edges: list) -> bool:
-    graph_adj = {name: [] for name in nodes}
-    for (src, tgt) in edges:
-        graph_adj[src].append(tgt)
-    visited = set()
-    in_stack = set()
-
-    def dfs(node: str) -> bool:
-        if node in in_stack:
-            return True
-        if node in visited:
-            return False
-        visited.add(node)
-        in_stack.add(node)
-        for nei in graph_adj.get(node, []):
-            if dfs(nei):
-                return True
-        in_stack.remove(node)
-        return False
-
-    for n in nodes:
-        if dfs(n):
-            return True
-    return False
+        await db.close()
+
+
+async def get_read_db(request: Request):
+    """Session for handlers that only read: nothing to commit, served by the read pool.
+
+    A graph this process has just written is read from the primary instead,
+    see ``database.read_from_replica``.
+    """
+    graph_id = request.path_params.get("graph_id", "")
+    db = Database.open(replica=not graph_id.isdigit() or database.read_from_replica(int(graph_id)))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def graph_changed(graph_id: int) -> None:
+    graph_cache.invalidate(graph_id)
+    database.graph_written(graph_id)
+
+
+async def get_compact_graph(db: Database, graph_id: int) -> CompactGraph:
+    graph = graph_cache.get(graph_id)
+    if graph is not None and GRAPH_CACHE_VALIDATE:
+        graph = (await current_snapshots(db, {graph_id: graph})).get(graph_id)
+    if graph is None:
+        generation = graph_cache.generation()
+        with metrics.phase("load"):
+            arrays = await db.run(load_graph_arrays, [graph_id])
+        if not arrays:
+            raise HTTPException(status_code=404, detail="Graph not found")
+        graph = (await build_snapshots(arrays))[graph_id]
+        metrics.rows_read(graph.node_count + graph.edge_count)
+        graph_cache.put(graph_id, graph, generation)
+    return graph
+
+
+async def current_snapshots(db: Database, graphs: dict) -> dict:
+    """The cached ``graphs`` that are still current in ``db``; the others are invalidated.
+
+    Another worker's writes only invalidate its own cache, but every write bumps
+    ``graphs.version`` (``mutations.lock_graph``), so one primary key lookup per
+    request tells whether a snapshot is stale. A lower version than the cached
+    one comes from a lagging replica and keeps the snapshot.
+    """
+    with metrics.phase("version"):
+        versions = await db.run(graph_versions, list(graphs))
+    current = {}
+    for graph_id, graph in graphs.items():
+        version = versions.get(graph_id)
+        if version is not None and version <= graph.version:
+            current[graph_id] = graph
+        else:
+            graph_cache.invalidate(graph_id)
+    return current
+
+
+async def build_snapshots(arrays: dict) -> dict:
+    """``CompactGraph`` for each ``(names, sources, targets, version)`` from ``load_graph_arrays``, off the event loop.
+
+    Large graphs are built in the CPU pool one by one; all small ones share a
+    single threadpool call, as in ``view_bodies``.
+    """
+    graphs = {}
+    with metrics.phase("build"):
+        small = {}
+        for graph_id, data in arrays.items():
+            if cpu_pool.offloads(len(data[1])):
+                graphs[graph_id] = await cpu_pool.run(CompactGraph, graph_id, *data)
+            else:
+                small[graph_id] = data
+        if small:
+            graphs.update(await run_in_threadpool(
+                lambda: {graph_id: CompactGraph(graph_id, *data) for graph_id, data in small.items()}))
+    return graphs
+
+
+async def encoded_view(request: Request, graph: CompactGraph, view: str, columnar_view: Optional[str] = None) -> Response:
+    """Serve one of ``compact.VIEWS`` in the format the client asked for, reusing bodies kept on the snapshot.
+
+    The format follows the Accept header (see ``app.formats``); routes with a
+    columnar form pass its view as ``columnar_view``. Large bodies are
+    compressed when Accept-Encoding allows. The body bypasses
+    ``response_model`` validation: it is built from data that was validated on
+    the way in. The ETag lets clients revalidate for free.
+    """
+    media_type, columnar, encoding = formats.negotiate(request.headers.get("accept"), columnar_view is not None)
+    if columnar:
+        view = columnar_view
+    body, etag = (await view_bodies([graph], view, encoding))[0]
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    coding = formats.content_coding(request.headers.get("accept-encoding")) if len(body) >= formats.COMPRESS_MIN_BYTES else None
+    if coding is not None:
+        body, etag = await compressed_body(graph, body_key(view, encoding), coding, body, etag)
+        headers["Content-Encoding"] = coding
+    headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def body_key(view: str, encoding: str) -> str:
+    """Key of an encoded view in ``CompactGraph.bodies``."""
+    return view if encoding == "json" else f"{view}.{encoding}"
+
+
+async def compressed_body(graph: CompactGraph, key: str, coding: str, body: bytes, etag: str) -> tuple:
+    """``(body, etag)`` of ``body`` compressed with ``coding``, cached next to it."""
+    key = f"{key}+{coding}"
+    cached = graph.bodies.get(key)
+    if cached is None:
+        with metrics.phase("compress"):
+            compress = cpu_pool.run if cpu_pool.offloads(graph.edge_count) else run_in_threadpool
+            compressed = await compress(formats.compress, body, coding)
+        # A different representation needs a different strong validator.
+        cached = (compressed, f'{etag[:-1]}-{coding}"')
+        if GRAPH_CACHE_BODIES:
+            graph.bodies[key] = cached
+            graph_cache.grow(graph.graph_id, graph, len(compressed))
+    return cached
+
+
+async def view_bodies(graphs: list, view: str, encoding: str = "json") -> list:
+    """``(body, etag)`` of ``view`` for each snapshot, encoding the ones not cached yet.
+
+    Large graphs are encoded in the CPU pool one by one; all small ones share
+    a single threadpool call.
+    """
+    key = body_key(view, encoding)
+    missing = [graph for graph in graphs if key not in graph.bodies]
+    if missing:
+        with metrics.phase("serialize"):
+            large = [graph for graph in missing if cpu_pool.offloads(graph.edge_count)]
+            small = [graph for graph in missing if not cpu_pool.offloads(graph.edge_count)]
+            encoded = {}
+            for graph in large:
+                encoded[graph.graph_id] = await cpu_pool.run(encode_view, graph, view, encoding)
+            if small:
+                bodies = await run_in_threadpool(lambda: [encode_view(graph, view, encoding) for graph in small])
+                encoded.update(zip((graph.graph_id for graph in small), bodies))
+    result = []
+    for graph in graphs:
+        cached = graph.bodies.get(key)
+        if cached is None:
+            body = encoded[graph.graph_id]
+            cached = (body, make_etag(body))
+            if GRAPH_CACHE_BODIES:
+                graph.bodies[key] = cached
+                graph_cache.grow(graph.graph_id, graph, len(body))
+        result.append(cached)
+    return result
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    body, media_type = metrics.render()
+    return Response(content=body, media_type=media_type)
+
+
+@app.get("/cache/stats", include_in_schema=False)
+async def cache_stats():
+    return graph_cache.stats()
+
+
+def body_schema(model) -> dict:
+    """JSON schema of ``model`` for ``openapi_extra``, pointing nested models at the shared components."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return schema
 
 
 from fastapi import APIRouter
@@ -71,98 +255,145 @@ router = APIRouter(prefix="/api/graph")
 
 @router.post("/",
              summary="Create Graph",
-             description="Ручка для создания графа, принимает граф в виде списка вершин и списка ребер.",
+             description="Ручка для создания графа, принимает граф в виде списка вершин и списка ребер.\nКроме JSON принимает MessagePack (`application/x-msgpack`) и колоночную форму - таблицу имен вершин и списки индексов концов ребер (`application/vnd.dag.columnar+json`, `application/vnd.dag.columnar+msgpack`).",
+             response_model=schemas.GraphCreateResponse,
+             status_code=201,
+             responses={
+                 400: {"model": schemas.ErrorResponse, "description": "Failed to add graph"},
+                 415: {"model": schemas.ErrorResponse, "description": "Unsupported media type"}
+             },
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 formats.JSON: {"schema": body_schema(schemas.GraphCreate)},
+                 formats.MSGPACK: {"schema": body_schema(schemas.GraphCreate)},
+                 formats.COLUMNAR_JSON: {"schema": body_schema(schemas.ColumnarGraphCreate)},
+                 formats.COLUMNAR_MSGPACK: {"schema": body_schema(schemas.ColumnarGraphCreate)},
+             }}}
+             )
+async def create_graph(request: Request, db: Database = Depends(get_db)):
+    body = await request.body()
+    node_names, edge_sources, edge_targets = await run_in_threadpool(
+        formats.decode_graph, request.headers.get("content-type"), body)
+    offload = cpu_pool.offloads(len(edge_sources))
+    content_hash = None
+    if GRAPH_DEDUP:
+        # An identical stored graph is valid, so validation and inserts are skipped.
+        with metrics.phase("hash"):
+            hash_graph = cpu_pool.run if offload else run_in_threadpool
+            content_hash = await hash_graph(validation.content_hash, node_names, edge_sources, edge_targets)
+        existing = await db.run(find_graph, content_hash)
+        if existing is not None:
+            metrics.graph_deduplicated()
+            return created_response(request, existing)
+    if offload:
+        with metrics.phase("prepare"):
+            sources, targets, topo_index = await cpu_pool.run(
+                validation.prepare_graph, node_names, edge_sources, edge_targets)
+    else:
+        sources, targets, topo_index = await run_in_threadpool(
+            validation.prepare_graph, node_names, edge_sources, edge_targets)
+    with metrics.phase("insert"):
+        graph_id = await db.run(insert_graph, node_names, sources, targets, topo_index, content_hash)
+    metrics.graph_created(len(node_names), len(sources))
+    db.after_commit(lambda: database.graph_written(graph_id))
+    return created_response(request, graph_id)
+
+
+def created_response(request: Request, graph_id: int) -> Response:
+    media_type, _, encoding = formats.negotiate(request.headers.get("accept"))
+    return Response(content=ENCODERS[encoding]({"id": graph_id}), status_code=201, media_type=media_type,
+                    headers={"Vary": "Accept"})
+
+
+@router.post("/import",
+             summary="Import Graph (NDJSON)",
+             description="Потоковая загрузка графа в формате NDJSON: сначала строки вершин `{\"name\": ...}`, затем строки ребер `{\"source\": ..., \"target\": ...}`. Проверки те же, что при создании графа; запись идет пачками по мере чтения тела запроса.",
              response_model=schemas.GraphCreateResponse,
              status_code=201,
              responses={
                  400: {"model": schemas.ErrorResponse, "description": "Failed to add graph"}
-             }
+             },
+             openapi_extra={"requestBody": {"required": True, "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}}}}
+             )
+async def import_graph(request: Request, db: Database = Depends(get_db)):
+    job = GraphImport()
+    with metrics.phase("stream"):
+        async for chunk in request.stream():
+            job.feed(chunk)
+            if job.needs_flush:
+                await db.run(job.flush)
+        job.feed_eof()
+    with metrics.phase("finish"):
+        graph_id = await db.run(job.finish)
+    metrics.graph_created(len(job.names), len(job.sources))
+    db.after_commit(lambda: database.graph_written(graph_id))
+    return schemas.GraphCreateResponse(id=graph_id)
+
+
+@router.post("/batch",
+             summary="Read Graphs (batch)",
+             description="Ручка для чтения многих графов за один запрос: принимает список id и представление (`graph`, `adjacency`, `reverse`).\nДля каждого id возвращается `status` 200 и `data` - то же, что отдает соответствующая ручка чтения, либо `status` 404 и `message`.",
+             response_model=schemas.GraphBatchResponse,
              )
-def create_graph(graph: schemas.GraphCreate, db: Session = Depends(get_db)):
-    node_names = [node.name for node in graph.nodes]
-    edge_pairs = [(edge.source, edge.target) for edge in graph.edges]
-
-    if len(node_names) != len(set(node_names)):
-        seen = set()
-        dup_name = None
-        for name in node_names:
-            if name in seen:
-                dup_name = name
-                break
-            seen.add(name)
-        raise HTTPException(status_code=400, detail=f"Duplicate node name '{dup_name}'")
-
-    pattern = re.compile(r'^[A-Za-z0-9]{1,255}$')
-    for name in node_names:
-        if not pattern.match(name):
-            raise HTTPException(status_code=400,
-                                detail="Invalid node name. Names must be 1-255 characters long and use only Latin letters.")
-
-    if len(edge_pairs) != len(set(edge_pairs)):
-        seen_edges = set()
-        dup_edge = None
-        for e in edge_pairs:
-            if e in seen_edges:
-                dup_edge = e
-                break
-            seen_edges.add(e)
-        if dup_edge:
-            src, tgt = dup_edge
-            raise HTTPException(status_code=400, detail=f"Duplicate edge from '{src}' to '{tgt}'")
-
-    node_set = set(node_names)
-    for (src, tgt) in edge_pairs:
-        if src not in node_set or tgt not in node_set:
-            raise HTTPException(status_code=400, detail="Edge references an undefined node.")
-
-    for (src, tgt) in edge_pairs:
-        if src == tgt:
-            raise HTTPException(status_code=400, detail=f"Self-loop detected on node '{src}'")
-
-    if detect_cycle(node_names, edge_pairs):
-        raise HTTPException(status_code=400, detail="Graph contains a cycle and cannot be added.")
-
-    new_graph = models.Graph()
-    db.add(new_graph)
-    db.flush()
-
-    name_to_node = {}
-    for name in node_names:
-        node = models.Node(name=name, graph_id=new_graph.id)
-        db.add(node)
-        name_to_node[name] = node
-    db.flush()
-
-    for (src, tgt) in edge_pairs:
-        source_node = name_to_node[src]
-        target_node = name_to_node[tgt]
-        edge = models.Edge(graph_id=new_graph.id, source_id=source_node.id, target_id=target_node.id)
-        db.add(edge)
-
-    return schemas.GraphCreateResponse(id=new_graph.id)
+async def read_graphs(batch: schemas.GraphBatchRequest, db: Database = Depends(get_read_db)):
+    graph_ids = list(dict.fromkeys(batch.ids))
+    graphs = {}
+    missing = []
+    for graph_id in graph_ids:
+        graph = graph_cache.get(graph_id)
+        if graph is None:
+            missing.append(graph_id)
+        else:
+            graphs[graph_id] = graph
+    if graphs and GRAPH_CACHE_VALIDATE:
+        current = await current_snapshots(db, graphs)
+        missing.extend(graph_id for graph_id in graphs if graph_id not in current)
+        graphs = current
+    if missing:
+        generation = graph_cache.generation()
+        # Graphs this process has just written come from the primary, as in get_read_db.
+        recent = [graph_id for graph_id in missing if not database.read_from_replica(graph_id)] if db.replica else []
+        with metrics.phase("load"):
+            arrays = await db.run(load_graph_arrays, [graph_id for graph_id in missing if graph_id not in recent])
+            if recent:
+                primary = Database.open()
+                try:
+                    arrays.update(await primary.run(load_graph_arrays, recent))
+                finally:
+                    await primary.close()
+        loaded = await build_snapshots(arrays)
+        for graph_id, graph in loaded.items():
+            metrics.rows_read(graph.node_count + graph.edge_count)
+            graph_cache.put(graph_id, graph, generation)
+        graphs.update(loaded)
+
+    found = [graphs[graph_id] for graph_id in graph_ids if graph_id in graphs]
+    bodies = dict(zip((graph.graph_id for graph in found), await view_bodies(found, batch.view)))
+    # The per-graph bodies are already encoded; splice them instead of decoding.
+    items = []
+    for graph_id in graph_ids:
+        if graph_id in bodies:
+            items.append(b'{"id":%d,"status":200,"data":%s}' % (graph_id, bodies[graph_id][0]))
+        else:
+            items.append(b'{"id":%d,"status":404,"message":"Graph not found"}' % graph_id)
+    return Response(content=b'{"graphs":[' + b",".join(items) + b"]}", media_type="application/json")
 
 
 @router.get("/{graph_id}/",
             summary="Read Graph",
-            description="Ручка для чтения графа в виде списка вершин и списка ребер.",
+            description="Ручка для чтения графа в виде списка вершин и списка ребер.\nФормат выбирается заголовком Accept: JSON, MessagePack (`application/x-msgpack`) или колоночная форма (`application/vnd.dag.columnar+json`, `application/vnd.dag.columnar+msgpack`).",
             response_model=schemas.GraphReadResponse,
             responses={
+                200: {"content": {
+                    formats.MSGPACK: {"schema": body_schema(schemas.GraphReadResponse)},
+                    formats.COLUMNAR_JSON: {"schema": body_schema(schemas.ColumnarGraphResponse)},
+                    formats.COLUMNAR_MSGPACK: {"schema": body_schema(schemas.ColumnarGraphResponse)},
+                }},
                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
             }
             )
-def read_graph(graph_id: int = Path(..., title="Graph Id"), db: Session = Depends(get_db)):
-    graph = db.get(models.Graph, graph_id)
-    if graph is None:
-        raise HTTPException(status_code=404, detail="Graph not found")
-
-    nodes = db.query(models.Node).filter(models.Node.graph_id == graph_id).all()
-    edges = db.query(models.Edge).filter(models.Edge.graph_id == graph_id).all()
-
-    name_by_id = {node.id: node.name for node in nodes}
-    node_list = [schemas.Node(name=node.name) for node in nodes]
-    edge_list = [schemas.Edge(source=name_by_id[edge.source_id], target=name_by_id[edge.target_id]) for edge in edges]
-
-    return schemas.GraphReadResponse(id=graph_id, nodes=node_list, edges=edge_list)
+async def read_graph(request: Request, graph_id: int = Path(..., title="Graph Id"), db: Database = Depends(get_read_db)):
+    graph = await get_compact_graph(db, graph_id)
+    return await encoded_view(request, graph, "graph", columnar_view="columnar")
 
 
 @router.get("/{graph_id}/adjacency_list",
@@ -173,23 +404,10 @@ def read_graph(graph_id: int = Path(..., title="Graph Id"), db: Session = Depend
                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
             }
             )
-def get_adjacency_list(graph_id: int = Path(..., title="Graph Id"), db: Session = Depends(get_db)):
-    graph = db.get(models.Graph, graph_id)
-    if graph is None:
-        raise HTTPException(status_code=404, detail="Graph not found")
-
-    nodes = db.query(models.Node).filter(models.Node.graph_id == graph_id).all()
-    edges = db.query(models.Edge).filter(models.Edge.graph_id == graph_id).all()
-
-    name_by_id = {node.id: node.name for node in nodes}
-    adjacency: dict[str, list[str]] = {node.name: [] for node in nodes}
-    for edge in edges:
-        src_name = name_by_id[edge.source_id]
-        tgt_name = name_by_id[edge.target_id]
-        adjacency[src_name].append(tgt_name)
-    for neighbors in adjacency.values():
-        neighbors.sort()
-    return schemas.AdjacencyListResponse(adjacency_list=adjacency)
+async def get_adjacency_list(request: Request, graph_id: int = Path(..., title="Graph Id"),
+                             db: Database = Depends(get_read_db)):
+    graph = await get_compact_graph(db, graph_id)
+    return await encoded_view(request, graph, "adjacency")
 
 
 @router.get("/{graph_id}/reverse_adjacency_list",
@@ -200,23 +418,210 @@ def get_adjacency_list(graph_id: int = Path(..., title="Graph Id"), db: Session
                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
             }
             )
-def get_reverse_adjacency_list(graph_id: int = Path(..., title="Graph Id"), db: Session = Depends(get_db)):
-    graph = db.get(models.Graph, graph_id)
-    if graph is None:
+async def get_reverse_adjacency_list(request: Request, graph_id: int = Path(..., title="Graph Id"),
+                                     db: Database = Depends(get_read_db)):
+    graph = await get_compact_graph(db, graph_id)
+    return await encoded_view(request, graph, "reverse")
+
+
+@router.get("/{graph_id}/topological_order",
+            summary="Get Topological Order",
+            description="Ручка для чтения вершин графа в топологическом порядке: каждая вершина идет раньше всех своих потомков.\nПорядок - это уровни ручки `levels` подряд.",
+            response_model=schemas.NodeListResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+            }
+            )
+async def get_topological_order(request: Request, graph_id: int = Path(..., title="Graph Id"),
+                                db: Database = Depends(get_read_db)):
+    graph = await get_compact_graph(db, graph_id)
+    return await encoded_view(request, graph, "topological_order")
+
+
+@router.get("/{graph_id}/levels",
+            summary="Get Levels",
+            description="Ручка для разбиения графа на уровни для параллельного выполнения.\nУровень вершины - число ребер самого длинного пути к ней из вершины без предков. Вершины одного уровня не связаны между собой и могут выполняться параллельно после всех предыдущих уровней.\n`critical_path_length` - число вершин на самом длинном пути (число уровней).",
+            response_model=schemas.LevelsResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+            }
+            )
+async def get_levels(request: Request, graph_id: int = Path(..., title="Graph Id"), db: Database = Depends(get_read_db)):
+    graph = await get_compact_graph(db, graph_id)
+    return await encoded_view(request, graph, "levels")
+
+
+@router.get("/{graph_id}/export",
+            summary="Export Graph (NDJSON)",
+            description="Потоковая выгрузка графа в формате NDJSON: строки вершин, затем строки ребер. Данные читаются из БД курсором пачками, поэтому расход памяти не зависит от размера графа.",
+            response_class=StreamingResponse,
+            responses={
+                200: {"content": {NDJSON_MEDIA_TYPE: {}}},
+                404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+            }
+            )
+async def export_graph(graph_id: int = Path(..., title="Graph Id"), db: Database = Depends(get_read_db)):
+    if not await db.run(_graph_exists, graph_id):
         raise HTTPException(status_code=404, detail="Graph not found")
+    lines = export_lines_async(graph_id, db.replica) if db.is_async else export_lines(graph_id, db.replica)
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
+def _graph_exists(db: Session, graph_id: int) -> bool:
+    return db.get(models.Graph, graph_id) is not None
 
-    nodes = db.query(models.Node).filter(models.Node.graph_id == graph_id).all()
-    edges = db.query(models.Edge).filter(models.Edge.graph_id == graph_id).all()
 
-    name_by_id = {node.id: node.name for node in nodes}
-    reverse_adj: dict[str, list[str]] = {node.name: [] for node in nodes}
-    for edge in edges:
-        src_name = name_by_id[edge.source_id]
-        tgt_name = name_by_id[edge.target_id]
-        reverse_adj[tgt_name].append(src_name)
-    for neighbors in reverse_adj.values():
-        neighbors.sort()
-    return schemas.AdjacencyListResponse(adjacency_list=reverse_adj)
+Engine = Optional[Literal["memory", "sql"]]
+
+
+@router.get("/{graph_id}/node/{node_name}/descendants",
+            summary="Get Descendants",
+            description="Ручка для получения всех потомков вершины (вершин, достижимых из нее), отсортированных по имени.\n`max_depth` ограничивает число ребер от вершины, `engine` выбирает, где идет обход: `memory` - по графу в памяти сервиса, `sql` - рекурсивным запросом в БД.",
+            response_model=schemas.NodeListResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph or node not found"}
+            }
+            )
+async def get_descendants(graph_id: int = Path(..., title="Graph Id"),
+                          node_name: str = Path(..., title="Node Name"),
+                          max_depth: Optional[int] = Query(None, ge=1, title="Max Depth"),
+                          engine: Engine = Query(None, title="Engine"),
+                          db: Database = Depends(get_read_db)):
+    return {"nodes": await _reach(db, graph_id, node_name, "forward", max_depth, engine)}
+
+
+@router.get("/{graph_id}/node/{node_name}/ancestors",
+            summary="Get Ancestors",
+            description="Ручка для получения всех предков вершины (вершин, из которых она достижима), отсортированных по имени.\nПараметры `max_depth` и `engine` - как у ручки потомков.",
+            response_model=schemas.NodeListResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph or node not found"}
+            }
+            )
+async def get_ancestors(graph_id: int = Path(..., title="Graph Id"),
+                        node_name: str = Path(..., title="Node Name"),
+                        max_depth: Optional[int] = Query(None, ge=1, title="Max Depth"),
+                        engine: Engine = Query(None, title="Engine"),
+                        db: Database = Depends(get_read_db)):
+    return {"nodes": await _reach(db, graph_id, node_name, "backward", max_depth, engine)}
+
+
+@router.get("/{graph_id}/shortest_path",
+            summary="Get Shortest Path",
+            description="Ручка для поиска кратчайшего (по числу ребер) пути из `source` в `target`.\nВозвращает список имен вершин пути или `null`, если пути нет (или он длиннее `max_depth` ребер).",
+            response_model=schemas.PathResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph or node not found"}
+            }
+            )
+async def get_shortest_path(graph_id: int = Path(..., title="Graph Id"),
+                            source: str = Query(..., title="Source"),
+                            target: str = Query(..., title="Target"),
+                            max_depth: Optional[int] = Query(None, ge=1, title="Max Depth"),
+                            engine: Engine = Query(None, title="Engine"),
+                            db: Database = Depends(get_read_db)):
+    if (engine or TRAVERSAL_ENGINE) == "sql":
+        ids = await db.run(_node_ids, graph_id, [source, target])
+        if ids[source] == ids[target]:
+            return {"path": [source]}
+        return {"path": await db.run(traversal.sql_shortest_path, ids[source], ids[target], max_depth)}
+    graph = await get_compact_graph(db, graph_id)
+    src, tgt = _node_indices(graph, [source, target])
+    return {"path": await run_in_threadpool(traversal.memory_shortest_path, graph, src, tgt, max_depth)}
+
+
+@router.get("/{graph_id}/is_reachable",
+            summary="Is Reachable",
+            description="Ручка для проверки, достижима ли вершина `target` из вершины `source` (не более чем за `max_depth` ребер, если задано).",
+            response_model=schemas.ReachabilityResponse,
+            responses={
+                404: {"model": schemas.ErrorResponse, "description": "Graph or node not found"}
+            }
+            )
+async def get_is_reachable(graph_id: int = Path(..., title="Graph Id"),
+                           source: str = Query(..., title="Source"),
+                           target: str = Query(..., title="Target"),
+                           max_depth: Optional[int] = Query(None, ge=1, title="Max Depth"),
+                           engine: Engine = Query(None, title="Engine"),
+                           db: Database = Depends(get_read_db)):
+    if (engine or TRAVERSAL_ENGINE) == "sql":
+        ids = await db.run(_node_ids, graph_id, [source, target])
+        return {"reachable": await db.run(traversal.sql_is_reachable, ids[source], ids[target], max_depth)}
+    graph = await get_compact_graph(db, graph_id)
+    src, tgt = _node_indices(graph, [source, target])
+    # The index only pays off over many queries, i.e. on a snapshot the cache keeps.
+    if max_depth is None and REACH_INDEX_ENABLED and (
+            graph.reach_index is not None or graph_cache.holds(graph_id, graph)):
+        index = await reach_index(graph)
+        if index.constant_time:
+            return {"reachable": index.reachable(graph, src, tgt)}
+        return {"reachable": await run_in_threadpool(index.reachable, graph, src, tgt)}
+    path = await run_in_threadpool(traversal.memory_shortest_path, graph, src, tgt, max_depth)
+    return {"reachable": path is not None}
+
+
+async def reach_index(graph: CompactGraph):
+    """The snapshot's reachability index, built on first use and counted against the cache budget."""
+    if graph.reach_index is None:
+        with metrics.phase("index"):
+            if cpu_pool.offloads(graph.edge_count):
+                index = await cpu_pool.run(build_reach_index, graph)
+            else:
+                index = await run_in_threadpool(build_reach_index, graph)
+        if graph.reach_index is None:
+            graph.reach_index = index
+            graph_cache.grow(graph.graph_id, graph, index.nbytes)
+    return graph.reach_index
+
+
+async def _reach(db: Database, graph_id: int, node_name: str, direction: str,
+                 max_depth: Optional[int], engine: Optional[str]) -> list:
+    if (engine or TRAVERSAL_ENGINE) == "sql":
+        ids = await db.run(_node_ids, graph_id, [node_name])
+        return await db.run(traversal.sql_reach, ids[node_name], direction, max_depth)
+    graph = await get_compact_graph(db, graph_id)
+    (node,) = _node_indices(graph, [node_name])
+    walk = traversal.memory_descendants if direction == "forward" else traversal.memory_ancestors
+    return await run_in_threadpool(walk, graph, node, max_depth)
+
+
+def _node_indices(graph: CompactGraph, names: list) -> list:
+    index = graph.index
+    if any(name not in index for name in names):
+        raise HTTPException(status_code=404, detail="Node not found")
+    return [index[name] for name in names]
+
+
+def _node_ids(db: Session, graph_id: int, names: list) -> dict:
+    """Resolve node names to ids with one graphs LEFT JOIN nodes query; 404 on a missing graph or node."""
+    rows = db.execute(
+        select(models.Graph.id, models.Node.id, models.Node.name)
+        .outerjoin(models.Node, and_(models.Node.graph_id == models.Graph.id, models.Node.name.in_(names)))
+        .where(models.Graph.id == graph_id)
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    ids = {name: node_id for _, node_id, name in rows if name is not None}
+    if len(ids) != len(set(names)):
+        raise HTTPException(status_code=404, detail="Node not found")
+    return ids
+
+
+@router.post("/{graph_id}/node",
+             summary="Add Node",
+             description="Ручка для добавления вершины в существующий граф. Новая вершина не связана с остальными.",
+             response_model=schemas.Node,
+             status_code=201,
+             responses={
+                 400: {"model": schemas.ErrorResponse, "description": "Failed to add node"},
+                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+             }
+             )
+async def add_node(node: schemas.Node, graph_id: int = Path(..., title="Graph Id"), db: Database = Depends(get_db)):
+    with metrics.phase("mutate"):
+        await db.run(_patch_graph, graph_id, schemas.GraphPatch(add_nodes=[node]))
+    db.after_commit(lambda: graph_changed(graph_id))
+    return node
 
 
 @router.delete("/{graph_id}/node/{node_name}",
@@ -227,17 +632,96 @@ def get_reverse_adjacency_list(graph_id: int = Path(..., title="Graph Id"), db:
                    404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
                }
                )
-def delete_node(graph_id: int = Path(..., title="Graph Id"),
-                node_name: str = Path(..., title="Node Name"),
-                db: Session = Depends(get_db)):
-    graph = db.get(models.Graph, graph_id)
-    if graph is None:
-        raise HTTPException(status_code=404, detail="Graph not found")
-    node = db.query(models.Node).filter(models.Node.graph_id == graph_id, models.Node.name == node_name).one_or_none()
-    if node is None:
-        raise HTTPException(status_code=404, detail="Node not found")
-    db.delete(node)
+async def delete_node(graph_id: int = Path(..., title="Graph Id"),
+                      node_name: str = Path(..., title="Node Name"),
+                      db: Database = Depends(get_db)):
+    with metrics.phase("delete"):
+        await db.run(_patch_graph, graph_id, schemas.GraphPatch(remove_nodes=[node_name]))
+    db.after_commit(lambda: graph_changed(graph_id))
+    return Response(status_code=204)
+
+
+@router.post("/{graph_id}/nodes/delete",
+             summary="Delete Nodes",
+             description="Ручка для удаления многих вершин графа по именам одним запросом к БД. Ребра этих вершин удаляются вместе с ними.\nЕсли какой-то вершины нет, не удаляется ни одна.",
+             status_code=204,
+             responses={
+                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+             }
+             )
+async def delete_nodes(batch: schemas.NodeDeleteRequest, graph_id: int = Path(..., title="Graph Id"),
+                       db: Database = Depends(get_db)):
+    with metrics.phase("delete"):
+        await db.run(_patch_graph, graph_id, schemas.GraphPatch(remove_nodes=batch.names))
+    db.after_commit(lambda: graph_changed(graph_id))
+    return Response(status_code=204)
+
+
+@router.post("/{graph_id}/edge",
+             summary="Add Edge",
+             description="Ручка для добавления ребра между существующими вершинами графа.\nПроверка на цикл инкрементальная: просматриваются только вершины между концами ребра в сохраненном топологическом порядке.",
+             response_model=schemas.Edge,
+             status_code=201,
+             responses={
+                 400: {"model": schemas.ErrorResponse, "description": "Failed to add edge"},
+                 404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+             }
+             )
+async def add_edge(edge: schemas.Edge, graph_id: int = Path(..., title="Graph Id"), db: Database = Depends(get_db)):
+    with metrics.phase("mutate"):
+        await db.run(_patch_graph, graph_id, schemas.GraphPatch(add_edges=[edge]))
+    db.after_commit(lambda: graph_changed(graph_id))
+    return edge
+
+
+@router.delete("/{graph_id}/edge/{source}/{target}",
+               summary="Delete Edge",
+               description="Ручка для удаления ребра из графа по именам его концов.",
+               status_code=204,
+               responses={
+                   404: {"model": schemas.ErrorResponse, "description": "Graph or edge not found"}
+               }
+               )
+async def delete_edge(graph_id: int = Path(..., title="Graph Id"),
+                      source: str = Path(..., title="Source"),
+                      target: str = Path(..., title="Target"),
+                      db: Database = Depends(get_db)):
+    with metrics.phase("mutate"):
+        edge = schemas.Edge(source=source, target=target)
+        await db.run(_patch_graph, graph_id, schemas.GraphPatch(remove_edges=[edge]))
+    db.after_commit(lambda: graph_changed(graph_id))
     return Response(status_code=204)
 
 
+@router.patch("/{graph_id}/",
+              summary="Patch Graph",
+              description="Ручка для пакетного изменения графа в одной транзакции: удаление ребер, удаление вершин, добавление вершин, добавление ребер (в этом порядке).\nЛюбая ошибка отменяет весь пакет.",
+              response_model=schemas.GraphCreateResponse,
+              responses={
+                  400: {"model": schemas.ErrorResponse, "description": "Failed to patch graph"},
+                  404: {"model": schemas.ErrorResponse, "description": "Graph entity not found"}
+              }
+              )
+async def patch_graph(patch: schemas.GraphPatch, graph_id: int = Path(..., title="Graph Id"),
+                      db: Database = Depends(get_db)):
+    with metrics.phase("mutate"):
+        await db.run(_patch_graph, graph_id, patch)
+    db.after_commit(lambda: graph_changed(graph_id))
+    return schemas.GraphCreateResponse(id=graph_id)
+
+
+def _patch_graph(db: Session, graph_id: int, patch: schemas.GraphPatch) -> None:
+    if not (patch.remove_edges or patch.add_nodes or patch.add_edges):
+        # Node deletes alone take the graph lock in their own statement.
+        mutations.delete_nodes(db, graph_id, patch.remove_nodes)
+        return
+    mutations.lock_graph(db, graph_id)
+    for edge in patch.remove_edges:
+        mutations.delete_edge(db, graph_id, edge.source, edge.target)
+    mutations.delete_nodes(db, graph_id, patch.remove_nodes, locked=True)
+    mutations.add_nodes(db, graph_id, [node.name for node in patch.add_nodes])
+    for edge in patch.add_edges:
+        mutations.add_edge(db, graph_id, edge.source, edge.target)
+
+
 app.include_router(router)
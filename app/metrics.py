@@ -0,0 +1,203 @@
+import cProfile
+import os
+import pstats
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from starlette import concurrency
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Add a Server-Timing header with the phase durations to every response.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+# Allow profiling a single request with the X-Profile header. Not for production:
+# the profile is written to PROFILE_DIR and its path returned to the client.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", tempfile.gettempdir())
+PROFILE_HEADER = "x-profile"
+
+registry = CollectorRegistry()
+
+_LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+_SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    ("method", "route", "status"), buckets=_LATENCY_BUCKETS, registry=registry,
+)
+PHASE_SECONDS = Histogram(
+    "request_phase_duration_seconds", "Time spent in one phase of a request handler.",
+    ("route", "phase"), buckets=_LATENCY_BUCKETS, registry=registry,
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Wait for a connection from the pool, once per request.",
+    buckets=_LATENCY_BUCKETS, registry=registry,
+)
+DB_ROWS = Counter(
+    "db_rows", "Node and edge rows read from or written to the database.",
+    ("operation",), registry=registry,
+)
+GRAPH_NODES = Histogram(
+    "graph_nodes", "Nodes per created graph.", buckets=_SIZE_BUCKETS, registry=registry,
+)
+GRAPH_EDGES = Histogram(
+    "graph_edges", "Edges per created graph.", buckets=_SIZE_BUCKETS, registry=registry,
+)
+GRAPHS_DEDUPLICATED = Counter(
+    "graphs_deduplicated", "Creates answered with the id of an identical stored graph.", registry=registry,
+)
+CPU_POOL_PENDING = Gauge(
+    "cpu_pool_pending", "Jobs running or queued in the CPU process pool.", registry=registry,
+)
+CPU_POOL_REJECTED = Counter(
+    "cpu_pool_rejected", "Jobs refused with a 503 because the CPU process pool was saturated.", registry=registry,
+)
+
+
+class RequestState:
+    __slots__ = ("scope", "phases", "profiles")
+
+    def __init__(self, scope: dict, profile: bool):
+        self.scope = scope
+        self.phases = []
+        self.profiles = [] if profile else None
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+_request: ContextVar[Optional[RequestState]] = ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as phase ``name`` of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state = _request.get()
+        if state is not None:
+            elapsed = time.perf_counter() - started
+            state.phases.append((name, elapsed))
+            PHASE_SECONDS.labels(state.route, name).observe(elapsed)
+
+
+def observe_pool_checkout(seconds: float) -> None:
+    POOL_CHECKOUT_SECONDS.observe(seconds)
+
+
+def rows_read(rows: int) -> None:
+    DB_ROWS.labels("read").inc(rows)
+
+
+def rows_written(rows: int) -> None:
+    DB_ROWS.labels("written").inc(rows)
+
+
+def graph_created(node_count: int, edge_count: int) -> None:
+    GRAPH_NODES.observe(node_count)
+    GRAPH_EDGES.observe(edge_count)
+    rows_written(node_count + edge_count)
+
+
+def graph_deduplicated() -> None:
+    GRAPHS_DEDUPLICATED.inc()
+
+
+async def run_in_threadpool(fn, *args, **kwargs):
+    """``starlette.concurrency.run_in_threadpool`` that also profiles ``fn`` when the request is profiled.
+
+    cProfile only sees the thread it was enabled in, so work handed to the
+    threadpool gets a profile of its own, merged into the request's at the end.
+    """
+    state = _request.get()
+    if state is not None and state.profiles is not None:
+        fn = _profiled(fn, state.profiles)
+    return await concurrency.run_in_threadpool(fn, *args, **kwargs)
+
+
+def _profiled(fn, profiles: list):
+    def call(*args, **kwargs):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            profiles.append(profile)
+    return call
+
+
+def render() -> tuple:
+    """Body and content type for the /metrics endpoint."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+_profile_ids = count()
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency, Server-Timing and per-request profiles."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = PROFILING_ENABLED and any(name == PROFILE_HEADER.encode() for name, _ in scope["headers"])
+        state = RequestState(scope, profile)
+        token = _request.set(state)
+        started = time.perf_counter()
+        status = 500
+        loop_profile = None
+        if profile:
+            loop_profile = cProfile.Profile()
+            state.profiles.append(loop_profile)
+            loop_profile.enable()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                if SERVER_TIMING:
+                    headers.append((b"server-timing", _server_timing(state, time.perf_counter() - started)))
+                if profile:
+                    loop_profile.disable()
+                    headers.append((PROFILE_HEADER.encode(), _dump_profiles(state.profiles).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profile:
+                loop_profile.disable()
+            _request.reset(token)
+            REQUEST_SECONDS.labels(scope["method"], state.route, str(status)).observe(time.perf_counter() - started)
+
+
+def _server_timing(state: RequestState, total: float) -> bytes:
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in state.phases]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode()
+
+
+def _dump_profiles(profiles: list) -> str:
+    """Merge the request's profiles into one pstats file; return its path."""
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    path = os.path.join(PROFILE_DIR, f"profile-{os.getpid()}-{next(_profile_ids)}.prof")
+    stats.dump_stats(path)
+    return path
@@ -0,0 +1,94 @@
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection
+
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+from app import database
+from app.algorithms import topological_sort
+from app.database import Base
+
+
+def _backfill_topo_index(connection: Connection) -> None:
+    """Number the nodes of each graph in a topological order of its stored edges."""
+    nodes, edges = models.Node.__table__, models.Edge.__table__
+    for graph_id in connection.execute(select(models.Graph.__table__.c.id)).scalars().all():
+        node_ids = connection.execute(
+            select(nodes.c.id).where(nodes.c.graph_id == graph_id).order_by(nodes.c.id)).scalars().all()
+        if not node_ids:
+            continue
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        rows = connection.execute(
+            select(edges.c.source_id, edges.c.target_id).where(edges.c.graph_id == graph_id)).all()
+        result = topological_sort(len(node_ids), [index[src] for src, _ in rows], [index[tgt] for _, tgt in rows])
+        if result.cycle is not None:
+            raise RuntimeError(f"graph {graph_id} has a cycle, cannot backfill nodes.topo_index")
+        connection.execute(
+            update(nodes).where(nodes.c.id == bindparam("node_id")).values(topo_index=bindparam("position")),
+            [{"node_id": node_ids[node], "position": position} for position, node in enumerate(result.order)],
+        )
+
+
+def _backfill_version(connection: Connection) -> None:
+    connection.execute(update(models.Graph.__table__).values(version=0))
+
+
+# NOT NULL columns added to existing tables: the value existing rows get until
+# the backfill runs (SQLite needs one to add the column), and the backfill.
+_BACKFILLS = {
+    "graphs.version": (0, _backfill_version),
+    "nodes.topo_index": (0, _backfill_topo_index),
+}
+
+
+def upgrade(connection: Connection) -> list:
+    """Bring the schema up to ``app.models``; return what was created (``table.column`` and index names).
+
+    ``create_all`` only creates missing tables, together with their indexes.
+    Nullable columns and indexes added to a model later are created here on
+    existing tables, so a deployed database picks them up on the next start.
+    NOT NULL columns are added only if ``_BACKFILLS`` knows how to fill them.
+    """
+    Base.metadata.create_all(connection)
+    inspector = inspect(connection)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                qualified = f"{table.name}.{column.name}"
+                column_type = column.type.compile(dialect=connection.dialect)
+                if column.nullable:
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                elif qualified in _BACKFILLS:
+                    _add_backfilled_column(connection, table.name, column.name, column_type, *_BACKFILLS[qualified])
+                else:
+                    raise RuntimeError(f"cannot add NOT NULL column {qualified} to an existing table")
+                created.append(qualified)
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+    return created
+
+
+def _add_backfilled_column(connection: Connection, table: str, column: str, column_type: str,
+                           default, backfill) -> None:
+    if connection.dialect.name == "sqlite":
+        # SQLite cannot make a column NOT NULL later, only add it with a default.
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type} NOT NULL DEFAULT {default}"))
+        backfill(connection)
+    else:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+        backfill(connection)
+        connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+
+
+def main() -> None:
+    """``python -m app.migrations``: migrate DATABASE_URL once, e.g. before starting the workers."""
+    with database.engine.begin() as conn:
+        created = upgrade(conn)
+    print("created: " + (", ".join(created) if created else "nothing"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, UniqueConstraint
 from app.database import Base
 
 class Graph(Base):
     __tablename__ = "graphs"
     id = Column(Integer, primary_key=True)
+    # validation.content_hash of the graph as created; cleared by any mutation.
+    content_hash = Column(String(64), nullable=True)
+    # Bumped by every mutation (mutations.lock_graph). Each process compares it
+    # with the snapshot in its own graph cache to spot writes made elsewhere.
+    version = Column(Integer, nullable=False, default=0)
+    __table_args__ = (
+        Index("ix_graph_content_hash", "content_hash"),
+    )
 
 class Node(Base):
     __tablename__ = "nodes"
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     graph_id = Column(Integer, ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False)
-    __table_args__ = (UniqueConstraint("graph_id", "name", name="uq_node_graph_name"),)
+    # Position of the node in a topological order of its graph. Deleting nodes
+    # keeps the remaining positions a valid order, so it never needs rewriting.
+    topo_index = Column(Integer, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("graph_id", "name", name="uq_node_graph_name"),
+        # New nodes are appended after MAX(topo_index) of their graph.
+        Index("ix_node_graph_topo", "graph_id", "topo_index"),
+    )
 
 class Edge(Base):
     __tablename__ = "edges"
@@ -18,4 +33,11 @@ class Edge(Base):
     graph_id = Column(Integer, ForeignKey("graphs.id", ondelete="CASCADE"), nullable=False)
     source_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False)
     target_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False)
-    __table_args__ = (UniqueConstraint("graph_id", "source_id", "target_id", name="uq_edge_graph_src_tgt"),)
+    # The unique constraint serves per-graph reads. The two covering indexes
+    # serve lookups by either endpoint: successors/predecessors of a node and
+    # the ON DELETE CASCADE from nodes, which would otherwise scan the table.
+    __table_args__ = (
+        UniqueConstraint("graph_id", "source_id", "target_id", name="uq_edge_graph_src_tgt"),
+        Index("ix_edge_source_target", "source_id", "target_id"),
+        Index("ix_edge_target_source", "target_id", "source_id"),
+    )
@@ -0,0 +1,195 @@
+from typing import Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, bindparam, delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app import models, validation
+from app.ingest import insert_new_edges, set_topo_index
+
+# Pearce–Kelly: after adding source -> target with topo(source) > topo(target),
+# only nodes whose position lies between the two can be out of order. These
+# walk that region: forward from the target up to topo(source), backward from
+# the source down to topo(target). The binds are typed for asyncpg, which
+# cannot infer the type of the bare ``SELECT :start``. The forward region also
+# returns the predecessors of each of its nodes (one row per incoming edge), so
+# the path of a cycle is rebuilt from rows already read.
+_FORWARD_REGION_SQL = text("""
+WITH RECURSIVE region(id) AS (
+    SELECT :start
+    UNION
+    SELECT e.target_id FROM edges e
+    JOIN region r ON e.source_id = r.id
+    JOIN nodes n ON n.id = e.target_id
+    WHERE n.topo_index <= :bound
+)
+SELECT n.id, n.topo_index, e.source_id FROM region
+JOIN nodes n ON n.id = region.id
+LEFT JOIN edges e ON e.target_id = region.id
+""").bindparams(bindparam("start", type_=Integer), bindparam("bound", type_=Integer))
+
+_BACKWARD_REGION_SQL = text("""
+WITH RECURSIVE region(id) AS (
+    SELECT :start
+    UNION
+    SELECT e.source_id FROM edges e
+    JOIN region r ON e.target_id = r.id
+    JOIN nodes n ON n.id = e.source_id
+    WHERE n.topo_index >= :bound
+)
+SELECT n.id, n.topo_index FROM region JOIN nodes n ON n.id = region.id
+""").bindparams(bindparam("start", type_=Integer), bindparam("bound", type_=Integer))
+
+
+def lock_graph(db: Session, graph_id: int) -> None:
+    """Serialize mutations of one graph by locking its row; 404 if it does not exist.
+
+    The lock is taken by an UPDATE that also clears ``content_hash`` (the graph
+    is about to stop matching it, so identical submissions must not be
+    deduplicated onto it any more) and bumps ``version``, which tells other
+    processes that their cached snapshot is out of date.
+    """
+    row = db.execute(_lock_statement(graph_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+
+
+def _lock_statement(graph_id: int):
+    return (
+        update(models.Graph).where(models.Graph.id == graph_id)
+        .values(content_hash=None, version=models.Graph.version + 1)
+        .returning(models.Graph.id)
+    )
+
+
+def add_nodes(db: Session, graph_id: int, names: Sequence[str]) -> None:
+    """Append isolated nodes at the end of the topological order."""
+    if not names:
+        return
+    existing = db.execute(
+        select(models.Node.name).where(models.Node.graph_id == graph_id, models.Node.name.in_(names))
+    ).scalars().first()
+    if existing is not None:
+        raise HTTPException(status_code=400, detail=validation.duplicate_node(existing))
+    if len(set(names)) != len(names):
+        seen = set()
+        for name in names:
+            if name in seen:
+                raise HTTPException(status_code=400, detail=validation.duplicate_node(name))
+            seen.add(name)
+    last = db.execute(
+        select(func.max(models.Node.topo_index)).where(models.Node.graph_id == graph_id)
+    ).scalar_one()
+    start = 0 if last is None else last + 1
+    db.execute(
+        insert(models.Node.__table__),
+        [{"graph_id": graph_id, "name": name, "topo_index": start + i} for i, name in enumerate(names)],
+    )
+
+
+def delete_nodes(db: Session, graph_id: int, names: Sequence[str], locked: bool = False) -> None:
+    """Delete nodes by name; 404 unless the graph and all of them exist.
+
+    Unless the caller already holds ``lock_graph``, PostgreSQL takes the lock
+    in the same statement, through a data-modifying CTE, so a successful call
+    is one round trip however many nodes it removes. Other dialects send the
+    ``lock_graph`` UPDATE first. Edges go by ON DELETE CASCADE through the
+    endpoint indexes. The remaining positions still form a valid topological
+    order.
+    """
+    names = list(dict.fromkeys(names))
+    if not locked and (not names or db.get_bind().dialect.name != "postgresql"):
+        lock_graph(db, graph_id)
+        locked = True
+    if not names:
+        return
+    if locked:
+        graph = graph_id
+    else:
+        lock = _lock_statement(graph_id).cte("locked_graph")
+        graph = select(lock.c.id).scalar_subquery()
+    deleted = db.execute(
+        delete(models.Node)
+        .where(models.Node.graph_id == graph, models.Node.name.in_(names))
+        .returning(models.Node.id)
+    ).all()
+    if len(deleted) != len(names):
+        if not locked:
+            # Nothing deleted may also mean no such graph; answer that one first.
+            lock_graph(db, graph_id)
+        raise HTTPException(status_code=404, detail="Node not found")
+
+
+def add_edge(db: Session, graph_id: int, source: str, target: str) -> None:
+    """Insert one edge, keeping ``nodes.topo_index`` a topological order; 400 on a cycle."""
+    rows = db.execute(
+        select(models.Node.name, models.Node.id, models.Node.topo_index)
+        .where(models.Node.graph_id == graph_id, models.Node.name.in_((source, target)))
+    ).all()
+    nodes = {name: (node_id, position) for name, node_id, position in rows}
+    if source not in nodes or target not in nodes:
+        raise HTTPException(status_code=400, detail=validation.UNDEFINED_NODE)
+    if source == target:
+        raise HTTPException(status_code=400, detail=validation.self_loop(source))
+    (source_id, source_pos), (target_id, target_pos) = nodes[source], nodes[target]
+
+    if source_pos > target_pos:
+        _reorder(db, source, source_id, source_pos, target_id, target_pos)
+    if not insert_new_edges(db, graph_id, [(source_id, target_id)]):
+        raise HTTPException(status_code=400, detail=validation.duplicate_edge(source, target))
+
+
+def _reorder(db: Session, source: str, source_id: int, source_pos: int, target_id: int, target_pos: int) -> None:
+    forward = {}
+    parents = {}
+    for node_id, position, parent_id in db.execute(_FORWARD_REGION_SQL, {"start": target_id, "bound": source_pos}):
+        forward[node_id] = position
+        if parent_id is not None:
+            parents.setdefault(node_id, []).append(parent_id)
+    if source_id in forward:
+        path = _region_path(forward, parents, target_id, source_id)
+        names = dict(db.execute(select(models.Node.id, models.Node.name).where(models.Node.id.in_(path))).all())
+        raise HTTPException(status_code=400, detail=validation.cycle([source] + [names[i] for i in path]))
+    backward = dict(db.execute(_BACKWARD_REGION_SQL, {"start": source_id, "bound": target_pos}).all())
+    # Reuse the positions the two regions occupy: everything that reaches the
+    # source goes first, everything reachable from the target after it, each
+    # group keeping its relative order.
+    positions = sorted([*forward.values(), *backward.values()])
+    nodes = sorted(backward, key=backward.__getitem__) + sorted(forward, key=forward.__getitem__)
+    set_topo_index(db, nodes, positions)
+
+
+def _region_path(region: dict, parents: dict, start: int, goal: int) -> list:
+    """Fewest-edges path from ``start`` to ``goal``, a BFS back from ``goal`` over the predecessors in ``region``.
+
+    Predecessors outside the region cannot be reached from ``start`` and are skipped.
+    """
+    child = {goal: None}
+    frontier = [goal]
+    while start not in child:
+        level = []
+        for node in frontier:
+            for parent in sorted(parents.get(node, ())):
+                if parent in region and parent not in child:
+                    child[parent] = node
+                    level.append(parent)
+        frontier = level
+    path = [start]
+    while path[-1] != goal:
+        path.append(child[path[-1]])
+    return path
+
+
+def delete_edge(db: Session, graph_id: int, source: str, target: str) -> None:
+    """Remove one edge. The topological order stays valid, so nothing else changes."""
+    source_node = models.Node.__table__.alias("source_node")
+    target_node = models.Node.__table__.alias("target_node")
+    edge_id = db.execute(
+        select(models.Edge.id)
+        .join(source_node, source_node.c.id == models.Edge.source_id)
+        .join(target_node, target_node.c.id == models.Edge.target_id)
+        .where(models.Edge.graph_id == graph_id, source_node.c.name == source, target_node.c.name == target)
+    ).scalar_one_or_none()
+    if edge_id is None:
+        raise HTTPException(status_code=404, detail="Edge not found")
+    db.execute(delete(models.Edge).where(models.Edge.id == edge_id))
@@ -0,0 +1,181 @@
+import os
+from array import array
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from app import database, models, validation
+from app.algorithms import topological_sort_compact
+from app.encoding import DecodeError, dumps, loads
+from app.ingest import insert_new_edges, insert_nodes, new_graph_id, set_topo_index
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows per INSERT on import and per fetch from the server-side cursor on export.
+NDJSON_BATCH_SIZE = int(os.environ.get("NDJSON_BATCH_SIZE", "5000"))
+
+
+class GraphImport:
+    """One streaming NDJSON import: ``{"name": ...}`` lines, then ``{"source": ..., "target": ...}`` lines.
+
+    ``feed`` parses and validates request chunks as they arrive; ``flush`` and
+    ``finish`` run on a ``Session`` and write what has been validated so far.
+    Besides the pending batch, only the node names and the edges as two int
+    arrays are held, which the final cycle check needs. Duplicate edges are
+    detected by the unique constraint while inserting.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or NDJSON_BATCH_SIZE
+        self.graph_id = None
+        self.names = []
+        self.index = {}
+        self.node_ids = array("q")
+        self.sources = array("i")
+        self.targets = array("i")
+        self._pending_nodes = []
+        self._pending_edges = []
+        self._buffer = b""
+        self._line_no = 0
+
+    @property
+    def needs_flush(self) -> bool:
+        return len(self._pending_nodes) + len(self._pending_edges) >= self.batch_size
+
+    def feed(self, chunk: bytes) -> None:
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def feed_eof(self) -> None:
+        line, self._buffer = self._buffer, b""
+        self._feed_line(line)
+
+    def _feed_line(self, line: bytes) -> None:
+        self._line_no += 1
+        if not line.strip():
+            return
+        try:
+            item = loads(line)
+        except DecodeError:
+            raise HTTPException(status_code=400, detail=f"Line {self._line_no} is not valid JSON.")
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=400, detail=f"Line {self._line_no} is not a JSON object.")
+        if "name" in item:
+            self._add_node(item["name"])
+        elif "source" in item and "target" in item:
+            self._add_edge(item["source"], item["target"])
+        else:
+            raise HTTPException(status_code=400, detail=f"Line {self._line_no} is neither a node nor an edge.")
+
+    def _add_node(self, name) -> None:
+        if len(self.sources) or self._pending_edges:
+            raise HTTPException(status_code=400, detail=f"Line {self._line_no}: node lines must precede edge lines.")
+        if not isinstance(name, str) or not validation.node_name_re.fullmatch(name):
+            raise HTTPException(status_code=400, detail=validation.INVALID_NODE_NAME)
+        if name in self.index:
+            raise HTTPException(status_code=400, detail=validation.duplicate_node(name))
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self._pending_nodes.append(name)
+
+    def _add_edge(self, source, target) -> None:
+        src = self.index.get(source) if isinstance(source, str) else None
+        tgt = self.index.get(target) if isinstance(target, str) else None
+        if src is None or tgt is None:
+            raise HTTPException(status_code=400, detail=validation.UNDEFINED_NODE)
+        if src == tgt:
+            raise HTTPException(status_code=400, detail=validation.self_loop(source))
+        self._pending_edges.append((src, tgt))
+
+    def flush(self, db: Session) -> None:
+        if self.graph_id is None:
+            self.graph_id = new_graph_id(db)
+        if self._pending_nodes:
+            id_by_name = insert_nodes(db, self.graph_id, self._pending_nodes)
+            self.node_ids.extend(id_by_name[name] for name in self._pending_nodes)
+            self._pending_nodes = []
+        if self._pending_edges:
+            node_ids = self.node_ids
+            pairs = [(node_ids[s], node_ids[t]) for s, t in self._pending_edges]
+            inserted = insert_new_edges(db, self.graph_id, pairs)
+            if len(inserted) != len(pairs):
+                self._raise_duplicate(pairs, inserted)
+            for src, tgt in self._pending_edges:
+                self.sources.append(src)
+                self.targets.append(tgt)
+            self._pending_edges = []
+
+    def _raise_duplicate(self, pairs: list, inserted: set) -> None:
+        seen = set()
+        for (src, tgt), pair in zip(self._pending_edges, pairs):
+            if pair in seen or pair not in inserted:
+                raise HTTPException(status_code=400,
+                                    detail=validation.duplicate_edge(self.names[src], self.names[tgt]))
+            seen.add(pair)
+
+    def finish(self, db: Session) -> int:
+        self.flush(db)
+        topo = topological_sort_compact(len(self.names), self.sources, self.targets)
+        if topo.cycle is not None:
+            raise HTTPException(status_code=400, detail=validation.cycle([self.names[i] for i in topo.cycle]))
+        topo_index = array("i", bytes(4 * len(self.names)))
+        for position, node in enumerate(topo.order):
+            topo_index[node] = position
+        for start in range(0, len(self.node_ids), self.batch_size):
+            end = start + self.batch_size
+            set_topo_index(db, self.node_ids[start:end], topo_index[start:end])
+        return self.graph_id
+
+
+def _node_lines_query(graph_id: int):
+    return (
+        select(models.Node.name)
+        .where(models.Node.graph_id == graph_id)
+        .order_by(models.Node.id)
+        .execution_options(yield_per=NDJSON_BATCH_SIZE)
+    )
+
+
+def _edge_lines_query(graph_id: int):
+    source = aliased(models.Node)
+    target = aliased(models.Node)
+    return (
+        select(source.name, target.name)
+        .select_from(models.Edge)
+        .join(source, models.Edge.source_id == source.id)
+        .join(target, models.Edge.target_id == target.id)
+        .where(models.Edge.graph_id == graph_id)
+        .execution_options(yield_per=NDJSON_BATCH_SIZE)
+    )
+
+
+def _node_lines(rows) -> bytes:
+    return b"".join(dumps({"name": name}) + b"\n" for (name,) in rows)
+
+
+def _edge_lines(rows) -> bytes:
+    return b"".join(dumps({"source": source, "target": target}) + b"\n" for source, target in rows)
+
+
+def export_lines(graph_id: int, replica: bool = False) -> Iterator[bytes]:
+    """NDJSON export read through a server-side cursor, one chunk per fetched batch.
+
+    It opens its own session, because the request session is closed before a
+    streaming response starts sending; ``replica`` takes it from the read pool.
+    """
+    with (database.ReadSessionLocal if replica else database.SessionLocal)() as db:
+        for rows in db.execute(_node_lines_query(graph_id)).partitions():
+            yield _node_lines(rows)
+        for rows in db.execute(_edge_lines_query(graph_id)).partitions():
+            yield _edge_lines(rows)
+
+
+async def export_lines_async(graph_id: int, replica: bool = False) -> AsyncIterator[bytes]:
+    async with (database.AsyncReadSessionLocal if replica else database.AsyncSessionLocal)() as db:
+        async for rows in (await db.stream(_node_lines_query(graph_id))).partitions():
+            yield _node_lines(rows)
+        async for rows in (await db.stream(_edge_lines_query(graph_id))).partitions():
+            yield _edge_lines(rows)
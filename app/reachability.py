@@ -0,0 +1,152 @@
+import os
+import random
+from array import array
+from typing import Optional
+
+# Answer unbounded reachability queries from a per-graph index kept with the
+# cached snapshot instead of running a BFS per query.
+REACH_INDEX_ENABLED = os.environ.get("REACH_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+# Largest transitive closure (one bit per node pair) built for a graph; bigger
+# graphs get interval labels instead.
+REACH_INDEX_MAX_BYTES = int(os.environ.get("REACH_INDEX_MAX_BYTES", str(32 * 1024 * 1024)))
+# Number of random interval labelings per node for large graphs.
+REACH_INDEX_LABELS = int(os.environ.get("REACH_INDEX_LABELS", "2"))
+
+
+class ClosureIndex:
+    """Transitive closure as a bit matrix: row ``u`` has bit ``v`` set if ``v`` is reachable from ``u``.
+
+    Rows are built in reverse topological order by OR-ing the rows of the
+    successors, so each row is computed once. Queries are a single byte lookup;
+    ``graph`` is accepted only to share the interface of ``IntervalIndex``.
+    """
+
+    constant_time = True
+
+    def __init__(self, offsets, targets, levels: list, node_count: int):
+        self.row_bytes = row_bytes = (node_count + 7) // 8
+        rows = [0] * node_count
+        for level in reversed(levels):
+            for node in level:
+                bits = 0
+                for pos in range(offsets[node], offsets[node + 1]):
+                    nxt = targets[pos]
+                    bits |= rows[nxt] | (1 << nxt)
+                rows[node] = bits
+        self.matrix = b"".join(bits.to_bytes(row_bytes, "little") for bits in rows)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.matrix)
+
+    def reachable(self, graph, source: int, target: int) -> bool:
+        if source == target:
+            return True
+        return bool(self.matrix[source * self.row_bytes + (target >> 3)] >> (target & 7) & 1)
+
+
+class IntervalIndex:
+    """GRAIL: ``labels`` random post-order intervals per node plus the node's level.
+
+    Only the labels are stored; queries walk the adjacency of the snapshot
+    they were built from.
+
+    If ``u`` reaches ``v`` then every interval of ``v`` lies inside the
+    matching interval of ``u`` and ``v`` sits on a deeper level, so most
+    negative queries are rejected in O(labels). The rest run a DFS that skips
+    every node failing the same test. Memory is linear in the node count.
+    """
+
+    constant_time = False
+
+    def __init__(self, offsets, targets, levels: list, node_count: int, labels: int, seed: int = 0):
+        self.level = array("i", bytes(4 * node_count))
+        for depth, level in enumerate(levels):
+            for node in level:
+                self.level[node] = depth
+        rng = random.Random(seed)
+        self.intervals = [_post_order_intervals(offsets, targets, node_count, rng) for _ in range(labels)]
+
+    @property
+    def nbytes(self) -> int:
+        return 4 * len(self.level) * (1 + 2 * len(self.intervals))
+
+    def _may_reach(self, source: int, target: int) -> bool:
+        for low, rank in self.intervals:
+            if low[source] > low[target] or rank[target] > rank[source]:
+                return False
+        return True
+
+    def reachable(self, graph, source: int, target: int) -> bool:
+        if source == target:
+            return True
+        level, offsets, targets = self.level, graph.fwd_offsets, graph.fwd_targets
+        target_level = level[target]
+        if level[source] >= target_level or not self._may_reach(source, target):
+            return False
+        seen = {source}
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            for pos in range(offsets[node], offsets[node + 1]):
+                nxt = targets[pos]
+                if nxt == target:
+                    return True
+                if nxt in seen or level[nxt] >= target_level or not self._may_reach(nxt, target):
+                    continue
+                seen.add(nxt)
+                stack.append(nxt)
+        return False
+
+
+def _post_order_intervals(offsets, targets, node_count: int, rng: random.Random) -> tuple:
+    """One randomized DFS: post-order ``rank`` of each node and the lowest rank ``low`` below it."""
+    rank = array("i", bytes(4 * node_count))
+    low = array("i", [node_count]) * node_count
+    visited = bytearray(node_count)
+
+    def children(node):
+        nodes = list(targets[offsets[node]:offsets[node + 1]])
+        rng.shuffle(nodes)
+        return iter(nodes)
+
+    roots = list(range(node_count))
+    rng.shuffle(roots)
+    counter = 0
+    for root in roots:
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, children(root))]
+        while stack:
+            node, pending = stack[-1]
+            for child in pending:
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append((child, children(child)))
+                    break
+                # Already finished: a DAG has no edges back into the DFS stack.
+                if low[child] < low[node]:
+                    low[node] = low[child]
+            else:
+                stack.pop()
+                rank[node] = counter
+                if counter < low[node]:
+                    low[node] = counter
+                counter += 1
+                if stack:
+                    parent = stack[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+    return low, rank
+
+
+def build_reach_index(graph, max_bytes: Optional[int] = None, labels: Optional[int] = None):
+    """Closure for graphs whose bit matrix fits in ``max_bytes``, interval labels otherwise."""
+    max_bytes = REACH_INDEX_MAX_BYTES if max_bytes is None else max_bytes
+    labels = REACH_INDEX_LABELS if labels is None else labels
+    node_count = graph.node_count
+    levels = graph.index_levels()
+    if node_count * ((node_count + 7) // 8) <= max_bytes:
+        return ClosureIndex(graph.fwd_offsets, graph.fwd_targets, levels, node_count)
+    return IntervalIndex(graph.fwd_offsets, graph.fwd_targets, levels, node_count, labels)
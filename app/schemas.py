@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, List, Dict, Literal, Optional
+from app.validation import NODE_NAME_PATTERN
 
 class Node(BaseModel):
-    name: str = Field(..., title="Name")
+    # Checked by pydantic-core while parsing; a mismatch is reported as a 400
+    # with validation.INVALID_NODE_NAME (see the handler in app.main).
+    name: str = Field(..., title="Name", pattern=NODE_NAME_PATTERN)
 
 class Edge(BaseModel):
     source: str = Field(..., title="Source")
@@ -12,16 +15,71 @@ class GraphCreate(BaseModel):
     nodes: List[Node] = Field(..., title="Nodes")
     edges: List[Edge] = Field(..., title="Edges")
 
+class ColumnarGraphCreate(BaseModel):
+    # Edge i goes from nodes[sources[i]] to nodes[targets[i]]. Names and
+    # indices are checked in app.formats, with the same messages as GraphCreate.
+    nodes: List[str] = Field(..., title="Nodes")
+    sources: List[int] = Field(..., title="Sources")
+    targets: List[int] = Field(..., title="Targets")
+
+    @model_validator(mode="after")
+    def _same_length(self):
+        if len(self.sources) != len(self.targets):
+            raise ValueError("sources and targets must have the same length")
+        return self
+
 class GraphCreateResponse(BaseModel):
     id: int = Field(..., title="Id")
 
+class GraphPatch(BaseModel):
+    # Applied in this order: remove edges, remove nodes, add nodes, add edges.
+    remove_edges: List[Edge] = Field([], title="Remove Edges")
+    remove_nodes: List[str] = Field([], title="Remove Nodes")
+    add_nodes: List[Node] = Field([], title="Add Nodes")
+    add_edges: List[Edge] = Field([], title="Add Edges")
+
+class NodeDeleteRequest(BaseModel):
+    names: List[str] = Field(..., title="Names", min_length=1, max_length=10000)
+
 class GraphReadResponse(BaseModel):
     id: int = Field(..., title="Id")
     nodes: List[Node] = Field(..., title="Nodes")
     edges: List[Edge] = Field(..., title="Edges")
 
+class ColumnarGraphResponse(BaseModel):
+    id: int = Field(..., title="Id")
+    nodes: List[str] = Field(..., title="Nodes")
+    sources: List[int] = Field(..., title="Sources")
+    targets: List[int] = Field(..., title="Targets")
+
 class AdjacencyListResponse(BaseModel):
     adjacency_list: Dict[str, List[str]] = Field(..., title="Adjacency List")
 
+class GraphBatchRequest(BaseModel):
+    ids: List[int] = Field(..., title="Ids", max_length=1000)
+    view: Literal["graph", "adjacency", "reverse"] = Field("adjacency", title="View")
+
+class GraphBatchItem(BaseModel):
+    id: int = Field(..., title="Id")
+    status: int = Field(..., title="Status")
+    data: Optional[Dict[str, Any]] = Field(None, title="Data")
+    message: Optional[str] = Field(None, title="Message")
+
+class GraphBatchResponse(BaseModel):
+    graphs: List[GraphBatchItem] = Field(..., title="Graphs")
+
 class ErrorResponse(BaseModel):
     message: str = Field(..., title="Message")
+
+class NodeListResponse(BaseModel):
+    nodes: List[str] = Field(..., title="Nodes")
+
+class LevelsResponse(BaseModel):
+    levels: List[List[str]] = Field(..., title="Levels")
+    critical_path_length: int = Field(..., title="Critical Path Length")
+
+class PathResponse(BaseModel):
+    path: Optional[List[str]] = Field(..., title="Path")
+
+class ReachabilityResponse(BaseModel):
+    reachable: bool = Field(..., title="Reachable")
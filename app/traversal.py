@@ -0,0 +1,144 @@
+import os
+from typing import Optional
+
+from sqlalchemy import Integer, bindparam, select, text
+from sqlalchemy.orm import Session
+
+from app import algorithms, models
+from app.compact import CompactGraph
+
+# "memory": BFS over the cached CompactGraph. "sql": queries over ``edges``, so
+# only the answer leaves the database.
+TRAVERSAL_ENGINE = os.environ.get("TRAVERSAL_ENGINE", "memory")
+TRAVERSAL_ENGINES = ("memory", "sql")
+
+# Recursive terms follow ``edges`` in either direction: descendants walk
+# source -> target, ancestors target -> source.
+_DIRECTIONS = {
+    "forward": ("source_id", "target_id"),
+    "backward": ("target_id", "source_id"),
+}
+
+# Without a depth limit one recursive CTE does the walk: UNION on the node id
+# alone keeps its working set at O(reached nodes). A depth limit would have to
+# carry the depth along and deduplicate (id, depth) pairs, one row per distinct
+# path length to each node, which explodes on DAGs with many paths. Bounded
+# walks and shortest paths therefore run a BFS with one statement per level
+# (``_bfs``), sending only the new frontier.
+_REACH_SQL = """
+WITH RECURSIVE reach(id) AS (
+    SELECT :start
+    UNION
+    SELECT e.{to} FROM edges e JOIN reach r ON e.{frm} = r.id
+)
+SELECT n.name FROM reach JOIN nodes n ON n.id = reach.id
+WHERE reach.id <> :start
+ORDER BY n.name
+"""
+
+_IS_REACHABLE_SQL = """
+WITH RECURSIVE reach(id) AS (
+    SELECT :start
+    UNION
+    SELECT e.target_id FROM edges e JOIN reach r ON e.source_id = r.id
+)
+SELECT 1 FROM reach WHERE id = :goal LIMIT 1
+"""
+
+# Ids per IN list, well below the bind parameter limits of SQLite and asyncpg.
+_IN_BATCH = 5000
+
+
+def _query(sql: str):
+    """``text(sql)`` with its integer parameters typed.
+
+    asyncpg sends parameters to the server untyped, and PostgreSQL cannot infer
+    the type of a bare ``SELECT :start`` in the first part of a recursive CTE.
+    """
+    return text(sql).bindparams(*(bindparam(name, type_=Integer)
+                                  for name in ("start", "goal") if f":{name}" in sql))
+
+
+def memory_descendants(graph: CompactGraph, node: int, max_depth: Optional[int]) -> list:
+    levels = algorithms.bfs_levels(graph.fwd_offsets, graph.fwd_targets, node, max_depth)
+    return sorted(graph.names[i] for level in levels for i in level)
+
+
+def memory_ancestors(graph: CompactGraph, node: int, max_depth: Optional[int]) -> list:
+    levels = algorithms.bfs_levels(graph.rev_offsets, graph.rev_targets, node, max_depth)
+    return sorted(graph.names[i] for level in levels for i in level)
+
+
+def memory_shortest_path(graph: CompactGraph, source: int, target: int,
+                         max_depth: Optional[int]) -> Optional[list]:
+    path = algorithms.shortest_path(graph.fwd_offsets, graph.fwd_targets, source, target, max_depth)
+    return None if path is None else [graph.names[i] for i in path]
+
+
+def _bfs(db: Session, start: int, direction: str, max_depth: Optional[int], goal: Optional[int] = None) -> dict:
+    """Parent of each node within ``max_depth`` steps of ``start``, one statement per level.
+
+    Only the frontier is sent, and edges to nodes already seen are dropped, so
+    every edge is read at most once. Stops after the level that reaches
+    ``goal``. A node's parent is its smallest-id predecessor on the level
+    before; ``start`` maps to None.
+    """
+    edges = models.Edge.__table__
+    frm, to = (edges.c[column] for column in _DIRECTIONS[direction])
+    parent = {start: None}
+    frontier = [start]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        level = []
+        for batch in range(0, len(frontier), _IN_BATCH):
+            for source, target in db.execute(
+                select(frm, to).where(frm.in_(frontier[batch:batch + _IN_BATCH])).order_by(frm, to)
+            ):
+                if target not in parent:
+                    parent[target] = source
+                    level.append(target)
+        if goal in parent:
+            break
+        frontier = sorted(level)
+    return parent
+
+
+def _names(db: Session, ids: list) -> dict:
+    names = {}
+    for batch in range(0, len(ids), _IN_BATCH):
+        names.update(db.execute(
+            select(models.Node.id, models.Node.name).where(models.Node.id.in_(ids[batch:batch + _IN_BATCH]))
+        ).all())
+    return names
+
+
+def sql_reach(db: Session, node_id: int, direction: str, max_depth: Optional[int]) -> list:
+    """Names of the nodes reachable from ``node_id`` in ``direction``, sorted."""
+    if max_depth is None:
+        frm, to = _DIRECTIONS[direction]
+        return list(db.execute(_query(_REACH_SQL.format(frm=frm, to=to)), {"start": node_id}).scalars())
+    reached = list(_bfs(db, node_id, direction, max_depth))[1:]
+    return sorted(_names(db, reached).values())
+
+
+def sql_is_reachable(db: Session, source_id: int, target_id: int, max_depth: Optional[int]) -> bool:
+    if source_id == target_id:
+        return True
+    if max_depth is None:
+        row = db.execute(_query(_IS_REACHABLE_SQL), {"start": source_id, "goal": target_id}).first()
+        return row is not None
+    return target_id in _bfs(db, source_id, "forward", max_depth, target_id)
+
+
+def sql_shortest_path(db: Session, source_id: int, target_id: int, max_depth: Optional[int]) -> Optional[list]:
+    """Names along a fewest-edges path, or None. The caller handles ``source_id == target_id``."""
+    parent = _bfs(db, source_id, "forward", max_depth, target_id)
+    if target_id not in parent:
+        return None
+    path = [target_id]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    path.reverse()
+    names = _names(db, path)
+    return [names[node_id] for node_id in path]
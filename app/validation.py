@@ -0,0 +1,98 @@
+import hashlib
+import re
+from array import array
+from typing import Sequence
+
+from app import metrics
+from app.algorithms import topological_sort
+from app.encoding import dumps
+
+NODE_NAME_PATTERN = r"^[A-Za-z0-9]{1,255}$"
+node_name_re = re.compile(NODE_NAME_PATTERN)
+
+INVALID_NODE_NAME = "Invalid node name. Names must be 1-255 characters long and use only Latin letters."
+UNDEFINED_NODE = "Edge references an undefined node."
+
+
+class InvalidGraph(ValueError):
+    """A submitted graph breaks one of the rules; answered with a 400 and ``str(exc)`` as the message."""
+
+
+def duplicate_node(name: str) -> str:
+    return f"Duplicate node name '{name}'"
+
+
+def duplicate_edge(source: str, target: str) -> str:
+    return f"Duplicate edge from '{source}' to '{target}'"
+
+
+def self_loop(name: str) -> str:
+    return f"Self-loop detected on node '{name}'"
+
+
+def cycle(path: list) -> str:
+    return f"Graph contains a cycle and cannot be added: {' -> '.join(path)}"
+
+
+def validate_graph(node_names: Sequence[str], edge_sources: Sequence[str], edge_targets: Sequence[str]) -> tuple:
+    """Check a graph in one pass over the nodes and one over the edges; return edges as two index lists.
+
+    Name syntax is already enforced by the schema. Raises ``InvalidGraph``
+    with the same messages as the individual checks above.
+    """
+    index = {}
+    for name in node_names:
+        if name in index:
+            raise InvalidGraph(duplicate_node(name))
+        index[name] = len(index)
+
+    node_count = len(index)
+    lookup = index.get
+    sources = []
+    targets = []
+    seen = set()
+    for source, target in zip(edge_sources, edge_targets):
+        src = lookup(source)
+        tgt = lookup(target)
+        if src is None or tgt is None:
+            raise InvalidGraph(UNDEFINED_NODE)
+        if src == tgt:
+            raise InvalidGraph(self_loop(source))
+        # One int per edge hashes faster than a tuple of two.
+        key = src * node_count + tgt
+        if key in seen:
+            raise InvalidGraph(duplicate_edge(source, target))
+        seen.add(key)
+        sources.append(src)
+        targets.append(tgt)
+    return sources, targets
+
+
+def prepare_graph(node_names: Sequence[str], edge_sources: Sequence[str], edge_targets: Sequence[str]) -> tuple:
+    """Validate and cycle-check a graph; return ``(sources, targets, topo_index)`` as int arrays.
+
+    Takes and returns only plain lists and arrays, so it can run in a worker
+    process of ``app.executor.cpu_pool``.
+    """
+    with metrics.phase("validate"):
+        sources, targets = validate_graph(node_names, edge_sources, edge_targets)
+
+    with metrics.phase("toposort"):
+        topo = topological_sort(len(node_names), sources, targets)
+    if topo.cycle is not None:
+        raise InvalidGraph(cycle([node_names[i] for i in topo.cycle]))
+
+    topo_index = array("i", bytes(4 * len(node_names)))
+    for position, node in enumerate(topo.order):
+        topo_index[node] = position
+    return array("i", sources), array("i", targets), topo_index
+
+
+def content_hash(node_names: Sequence[str], edge_sources: Sequence[str], edge_targets: Sequence[str]) -> str:
+    """SHA-256 of the graph in canonical form: sorted node names, then sorted (source, target) pairs.
+
+    Independent of the order nodes and edges were submitted in. Invalid input
+    may be hashed too: it cannot match a stored graph, which was valid.
+    """
+    canonical = dumps([sorted(node_names), sorted(zip(edge_sources, edge_targets))])
+    return hashlib.sha256(canonical).hexdigest()
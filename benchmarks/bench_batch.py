@@ -0,0 +1,68 @@
+"""Reading many graphs: one request per graph vs one batch request.
+
+    python -m benchmarks.bench_batch [--graphs 200] [--nodes 50] [--edges 100] [--repeat 5]
+
+A uvicorn server is started with the graph cache disabled, so every read
+goes to the database. ``--graphs`` random DAGs are created, then their
+adjacency lists are fetched with N sequential GETs and with a single
+POST /api/graph/batch. Reported is the best time of ``--repeat`` runs.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--graphs", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--edges", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GRAPH_CACHE_ENABLED="false")
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/batch.db")
+        port = free_port()
+        server = start_server(port, env)
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                graph_ids = [client.post("/api/graph/", json=to_payload(*random_dag(args.nodes, args.edges))).json()["id"]
+                             for _ in range(args.graphs)]
+
+                def single():
+                    for graph_id in graph_ids:
+                        client.get(f"/api/graph/{graph_id}/adjacency_list").raise_for_status()
+
+                def batch():
+                    client.post("/api/graph/batch", json={"ids": graph_ids}).raise_for_status()
+
+                single_seconds = best_of(args.repeat, single)
+                batch_seconds = best_of(args.repeat, batch)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'mode':<10}{'requests':>10}{'ms':>10}")
+    print(f"{'single':<10}{args.graphs:>10}{single_seconds * 1000:>10.1f}")
+    print(f"{'batch':<10}{1:>10}{batch_seconds * 1000:>10.1f}")
+    print(f"speedup: {single_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
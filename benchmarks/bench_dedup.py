@@ -0,0 +1,59 @@
+"""Create throughput and storage with and without content-addressed deduplication.
+
+    python -m benchmarks.bench_dedup [--distinct 10] [--repeats 20] [--edges 5000]
+
+``--distinct`` random DAGs are each submitted ``--repeats`` times, in
+shuffled order, to a uvicorn server with GRAPH_DEDUP off and on. Reported
+are creates per second and, from the SQLite file afterwards, the graphs,
+node and edge rows stored and the database size.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distinct", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--edges", type=int, default=5_000)
+    args = parser.parse_args()
+
+    payloads = [to_payload(*random_dag(max(2, args.edges // 4), args.edges, seed=seed))
+                for seed in range(args.distinct)]
+    workload = payloads * args.repeats
+    random.Random(0).shuffle(workload)
+
+    print(f"{'dedup':<7}{'creates/s':>11}{'graphs':>8}{'nodes':>10}{'edges':>10}{'db MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for dedup in ("false", "true"):
+            path = f"{tmp}/dedup_{dedup}.db"
+            env = dict(os.environ, GRAPH_DEDUP=dedup, DATABASE_URL=f"sqlite:///{path}")
+            port = free_port()
+            server = start_server(port, env)
+            try:
+                with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                    started = time.perf_counter()
+                    for payload in workload:
+                        client.post("/api/graph/", json=payload).raise_for_status()
+                    elapsed = time.perf_counter() - started
+            finally:
+                server.terminate()
+                server.wait()
+            with sqlite3.connect(path) as conn:
+                graphs, nodes, edges = (conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                                        for table in ("graphs", "nodes", "edges"))
+            size = os.path.getsize(path) / 2**20
+            print(f"{dedup:<7}{len(workload) / elapsed:>11.1f}{graphs:>8}{nodes:>10}{edges:>10}{size:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Deleting many nodes: ORM per node, Core DELETE per node, one batch DELETE.
+
+    python -m benchmarks.bench_delete [--edges 100000] [--deletes 10000]
+
+A random DAG with ``--edges`` edges is stored in a throw-away SQLite
+database (or DATABASE_URL) once per method, then ``--deletes`` random nodes
+are removed:
+
+- orm: the former handler, ``db.get(Graph)``, a query for the node and
+  ``db.delete(node)``, one transaction per node, as N requests would do;
+- per node: one Core DELETE by name per node, one transaction per node;
+- batch: ``mutations.delete_nodes`` with all names, graph lock included:
+  one statement on PostgreSQL, the lock UPDATE plus the DELETE elsewhere.
+
+Reported are total time, statements sent and the edges left.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--deletes", type=int, default=10_000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/delete.db")
+
+    from sqlalchemy import delete, event, func, select
+
+    from app import models, mutations
+    from app.algorithms import index_edges, topological_sort
+    from app.database import SessionLocal, engine
+    from app.ingest import insert_graph
+    from app.migrations import upgrade
+    from benchmarks.generators import random_dag
+
+    names, edges = random_dag(max(2, args.edges // 4), args.edges)
+    sources, targets = index_edges(names, edges)
+    topo_index = [0] * len(names)
+    for position, node in enumerate(topological_sort(len(names), sources, targets).order):
+        topo_index[node] = position
+    victims = random.Random(1).sample(names, args.deletes)
+
+    def orm(db, graph_id):
+        for name in victims:
+            db.get(models.Graph, graph_id)
+            node = db.query(models.Node).filter_by(graph_id=graph_id, name=name).first()
+            db.delete(node)
+            db.commit()
+
+    def per_node(db, graph_id):
+        for name in victims:
+            db.execute(delete(models.Node).where(models.Node.graph_id == graph_id, models.Node.name == name))
+            db.commit()
+
+    def batch(db, graph_id):
+        mutations.delete_nodes(db, graph_id, victims)
+        db.commit()
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    print(f"{'method':<10}{'seconds':>9}{'statements':>12}{'edges left':>12}")
+    for label, fn in (("orm", orm), ("per node", per_node), ("batch", batch)):
+        with SessionLocal() as db:
+            graph_id = insert_graph(db, names, sources, targets, topo_index)
+            db.commit()
+            statements.clear()
+            started = time.perf_counter()
+            fn(db, graph_id)
+            elapsed = time.perf_counter() - started
+            sent = len(statements)
+            left = db.execute(select(func.count()).where(models.Edge.graph_id == graph_id)).scalar_one()
+        print(f"{label:<10}{elapsed:>9.2f}{sent:>12}{left:>12}")
+
+
+if __name__ == "__main__":
+    main()
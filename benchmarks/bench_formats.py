@@ -0,0 +1,131 @@
+"""Wire formats: body size, encode/decode time and HTTP latency per format and compression.
+
+    python -m benchmarks.bench_formats [--sizes 1000 10000 100000] [--repeat 5] [--no-http]
+
+The first table covers a read response built from a CompactGraph: its size
+raw, gzip- and zstd-compressed, the time to encode it (the cold-cache cost on
+the server), to compress it and to decode it on the client. The second one
+runs a uvicorn server with the graph cache disabled and reports the best
+create and read latency per format, reads with Accept-Encoding: gzip.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from app import formats
+from app.compact import CompactGraph, encode_view
+from app.encoding import loads, msgpack_dumps, msgpack_loads
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+# name -> (view, encoding, media type)
+FORMATS = {
+    "json": ("graph", "json", formats.JSON),
+    "msgpack": ("graph", "msgpack", formats.MSGPACK),
+    "columnar+json": ("columnar", "json", formats.COLUMNAR_JSON),
+    "columnar+msgpack": ("columnar", "msgpack", formats.COLUMNAR_MSGPACK),
+}
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def graph_data(edge_count: int) -> tuple:
+    return random_dag(max(2, edge_count // 4), edge_count)
+
+
+def create_body(name: str, names: list, edges: list) -> bytes:
+    if name.startswith("columnar"):
+        index = {node: i for i, node in enumerate(names)}
+        document = {"nodes": names, "sources": [index[s] for s, _ in edges], "targets": [index[t] for _, t in edges]}
+    else:
+        document = to_payload(names, edges)
+    return json.dumps(document).encode() if name.endswith("json") else msgpack_dumps(document)
+
+
+def encoding_table(sizes: list, repeat: int) -> None:
+    print(f"{'edges':>8} {'format':<17}{'bytes':>11}{'gzip':>11}{'zstd':>11}"
+          f"{'encode ms':>11}{'gzip ms':>9}{'zstd ms':>9}{'decode ms':>11}")
+    for edge_count in sizes:
+        names, edges = graph_data(edge_count)
+        index = {name: i for i, name in enumerate(names)}
+        graph = CompactGraph(1, names, [index[s] for s, _ in edges], [index[t] for _, t in edges])
+        for name, (view, encoding, _) in FORMATS.items():
+            body = encode_view(graph, view, encoding)
+            decode = loads if encoding == "json" else msgpack_loads
+            encode_seconds = best_of(repeat, lambda: encode_view(graph, view, encoding))
+            decode_seconds = best_of(repeat, lambda: decode(body))
+            gzip_seconds = best_of(repeat, lambda: formats.compress(body, "gzip"))
+            gzip_size = len(formats.compress(body, "gzip"))
+            if formats.zstandard is not None:
+                zstd_seconds = best_of(repeat, lambda: formats.compress(body, "zstd"))
+                zstd = f"{len(formats.compress(body, 'zstd')):>11}"
+                zstd_ms = f"{zstd_seconds * 1000:>9.1f}"
+            else:
+                zstd, zstd_ms = f"{'-':>11}", f"{'-':>9}"
+            print(f"{edge_count:>8} {name:<17}{len(body):>11}{gzip_size:>11}{zstd}"
+                  f"{encode_seconds * 1000:>11.1f}{gzip_seconds * 1000:>9.1f}{zstd_ms}{decode_seconds * 1000:>11.1f}")
+
+
+def http_table(sizes: list, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GRAPH_CACHE_ENABLED="false")
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/formats.db")
+        port = free_port()
+        server = start_server(port, env)
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                print(f"{'edges':>8} {'format':<17}{'create ms':>11}{'read ms':>11}{'wire bytes':>12}")
+                for edge_count in sizes:
+                    names, edges = graph_data(edge_count)
+                    for name, (_, _, media_type) in FORMATS.items():
+                        body = create_body(name, names, edges)
+                        created = []
+
+                        def create():
+                            response = client.post("/api/graph/", content=body, headers={"Content-Type": media_type})
+                            response.raise_for_status()
+                            created.append(response.json()["id"])
+
+                        create_seconds = best_of(repeat, create)
+                        headers = {"Accept": media_type, "Accept-Encoding": "gzip"}
+                        wire = []
+
+                        def read():
+                            with client.stream("GET", f"/api/graph/{created[-1]}/", headers=headers) as response:
+                                response.raise_for_status()
+                                wire.append(sum(len(chunk) for chunk in response.iter_raw()))
+
+                        read_seconds = best_of(repeat, read)
+                        print(f"{edge_count:>8} {name:<17}{create_seconds * 1000:>11.1f}"
+                              f"{read_seconds * 1000:>11.1f}{wire[-1]:>12}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-http", action="store_true", help="skip the server round trips")
+    args = parser.parse_args()
+
+    encoding_table(args.sizes, args.repeat)
+    if not args.no_http:
+        print()
+        http_table(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Delete cascades and read-path round trips with and without the edge endpoint indexes.
+
+    python -m benchmarks.bench_indexes [--edges 100000] [--deletes 200]
+
+A random DAG is stored twice in a throw-away SQLite database (or
+DATABASE_URL): once with the schema as migrated by ``app.migrations`` and
+once after dropping ix_edge_source_target / ix_edge_target_source. For each
+variant ``--deletes`` random nodes are deleted one transaction at a time, so
+every delete runs the ON DELETE CASCADE lookups on edges. The plan of that
+lookup and the statements issued by load_graph_arrays are printed as well.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+NEW_INDEXES = ("ix_edge_source_target", "ix_edge_target_source")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--deletes", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/indexes.db")
+
+    from sqlalchemy import delete, event, text
+
+    from app import models
+    from app.algorithms import index_edges, topological_sort
+    from app.compact import load_graph_arrays
+    from app.database import SessionLocal, engine
+    from app.ingest import insert_graph
+    from app.migrations import upgrade
+    from benchmarks.generators import random_dag
+
+    names, edges = random_dag(max(2, args.edges // 4), args.edges)
+    sources, targets = index_edges(names, edges)
+    topo_index = [0] * len(names)
+    for position, node in enumerate(topological_sort(len(names), sources, targets).order):
+        topo_index[node] = position
+    victims = random.Random(1).sample(names, args.deletes)
+    explain = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+
+    print(f"{'schema':<16}{'delete ms/node':>16}  cascade lookup plan")
+    for variant in ("indexed", "unique only"):
+        with engine.begin() as conn:
+            upgrade(conn)
+            if variant != "indexed":
+                for name in NEW_INDEXES:
+                    conn.execute(text(f"DROP INDEX {name}"))
+        # Fresh connections, so no statement prepared against the old schema is reused.
+        engine.dispose()
+        with SessionLocal() as db:
+            graph_id = insert_graph(db, names, sources, targets, topo_index)
+            db.commit()
+            ids = dict(db.execute(text("SELECT name, id FROM nodes WHERE graph_id = :g"), {"g": graph_id}).all())
+            plan = " | ".join(str(row[-1]) for row in db.execute(
+                text(f"{explain} SELECT id FROM edges WHERE target_id = :n"), {"n": ids[victims[0]]}))
+            started = time.perf_counter()
+            for name in victims:
+                db.execute(delete(models.Node).where(models.Node.id == ids[name]))
+                db.commit()
+            elapsed = time.perf_counter() - started
+        print(f"{variant:<16}{elapsed / len(victims) * 1000:>16.2f}  {plan}")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        load_graph_arrays(db, [graph_id])
+        elapsed = time.perf_counter() - started
+    print(f"\nload_graph_arrays: {len(statements)} round trips, {elapsed * 1000:.1f} ms")
+    for statement in statements:
+        print("  " + " ".join(statement.split()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Ingest time and peak RSS: per-row ORM adds vs. app.ingest.insert_graph.
+
+    python -m benchmarks.bench_ingest [--sizes 1000 10000 100000]
+
+Every (path, size) case runs in a fresh interpreter so that peak RSS belongs
+to that case alone. DATABASE_URL defaults to a throw-away SQLite file.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PATHS = ("orm", "bulk")
+
+
+def orm_insert_graph(db, node_names: list, edge_pairs: list, topo_index: list) -> int:
+    from app import models
+
+    new_graph = models.Graph()
+    db.add(new_graph)
+    db.flush()
+    name_to_node = {}
+    for name, position in zip(node_names, topo_index):
+        node = models.Node(name=name, graph_id=new_graph.id, topo_index=position)
+        db.add(node)
+        name_to_node[name] = node
+    db.flush()
+    for (src, tgt) in edge_pairs:
+        db.add(models.Edge(graph_id=new_graph.id,
+                           source_id=name_to_node[src].id,
+                           target_id=name_to_node[tgt].id))
+    return new_graph.id
+
+
+def run_case(path: str, edge_count: int) -> dict:
+    from app.algorithms import index_edges, topological_sort
+    from app.database import Base, SessionLocal, engine
+    from app.ingest import insert_graph
+    from benchmarks.generators import random_dag
+
+    Base.metadata.create_all(bind=engine)
+    names, edges = random_dag(max(2, edge_count // 4), edge_count)
+    sources, targets = index_edges(names, edges)
+    topo_index = [0] * len(names)
+    for position, node in enumerate(topological_sort(len(names), sources, targets).order):
+        topo_index[node] = position
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        if path == "orm":
+            orm_insert_graph(db, names, edges, topo_index)
+        else:
+            insert_graph(db, names, sources, targets, topo_index)
+        db.commit()
+    elapsed = time.perf_counter() - started
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "path": path,
+        "nodes": len(names),
+        "edges": edge_count,
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--case", nargs=2, metavar=("PATH", "EDGES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]))))
+        return
+
+    print(f"{'path':<6}{'nodes':>8}{'edges':>9}{'seconds':>10}{'peak MB':>10}{'growth MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for path in PATHS:
+                env = dict(os.environ)
+                env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/ingest_{path}_{size}.db")
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest", "--case", path, str(size)],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{r['path']:<6}{r['nodes']:>8}{r['edges']:>9}{r['seconds']:>10}"
+                      f"{r['peak_rss_mb']:>10}{r['rss_growth_mb']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Memory per edge of the in-memory graph representations used by the read path.
+
+    python -m benchmarks.bench_memory [--sizes 10000 100000]
+
+Each representation is loaded from a throw-away SQLite database (or
+DATABASE_URL) and measured with tracemalloc while it is alive:
+  orm      - Node/Edge ORM entities, as the read handlers used to load them
+  dicts    - adjacency and reverse adjacency as dicts of lists of names
+  compact  - app.compact.CompactGraph (interned names, CSR arrays both ways)
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+
+def measure(load) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = load()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/memory.db")
+
+    from app import models
+    from app.algorithms import index_edges, topological_sort
+    from app.compact import CompactGraph, load_graph_arrays
+    from app.database import Base, SessionLocal, engine
+    from app.ingest import insert_graph
+    from benchmarks.generators import random_dag
+
+    Base.metadata.create_all(bind=engine)
+    print(f"{'edges':>8}{'orm B/edge':>12}{'dicts B/edge':>14}{'compact B/edge':>16}{'compact nbytes':>16}")
+    for size in args.sizes:
+        names, edges = random_dag(max(2, size // 4), size)
+        sources, targets = index_edges(names, edges)
+        order = topological_sort(len(names), sources, targets).order
+        topo_index = [0] * len(names)
+        for position, node in enumerate(order):
+            topo_index[node] = position
+        with SessionLocal() as db:
+            graph_id = insert_graph(db, names, sources, targets, topo_index)
+            db.commit()
+
+        with SessionLocal() as db:
+            def load_orm():
+                nodes = db.query(models.Node).filter(models.Node.graph_id == graph_id).all()
+                edge_rows = db.query(models.Edge).filter(models.Edge.graph_id == graph_id).all()
+                return nodes, edge_rows
+            (nodes, edge_rows), orm_bytes = measure(load_orm)
+
+            def build_dicts():
+                name_by_id = {node.id: node.name for node in nodes}
+                adjacency = {node.name: [] for node in nodes}
+                reverse_adj = {node.name: [] for node in nodes}
+                for edge in edge_rows:
+                    adjacency[name_by_id[edge.source_id]].append(name_by_id[edge.target_id])
+                    reverse_adj[name_by_id[edge.target_id]].append(name_by_id[edge.source_id])
+                return adjacency, reverse_adj
+            _, dict_bytes = measure(build_dicts)
+            del nodes, edge_rows
+            db.expunge_all()
+
+            compact, compact_bytes = measure(lambda: CompactGraph(graph_id, *load_graph_arrays(db, [graph_id])[graph_id]))
+
+        print(f"{size:>8}{orm_bytes / size:>12.0f}{dict_bytes / size:>14.0f}"
+              f"{compact_bytes / size:>16.1f}{compact.nbytes / size:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-edge insert cost as the graph grows: POST .../edge vs re-posting the whole graph.
+
+    python -m benchmarks.bench_mutations [--sizes 1000 10000 100000] [--inserts 200] [--recreate-max 10000]
+
+For every size a random DAG is stored, then ``--inserts`` new acyclic edges
+are added one request at a time through POST /api/graph/{id}/edge (which
+reorders the affected region of the stored topological order when needed).
+For sizes up to ``--recreate-max`` the former workflow is timed too: posting
+the full graph plus one edge to POST /api/graph/ for a few of those edges.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from app.algorithms import index_edges, topological_sort
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+
+def new_edges(names: list, edges: list, count: int, seed: int = 2) -> list:
+    """``count`` edges not in ``edges`` that keep the graph acyclic."""
+    sources, targets = index_edges(names, edges)
+    order = topological_sort(len(names), sources, targets).order
+    existing = set(edges)
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count:
+        a, b = sorted(rng.sample(range(len(order)), 2))
+        pair = (names[order[a]], names[order[b]])
+        if pair not in existing:
+            existing.add(pair)
+            result.append(pair)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--inserts", type=int, default=200)
+    parser.add_argument("--recreate-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/mutations.db")
+        port = free_port()
+        server = start_server(port, env)
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                print(f"{'edges':>8}{'POST edge ms':>14}{'p99 ms':>9}{'re-POST graph ms':>18}")
+                for size in args.sizes:
+                    names, edges = random_dag(max(2, size // 4), size)
+                    graph_id = client.post("/api/graph/", json=to_payload(names, edges)).json()["id"]
+                    latencies = []
+                    for source, target in new_edges(names, edges, args.inserts):
+                        started = time.perf_counter()
+                        client.post(f"/api/graph/{graph_id}/edge",
+                                    json={"source": source, "target": target}).raise_for_status()
+                        latencies.append(time.perf_counter() - started)
+                    latencies.sort()
+                    mean = sum(latencies) / len(latencies) * 1000
+                    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+                    recreate = float("nan")
+                    if size <= args.recreate_max:
+                        timings = []
+                        for edge in new_edges(names, edges, 5, seed=3):
+                            payload = to_payload(names, edges + [edge])
+                            started = time.perf_counter()
+                            client.post("/api/graph/", json=payload).raise_for_status()
+                            timings.append(time.perf_counter() - started)
+                        recreate = sum(timings) / len(timings) * 1000
+                    print(f"{size:>8}{mean:>14.2f}{p99:>9.2f}{recreate:>18.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Streaming NDJSON round trip: import and export time and server peak RSS per graph size.
+
+    python -m benchmarks.bench_ndjson [--sizes 10000 100000 1000000] [--json-max 100000]
+
+For every size a fresh uvicorn server is started, a random DAG is uploaded to
+POST /api/graph/import from a generator (the client never holds the whole
+body) and read back from GET /api/graph/{id}/export line by line. The
+server's peak RSS (VmHWM) is read from /proc after the round trip. For
+sizes up to ``--json-max`` the same graph is also posted as one JSON body to
+POST /api/graph/ on a separate server, for comparison.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def ndjson_body(names: list, edges: list):
+    chunk = []
+    for name in names:
+        chunk.append(json.dumps({"name": name}))
+        if len(chunk) == 2000:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    for src, tgt in edges:
+        chunk.append(json.dumps({"source": src, "target": tgt}))
+        if len(chunk) == 2000:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+def run_ndjson(port: int, names: list, edges: list) -> dict:
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        started = time.perf_counter()
+        response = client.post("/api/graph/import", content=ndjson_body(names, edges),
+                               headers={"Content-Type": "application/x-ndjson"})
+        response.raise_for_status()
+        imported = time.perf_counter() - started
+
+        started = time.perf_counter()
+        lines = 0
+        with client.stream("GET", f"/api/graph/{response.json()['id']}/export") as stream:
+            for _ in stream.iter_lines():
+                lines += 1
+        exported = time.perf_counter() - started
+    assert lines == len(names) + len(edges), lines
+    return {"import_s": imported, "export_s": exported}
+
+
+def run_json(port: int, names: list, edges: list) -> float:
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        started = time.perf_counter()
+        client.post("/api/graph/", json=to_payload(names, edges)).raise_for_status()
+        return time.perf_counter() - started
+
+
+def with_server(tmp: str, name: str, fn):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/{name}.db")
+    port = free_port()
+    server = start_server(port, env)
+    try:
+        result = fn(port)
+        return result, peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--json-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'edges':>9}{'import s':>10}{'export s':>10}{'ndjson peak MB':>16}{'json POST s':>13}{'json peak MB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            names, edges = random_dag(max(2, size // 4), size)
+            times, ndjson_peak = with_server(tmp, f"ndjson_{size}", lambda port: run_ndjson(port, names, edges))
+            json_s = json_peak = float("nan")
+            if size <= args.json_max:
+                json_s, json_peak = with_server(tmp, f"json_{size}", lambda port: run_json(port, names, edges))
+            print(f"{size:>9}{times['import_s']:>10.1f}{times['export_s']:>10.1f}{ndjson_peak:>16.0f}"
+                  f"{json_s:>13.1f}{json_peak:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
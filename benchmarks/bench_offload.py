@@ -0,0 +1,87 @@
+"""Small-read latency while large graphs are being created, with and without the CPU process pool.
+
+    python -m benchmarks.bench_offload [--edges 200000] [--writers 1] [--duration 15]
+
+For each configuration (CPU_POOL_WORKERS=0 and =2) a uvicorn server is
+started, a small graph is created and read once so it is cached, and then
+``--writers`` threads keep posting a random DAG with ``--edges`` edges while
+the main thread reads the small graph's adjacency list in a loop. Reported
+are p50/p99 of those reads, the number of large creates that completed and
+how many were refused with 503.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+CONFIGS = {"threadpool": "0", "process pool": "2"}
+
+
+def writer(base_url: str, payload: dict, stop: threading.Event, counts: dict, lock: threading.Lock):
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        while not stop.is_set():
+            status = client.post("/api/graph/", json=payload).status_code
+            with lock:
+                counts[status] = counts.get(status, 0) + 1
+
+
+def run(base_url: str, payload: dict, writers: int, duration: float) -> tuple:
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        small = to_payload(*random_dag(20, 40))
+        graph_id = client.post("/api/graph/", json=small).json()["id"]
+        client.get(f"/api/graph/{graph_id}/adjacency_list").raise_for_status()
+
+        stop = threading.Event()
+        counts = {}
+        lock = threading.Lock()
+        threads = [threading.Thread(target=writer, args=(base_url, payload, stop, counts, lock))
+                   for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        latencies = []
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            client.get(f"/api/graph/{graph_id}/adjacency_list").raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.005)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    latencies.sort()
+    return latencies, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    payload = to_payload(*random_dag(max(2, args.edges // 4), args.edges))
+    print(f"{'config':<14}{'reads':>7}{'p50 ms':>9}{'p99 ms':>9}{'creates':>9}{'503s':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, workers in CONFIGS.items():
+            env = dict(os.environ, CPU_POOL_WORKERS=workers)
+            env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/offload_{workers}.db")
+            port = free_port()
+            server = start_server(port, env)
+            try:
+                latencies, counts = run(f"http://127.0.0.1:{port}", payload, args.writers, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+            print(f"{label:<14}{len(latencies):>7}{p50:>9.1f}{p99:>9.1f}{counts.get(201, 0):>9}{counts.get(503, 0):>6}")
+
+
+if __name__ == "__main__":
+    main()
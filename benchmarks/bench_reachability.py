@@ -0,0 +1,75 @@
+"""Reachability index: build time, memory and query latency vs BFS per query.
+
+    python -m benchmarks.bench_reachability [--queries 2000]
+
+For each random DAG a transitive closure (if it fits REACH_INDEX_MAX_BYTES)
+and GRAIL interval labels are built from the CompactGraph snapshot. Build
+time, the index size and the tracemalloc peak during the build are
+reported, then the mean latency of ``--queries`` random (source, target)
+questions answered by the index and by a BFS over the same snapshot.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from app.algorithms import index_edges, shortest_path
+from app.compact import CompactGraph
+from app.reachability import REACH_INDEX_MAX_BYTES, build_reach_index
+from benchmarks.generators import random_dag
+
+CASES = [(1_000, 4_000), (10_000, 40_000), (100_000, 300_000)]
+
+
+def snapshot(node_count: int, edge_count: int) -> CompactGraph:
+    names, edges = random_dag(node_count, edge_count)
+    sources, targets = index_edges(names, edges)
+    return CompactGraph(1, names, sources, targets)
+
+
+def build(graph: CompactGraph, max_bytes: int) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = build_reach_index(graph, max_bytes=max_bytes)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return index, elapsed, peak
+
+
+def mean_latency_us(fn, pairs: list) -> tuple:
+    started = time.perf_counter()
+    hits = sum(1 for source, target in pairs if fn(source, target))
+    return (time.perf_counter() - started) / len(pairs) * 1e6, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8}{'edges':>9}  {'method':<10}{'build s':>9}{'size MiB':>10}{'peak MiB':>10}{'query us':>10}{'hits':>7}")
+    for node_count, edge_count in CASES:
+        graph = snapshot(node_count, edge_count)
+        rng = random.Random(1)
+        pairs = [(rng.randrange(node_count), rng.randrange(node_count)) for _ in range(args.queries)]
+
+        def bfs(source, target):
+            return shortest_path(graph.fwd_offsets, graph.fwd_targets, source, target) is not None
+
+        rows = [("bfs", None, 0, 0, *mean_latency_us(bfs, pairs))]
+        kinds = [("closure", REACH_INDEX_MAX_BYTES), ("interval", 0)]
+        for label, max_bytes in kinds:
+            if label == "closure" and node_count * ((node_count + 7) // 8) > max_bytes:
+                continue
+            index, seconds, peak = build(graph, max_bytes)
+            latency, hits = mean_latency_us(lambda s, t: index.reachable(graph, s, t), pairs)
+            rows.append((label, seconds, index.nbytes, peak, latency, hits))
+        for label, seconds, size, peak, latency, hits in rows:
+            built = "-" if seconds is None else f"{seconds:.2f}"
+            print(f"{node_count:>8}{edge_count:>9}  {label:<10}{built:>9}{size / 2**20:>10.1f}"
+                  f"{peak / 2**20:>10.1f}{latency:>10.1f}{hits:>7}")
+
+
+if __name__ == "__main__":
+    main()
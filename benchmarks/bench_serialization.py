@@ -0,0 +1,82 @@
+"""Serialization time per graph size for the read endpoints.
+
+    python -m benchmarks.bench_serialization [--sizes 1000 10000 100000]
+
+Columns:
+  pydantic  - schemas.* objects, response_model validation, jsonable_encoder
+              and JSONResponse rendering (the former read path)
+  encoded   - plain dicts encoded with app.encoding.dumps (cold cache)
+  warm      - cached body lookup plus If-None-Match check (warm cache)
+"""
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import schemas
+from app.compact import CompactGraph
+from app.encoding import dumps, etag_matches, make_etag
+from benchmarks.generators import random_dag
+
+
+def snapshot(edge_count: int) -> CompactGraph:
+    names, edges = random_dag(max(2, edge_count // 4), edge_count)
+    index = {name: i for i, name in enumerate(names)}
+    return CompactGraph(1, names, [index[s] for s, _ in edges], [index[t] for _, t in edges])
+
+
+def pydantic_path(graph: CompactGraph) -> bytes:
+    names = graph.names
+    response = schemas.GraphReadResponse(
+        id=graph.graph_id,
+        nodes=[schemas.Node(name=name) for name in names],
+        edges=[schemas.Edge(source=names[s], target=names[t]) for s, t in graph.edges()],
+    )
+    validated = schemas.GraphReadResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def encoded_path(graph: CompactGraph) -> bytes:
+    names = graph.names
+    return dumps({
+        "id": graph.graph_id,
+        "nodes": [{"name": name} for name in names],
+        "edges": [{"source": names[s], "target": names[t]} for s, t in graph.edges()],
+    })
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"encoder: {dumps.__module__}.{dumps.__qualname__} -> {dumps({'a': 1})!r}")
+    print(f"{'edges':>8}{'body KB':>10}{'pydantic ms':>13}{'encoded ms':>12}{'warm us':>10}")
+    for size in args.sizes:
+        graph = snapshot(size)
+        body = encoded_path(graph)
+        cached = {"graph": (body, make_etag(body))}
+
+        def warm():
+            body, etag = cached["graph"]
+            etag_matches('"stale"', etag)
+
+        old = best_of(lambda: pydantic_path(graph), args.repeat)
+        new = best_of(lambda: encoded_path(graph), args.repeat)
+        hit = best_of(warm, args.repeat * 100)
+        print(f"{size:>8}{len(body) / 1024:>10.0f}{old * 1000:>13.1f}{new * 1000:>12.1f}{hit * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
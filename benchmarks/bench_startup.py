@@ -0,0 +1,89 @@
+"""Cold start: time from spawning the server to its first successful response.
+
+    python -m benchmarks.bench_startup [--runs 5]
+
+The schema is migrated once with ``python -m app.migrations`` and a small
+graph is stored. Then, for each configuration, a server is spawned ``--runs``
+times and GET /api/graph/{id}/ is polled until it returns 200; the median
+time-to-first-request is reported along with the time to import app.main.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+CONFIGS = {
+    "uvicorn, migrate on start": ("uvicorn", {"DB_MIGRATE_ON_STARTUP": "true"}),
+    "uvicorn, no migrate": ("uvicorn", {"DB_MIGRATE_ON_STARTUP": "false"}),
+    "uvicorn, no migrate, warm-up 4": ("uvicorn", {"DB_MIGRATE_ON_STARTUP": "false", "DB_POOL_WARMUP": "4"}),
+    "gunicorn --preload, 2 workers": ("gunicorn", {"DB_MIGRATE_ON_STARTUP": "false", "WEB_CONCURRENCY": "2"}),
+}
+
+
+def command(server: str, port: int) -> list:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "python:app.gunicorn_conf", "--bind",
+                f"127.0.0.1:{port}", "--log-level", "warning", "app.main:app"]
+    return [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+
+
+def time_to_first_request(server: str, env: dict, graph_id: int) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(command(server, port), env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while time.perf_counter() - started < 60:
+                try:
+                    if client.get(f"/api/graph/{graph_id}/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise RuntimeError(f"{server} did not answer")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_seconds(env: dict) -> float:
+    code = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+    return float(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_env = dict(os.environ)
+        base_env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/startup.db")
+        subprocess.run([sys.executable, "-m", "app.migrations"], env=base_env, check=True, capture_output=True)
+        port = free_port()
+        seed = start_server(port, base_env)
+        try:
+            response = httpx.post(f"http://127.0.0.1:{port}/api/graph/", json=to_payload(*random_dag(100, 200)))
+            graph_id = response.json()["id"]
+        finally:
+            seed.terminate()
+            seed.wait()
+
+        print(f"import app.main: {statistics.median(import_seconds(base_env) for _ in range(args.runs)) * 1000:.0f} ms")
+        print(f"{'config':<34}{'first request ms':>18}")
+        for label, (server, settings) in CONFIGS.items():
+            env = dict(base_env, **settings)
+            samples = [time_to_first_request(server, env, graph_id) for _ in range(args.runs)]
+            print(f"{label:<34}{statistics.median(samples) * 1000:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
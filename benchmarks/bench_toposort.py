@@ -0,0 +1,86 @@
+"""Cycle detection: the former recursive detect_cycle vs. app.algorithms.topological_sort.
+
+    python -m benchmarks.bench_toposort [--repeat 5]
+
+Shapes: random DAGs, deep chains and wide fan-outs. Times are the best of
+``--repeat`` runs and include translating names to index arrays.
+"""
+import argparse
+import sys
+import time
+
+from app.algorithms import index_edges, topological_sort
+from benchmarks.generators import chain, fan_out, random_dag
+
+CASES = [
+    ("random", lambda: random_dag(2_500, 10_000)),
+    ("random", lambda: random_dag(25_000, 100_000)),
+    ("chain", lambda: chain(900)),
+    ("chain", lambda: chain(10_000)),
+    ("chain", lambda: chain(100_000)),
+    ("fan_out", lambda: fan_out(10_000)),
+    ("fan_out", lambda: fan_out(100_000)),
+]
+
+
+def recursive_detect_cycle(nodes: list, edges: list) -> bool:
+    graph_adj = {name: [] for name in nodes}
+    for (src, tgt) in edges:
+        graph_adj[src].append(tgt)
+    visited = set()
+    in_stack = set()
+
+    def dfs(node: str) -> bool:
+        if node in in_stack:
+            return True
+        if node in visited:
+            return False
+        visited.add(node)
+        in_stack.add(node)
+        for nei in graph_adj.get(node, []):
+            if dfs(nei):
+                return True
+        in_stack.remove(node)
+        return False
+
+    for n in nodes:
+        if dfs(n):
+            return True
+    return False
+
+
+def kahn(nodes: list, edges: list) -> bool:
+    sources, targets = index_edges(nodes, edges)
+    return topological_sort(len(nodes), sources, targets).cycle is not None
+
+
+def best_of(fn, names, edges, repeat: int):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            fn(names, edges)
+        except RecursionError:
+            return None
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"recursion limit: {sys.getrecursionlimit()}")
+    print(f"{'shape':<9}{'nodes':>8}{'edges':>9}{'recursive ms':>14}{'kahn ms':>10}")
+    for shape, make in CASES:
+        names, edges = make()
+        old = best_of(recursive_detect_cycle, names, edges, args.repeat)
+        new = best_of(kahn, names, edges, args.repeat)
+        old_ms = "RecursionError" if old is None else f"{old * 1000:.1f}"
+        print(f"{shape:<9}{len(names):>8}{len(edges):>9}{old_ms:>14}{new * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
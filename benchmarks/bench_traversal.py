@@ -0,0 +1,120 @@
+"""Reachability queries: client-side full fetch + BFS vs the traversal endpoints.
+
+    python -m benchmarks.bench_traversal [--nodes 20000] [--edges 60000] [--queries 200] [--skip-chain 2000]
+
+A uvicorn server is started on a random DAG. For ``--queries`` random nodes
+the descendants are computed three ways: by downloading the adjacency list and
+running a BFS in the client (the adjacency list is fetched once per query, as
+a stateless client would), by GET .../descendants with ``engine=memory`` and
+with ``engine=sql``. Reported are mean latency and bytes received per query.
+
+The second table times the long walks of both engines on a skip chain
+(``N(i) -> N(i+1)``, ``N(i) -> N(i+2)``), whose nodes are reached by paths of
+many different lengths: shortest_path end to end, bounded descendants of the
+first node and bounded is_reachable back to it.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import deque
+
+import httpx
+
+from benchmarks.generators import random_dag, skip_chain, to_payload
+from benchmarks.loadtest import free_port, start_server
+
+
+def client_descendants(client: httpx.Client, graph_id: int, node: str) -> tuple:
+    response = client.get(f"/api/graph/{graph_id}/adjacency_list")
+    adjacency = response.json()["adjacency_list"]
+    seen = {node}
+    queue = deque([node])
+    while queue:
+        for nxt in adjacency[queue.popleft()]:
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    seen.discard(node)
+    return sorted(seen), len(response.content)
+
+
+def server_descendants(client: httpx.Client, graph_id: int, node: str, engine: str) -> tuple:
+    response = client.get(f"/api/graph/{graph_id}/node/{node}/descendants", params={"engine": engine})
+    return response.json()["nodes"], len(response.content)
+
+
+def measure(fn, nodes: list) -> tuple:
+    received = 0
+    results = []
+    started = time.perf_counter()
+    for node in nodes:
+        result, size = fn(node)
+        results.append(result)
+        received += size
+    elapsed = time.perf_counter() - started
+    return results, elapsed / len(nodes) * 1000, received / len(nodes) / 1024
+
+
+def skip_chain_table(client: httpx.Client, node_count: int) -> None:
+    names, edges = skip_chain(node_count)
+    graph_id = client.post("/api/graph/", json=to_payload(names, edges)).json()["id"]
+    url = f"/api/graph/{graph_id}"
+    first, last = names[0], names[-1]
+    requests = {
+        "shortest_path": (f"{url}/shortest_path", {"source": first, "target": last}),
+        "descendants bounded": (f"{url}/node/{first}/descendants", {"max_depth": node_count * 3 // 4}),
+        "is_reachable bounded": (f"{url}/is_reachable", {"source": last, "target": first, "max_depth": node_count}),
+    }
+    print(f"{'skip chain ' + str(node_count):<24}{'memory ms':>11}{'sql ms':>11}")
+    for label, (path, params) in requests.items():
+        timings = []
+        for engine in ("memory", "sql"):
+            client.get(path, params={**params, "engine": engine}).raise_for_status()
+            started = time.perf_counter()
+            client.get(path, params={**params, "engine": engine}).raise_for_status()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{label:<24}{timings[0]:>11.2f}{timings[1]:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=20_000)
+    parser.add_argument("--edges", type=int, default=60_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-chain", type=int, default=2000, help="nodes of the skip chain (0 - skip)")
+    args = parser.parse_args()
+
+    names, edges = random_dag(args.nodes, args.edges)
+    queries = random.Random(1).choices(names, k=args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/traversal.db")
+        port = free_port()
+        server = start_server(port, env)
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                graph_id = client.post("/api/graph/", json=to_payload(names, edges)).json()["id"]
+                runs = {
+                    "client fetch + BFS": lambda node: client_descendants(client, graph_id, node),
+                    "descendants memory": lambda node: server_descendants(client, graph_id, node, "memory"),
+                    "descendants sql": lambda node: server_descendants(client, graph_id, node, "sql"),
+                }
+                print(f"{'method':<20}{'ms/query':>10}{'KiB/query':>11}")
+                expected = None
+                for label, fn in runs.items():
+                    results, ms, kib = measure(fn, queries)
+                    assert expected is None or results == expected, label
+                    expected = results
+                    print(f"{label:<20}{ms:>10.2f}{kib:>11.1f}")
+                if args.skip_chain:
+                    print()
+                    skip_chain_table(client, args.skip_chain)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""create_graph validation: the former multi-pass checks vs. the schema pattern + validation.validate_graph.
+
+    python -m benchmarks.bench_validation [--sizes 10000 100000] [--repeat 5]
+
+Both paths start from the decoded JSON payload, as FastAPI hands it over,
+and end with edges as node index lists ready for the cycle check. Times are
+the best of ``--repeat`` runs, split into Pydantic parsing and the checks.
+"""
+import argparse
+import time
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app import schemas, validation
+from app.algorithms import index_edges
+from benchmarks.generators import random_dag, to_payload
+
+
+class LegacyNode(BaseModel):
+    name: str = Field(..., title="Name")
+
+
+class LegacyEdge(BaseModel):
+    source: str = Field(..., title="Source")
+    target: str = Field(..., title="Target")
+
+
+class LegacyGraphCreate(BaseModel):
+    nodes: List[LegacyNode] = Field(..., title="Nodes")
+    edges: List[LegacyEdge] = Field(..., title="Edges")
+
+
+def legacy_checks(graph: LegacyGraphCreate) -> tuple:
+    node_names = [node.name for node in graph.nodes]
+    edge_pairs = [(edge.source, edge.target) for edge in graph.edges]
+    if len(node_names) != len(set(node_names)):
+        raise ValueError("duplicate node")
+    for name in node_names:
+        if not validation.node_name_re.match(name):
+            raise ValueError("invalid name")
+    if len(edge_pairs) != len(set(edge_pairs)):
+        raise ValueError("duplicate edge")
+    node_set = set(node_names)
+    for (src, tgt) in edge_pairs:
+        if src not in node_set or tgt not in node_set:
+            raise ValueError("undefined node")
+    for (src, tgt) in edge_pairs:
+        if src == tgt:
+            raise ValueError("self-loop")
+    sources, targets = index_edges(node_names, edge_pairs)
+    return node_names, sources, targets
+
+
+def fused_checks(graph: schemas.GraphCreate) -> tuple:
+    node_names = [node.name for node in graph.nodes]
+    sources, targets = validation.validate_graph(node_names, [edge.source for edge in graph.edges],
+                                                 [edge.target for edge in graph.edges])
+    return node_names, sources, targets
+
+
+def best_of(repeat: int, fn) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - started)
+    return value, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = {
+        "multi-pass": (LegacyGraphCreate, legacy_checks),
+        "fused": (schemas.GraphCreate, fused_checks),
+    }
+    print(f"{'edges':>8}  {'path':<12}{'parse ms':>10}{'checks ms':>11}{'total ms':>10}")
+    for size in args.sizes:
+        payload = to_payload(*random_dag(max(2, size // 4), size))
+        expected = None
+        for label, (model, checks) in paths.items():
+            graph, parse_s = best_of(args.repeat, lambda: model.model_validate(payload))
+            result, checks_s = best_of(args.repeat, lambda: checks(graph))
+            assert expected is None or result == expected, label
+            expected = result
+            print(f"{size:>8}  {label:<12}{parse_s * 1000:>10.1f}{checks_s * 1000:>11.1f}"
+                  f"{(parse_s + checks_s) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
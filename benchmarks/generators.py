@@ -0,0 +1,57 @@
+import random
+
+
+def node_names(count: int) -> list:
+    return [f"N{i}" for i in range(count)]
+
+
+def random_dag(node_count: int, edge_count: int, seed: int = 0) -> tuple:
+    """Random DAG: edges always point from a lower to a higher node index."""
+    rng = random.Random(seed)
+    max_edges = node_count * (node_count - 1) // 2
+    if edge_count > max_edges:
+        raise ValueError(f"{node_count} nodes cannot hold {edge_count} edges")
+    names = node_names(node_count)
+    pairs = set()
+    while len(pairs) < edge_count:
+        a, b = rng.randrange(node_count), rng.randrange(node_count)
+        if a != b:
+            pairs.add((a, b) if a < b else (b, a))
+    order = list(range(node_count))
+    rng.shuffle(order)
+    return names, [(names[order[a]], names[order[b]]) for a, b in sorted(pairs)]
+
+
+def chain(node_count: int) -> tuple:
+    names = node_names(node_count)
+    return names, [(names[i], names[i + 1]) for i in range(node_count - 1)]
+
+
+def skip_chain(node_count: int) -> tuple:
+    """``N(i) -> N(i+1)`` and ``N(i) -> N(i+2)``: many paths, of many lengths, to every node."""
+    names = node_names(node_count)
+    return names, [(names[i], names[j]) for i in range(node_count) for j in (i + 1, i + 2) if j < node_count]
+
+
+def fan_out(width: int) -> tuple:
+    names = node_names(width + 1)
+    return names, [(names[0], names[i]) for i in range(1, width + 1)]
+
+
+def layered(layer_count: int, width: int, fan_in: int = 2, seed: int = 0) -> tuple:
+    """``layer_count`` layers of ``width`` nodes, each node fed by ``fan_in`` random nodes of the layer above."""
+    rng = random.Random(seed)
+    names = node_names(layer_count * width)
+    edges = []
+    for layer in range(1, layer_count):
+        above = names[(layer - 1) * width:layer * width]
+        for name in names[layer * width:(layer + 1) * width]:
+            edges.extend((source, name) for source in rng.sample(above, min(fan_in, width)))
+    return names, edges
+
+
+def to_payload(names: list, edges: list) -> dict:
+    return {
+        "nodes": [{"name": name} for name in names],
+        "edges": [{"source": src, "target": tgt} for src, tgt in edges],
+    }
@@ -0,0 +1,119 @@
+"""HTTP load test: p50/p99 latency and RPS for the sync and async configurations.
+
+    python -m benchmarks.loadtest [--concurrency 64] [--duration 10] [--configs sync async]
+
+For every configuration a uvicorn server is started in a subprocess with
+DB_ASYNC set accordingly, a few graphs are seeded, and ``--concurrency``
+clients then issue a read-heavy mix (90% reads, 10% creates) for
+``--duration`` seconds. DATABASE_URL defaults to a fresh SQLite file per
+configuration; point it at PostgreSQL to measure the real pool settings
+(DB_POOL_SIZE, DB_MAX_OVERFLOW, ... are passed through).
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.generators import random_dag, to_payload
+
+READ_PATHS = ("/api/graph/{id}/", "/api/graph/{id}/adjacency_list", "/api/graph/{id}/reverse_adjacency_list")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def drive(base_url: str, concurrency: int, duration: float, graph_nodes: int, graph_edges: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        payload = to_payload(*random_dag(graph_nodes, graph_edges))
+        graph_ids = []
+        for _ in range(8):
+            graph_ids.append((await client.post("/api/graph/", json=payload)).json()["id"])
+
+        latencies = []
+        errors = 0
+        stop_at = time.perf_counter() + duration
+
+        async def worker(seed: int):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                if rng.random() < 0.1:
+                    response = await client.post("/api/graph/", json=payload)
+                else:
+                    path = rng.choice(READ_PATHS).format(id=rng.choice(graph_ids))
+                    response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", nargs="+", choices=("sync", "async"), default=["sync", "async"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--edges", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'config':<8}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for config in args.configs:
+            env = dict(os.environ)
+            env["DB_ASYNC"] = "1" if config == "async" else "0"
+            env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/load_{config}.db")
+            port = free_port()
+            server = start_server(port, env)
+            try:
+                r = asyncio.run(drive(f"http://127.0.0.1:{port}", args.concurrency, args.duration,
+                                      args.nodes, args.edges))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{config:<8}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+                  f"{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Regression suite: micro-benchmarks and an in-process HTTP load, compared with a stored baseline.
+
+    python -m benchmarks.suite [--output benchmark-results.json] [--baseline benchmarks/baseline.json]
+                               [--threshold 0.25] [--save-baseline] [--repeat 5] [--scale 1.0] [--only NAME ...]
+
+Micro-benchmarks (best of ``--repeat`` runs) cover cycle detection
+(``topological_sort``), validation, the CompactGraph adjacency build,
+encoding of the read views and execution levels, on random, chain,
+fan-out and layered graphs. The HTTP cases drive ``app.main:app``
+in-process through httpx's ASGI transport on a throw-away SQLite database
+(DATABASE_URL is not inherited): create latency, then p50/p99 and time per
+request of a concurrent read load.
+
+Every result is in seconds, lower is better. Results are written to
+``--output`` as JSON and compared with ``--baseline``; a case slower than
+its baseline by more than ``--threshold`` (0.25 = 25%) is a regression and
+makes the exit status 1. ``--save-baseline`` stores the results as the new
+baseline instead. ``--scale`` shrinks or grows the graph sizes, so a quick
+run needs a baseline recorded with the same scale.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.generators import chain, fan_out, layered, random_dag, to_payload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def shapes(scale: float) -> dict:
+    size = max(10, int(100_000 * scale))
+    return {
+        "random": random_dag(size // 4, size),
+        "chain": chain(size),
+        "fan_out": fan_out(size),
+        "layered": layered(max(2, size // 3_000), 1_000, fan_in=3),
+    }
+
+
+def micro_cases(scale: float) -> dict:
+    """Case name -> zero-argument callable to time."""
+    from app.algorithms import index_edges, topological_sort
+    from app.compact import CompactGraph, encode_view
+    from app.validation import prepare_graph
+
+    cases = {}
+    for shape, (names, edges) in shapes(scale).items():
+        sources, targets = index_edges(names, edges)
+        edge_sources = [source for source, _ in edges]
+        edge_targets = [target for _, target in edges]
+        graph = CompactGraph(1, names, sources, targets)
+        cases.update({
+            f"toposort/{shape}": lambda n=names, s=sources, t=targets: topological_sort(len(n), s, t),
+            f"validate/{shape}": lambda n=names, s=edge_sources, t=edge_targets: prepare_graph(n, s, t),
+            f"compact/{shape}": lambda n=names, s=sources, t=targets: CompactGraph(1, n, s, t),
+            f"encode/adjacency/{shape}": lambda g=graph: encode_view(g, "adjacency"),
+            f"encode/graph/{shape}": lambda g=graph: encode_view(g, "graph"),
+            f"levels/{shape}": lambda g=graph: encode_view(g, "levels"),
+        })
+    return cases
+
+
+def best_times(cases: dict, repeat: int) -> dict:
+    """Best time of ``repeat`` runs per case.
+
+    Runs go round-robin over the cases, so a slow spell of the machine hits
+    every case once rather than all runs of one case. As in timeit, garbage
+    collection is off inside the timed region.
+    """
+    best = dict.fromkeys(cases, float("inf"))
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, fn in cases.items():
+                started = time.perf_counter()
+                fn()
+                best[name] = min(best[name], time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best
+
+
+async def http_results(creates: int, concurrency: int, reads: int) -> dict:
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    payload = to_payload(*random_dag(200, 600))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://suite") as client:
+            create_latencies = []
+            graph_ids = []
+            for _ in range(creates):
+                started = time.perf_counter()
+                response = await client.post("/api/graph/", json=payload)
+                create_latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                graph_ids.append(response.json()["id"])
+
+            paths = ("/api/graph/{id}/", "/api/graph/{id}/adjacency_list", "/api/graph/{id}/levels")
+            read_latencies = []
+
+            async def reader(seed: int):
+                rng = random.Random(seed)
+                for _ in range(reads):
+                    path = rng.choice(paths).format(id=rng.choice(graph_ids))
+                    started = time.perf_counter()
+                    (await client.get(path)).raise_for_status()
+                    read_latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(reader(i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    create_latencies.sort()
+    read_latencies.sort()
+    return {
+        "http/create/p50": create_latencies[len(create_latencies) // 2],
+        "http/read/p50": read_latencies[len(read_latencies) // 2],
+        "http/read/p99": read_latencies[min(len(read_latencies) - 1, int(len(read_latencies) * 0.99))],
+        "http/read/per_request": elapsed / len(read_latencies),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """``(name, baseline, current, ratio, status)`` for every result; status is ok, REGRESSION, faster or new."""
+    rows = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            rows.append((name, None, current, None, "new"))
+            continue
+        ratio = current / previous if previous else float("inf")
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, previous, current, ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--only", nargs="+", default=None, help="run only cases whose name starts with one of these")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/suite.db"
+
+    def selected(name: str) -> bool:
+        return args.only is None or any(name.startswith(prefix) for prefix in args.only)
+
+    cases = {name: fn for name, fn in micro_cases(args.scale).items() if selected(name)}
+    results = best_times(cases, args.repeat)
+    if selected("http/"):
+        http = asyncio.run(http_results(creates=max(5, int(50 * args.scale)), concurrency=16,
+                                        reads=max(5, int(100 * args.scale))))
+        results.update((name, value) for name, value in http.items() if selected(name))
+
+    document = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != args.scale:
+        print(f"warning: baseline was recorded with --scale {baseline.get('scale')}")
+
+    rows = compare(results, baseline["results"], args.threshold)
+    print(f"{'case':<28}{'baseline ms':>13}{'current ms':>12}{'ratio':>8}  status")
+    for name, previous, current, ratio, status in rows:
+        before = "-" if previous is None else f"{previous * 1000:.2f}"
+        change = "-" if ratio is None else f"{ratio:.2f}"
+        print(f"{name:<28}{before:>13}{current * 1000:>12.2f}{change:>8}  {status}")
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
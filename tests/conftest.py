@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.cache import graph_cache
 from app.database import Base, engine
 from app.main import app
 
@@ -8,6 +9,7 @@ from app.main import app
 def clear_database():
     Base.metadata.drop_all(bind=engine, checkfirst=True)
     Base.metadata.create_all(bind=engine)
+    graph_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine, checkfirst=True)
     Base.metadata.create_all(bind=engine)
@@ -16,3 +18,15 @@ def clear_database():
 def client():
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture
+def create_graph(client):
+    """POST a graph from node names and ``(source, target)`` pairs; return its id."""
+    def create(nodes, edges=()):
+        response = client.post("/api/graph/", json={
+            "nodes": [{"name": name} for name in nodes],
+            "edges": [{"source": source, "target": target} for source, target in edges],
+        })
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return create
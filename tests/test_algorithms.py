@@ -0,0 +1,55 @@
+from app.algorithms import index_edges, topological_levels, topological_sort, topological_sort_compact
+
+
+def _is_topological(order, sources, targets):
+    position = {node: i for i, node in enumerate(order)}
+    return all(position[s] < position[t] for s, t in zip(sources, targets))
+
+def test_topological_sort_dag():
+    names = ["A", "B", "C", "D"]
+    sources, targets = index_edges(names, [("C", "B"), ("B", "A"), ("D", "A")])
+    result = topological_sort(len(names), sources, targets)
+    assert result.cycle is None
+    assert sorted(result.order) == [0, 1, 2, 3]
+    assert _is_topological(result.order, sources, targets)
+
+def test_topological_sort_without_edges_keeps_index_order():
+    result = topological_sort(3, [], [])
+    assert result.order == [0, 1, 2]
+    assert result.cycle is None
+
+def test_topological_sort_reports_cycle_path():
+    names = ["A", "B", "C", "D", "E"]
+    edges = [("A", "B"), ("B", "C"), ("C", "D"), ("D", "B"), ("D", "E")]
+    sources, targets = index_edges(names, edges)
+    result = topological_sort(len(names), sources, targets)
+    assert result.cycle is not None
+    cycle = [names[i] for i in result.cycle]
+    assert cycle[0] == cycle[-1]
+    assert set(cycle) == {"B", "C", "D"}
+    for src, tgt in zip(cycle, cycle[1:]):
+        assert (src, tgt) in edges
+    assert result.order == [0]
+
+def test_topological_sort_deep_chain():
+    n = 200_000
+    result = topological_sort(n, range(n - 1), range(1, n))
+    assert result.cycle is None
+    assert result.order == list(range(n))
+
+def test_topological_sort_compact_matches_list_version():
+    names = [f"N{i}" for i in range(6)]
+    edges = [("N5", "N0"), ("N0", "N1"), ("N2", "N1"), ("N1", "N3"), ("N4", "N3")]
+    sources, targets = index_edges(names, edges)
+    assert list(topological_sort_compact(6, sources, targets).order) == topological_sort(6, sources, targets).order
+    edges.append(("N3", "N5"))
+    sources, targets = index_edges(names, edges)
+    cyclic = topological_sort_compact(6, sources, targets)
+    assert cyclic.cycle == topological_sort(6, sources, targets).cycle
+
+def test_topological_levels_are_longest_path_depths():
+    # A -> B -> C, A -> C, D -> C as CSR
+    offsets, targets = [0, 2, 3, 3, 4], [1, 2, 2, 2]
+    indegree = [0, 1, 3, 0]
+    assert topological_levels(offsets, targets, indegree) == [[0, 3], [1], [2]]
+    assert indegree == [0, 1, 3, 0]
@@ -0,0 +1,25 @@
+def test_batch_read_adjacency_with_missing_ids(client, create_graph):
+    first = create_graph(["A", "B"], [("A", "B")])
+    second = create_graph(["X", "Y", "Z"], [("X", "Z"), ("Y", "Z")])
+    client.get(f"/api/graph/{first}/adjacency_list")
+
+    response = client.post("/api/graph/batch", json={"ids": [second, 999, first, second]})
+    assert response.status_code == 200
+    assert response.json() == {"graphs": [
+        {"id": second, "status": 200, "data": {"adjacency_list": {"X": ["Z"], "Y": ["Z"], "Z": []}}},
+        {"id": 999, "status": 404, "message": "Graph not found"},
+        {"id": first, "status": 200, "data": {"adjacency_list": {"A": ["B"], "B": []}}},
+    ]}
+
+def test_batch_read_views_match_single_endpoints(client, create_graph):
+    graph_ids = [create_graph(["A", "B", "C"], [("A", "B"), ("C", "B")]), create_graph([], [])]
+    endpoints = {"graph": "", "adjacency": "adjacency_list", "reverse": "reverse_adjacency_list"}
+    for view, endpoint in endpoints.items():
+        batch = client.post("/api/graph/batch", json={"ids": graph_ids, "view": view}).json()["graphs"]
+        assert [item["data"] for item in batch] == [
+            client.get(f"/api/graph/{graph_id}/{endpoint}").json() for graph_id in graph_ids]
+
+def test_batch_read_validation(client):
+    assert client.post("/api/graph/batch", json={"ids": [1], "view": "matrix"}).status_code == 422
+    assert client.post("/api/graph/batch", json={"ids": list(range(1001))}).status_code == 422
+    assert client.post("/api/graph/batch", json={"ids": []}).json() == {"graphs": []}
@@ -0,0 +1,82 @@
+from app import main
+from app.cache import GraphCache, graph_cache
+
+
+class Entry:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+def test_cache_evicts_least_recently_used_by_count():
+    cache = GraphCache(max_entries=2, max_bytes=1000)
+    cache.put(1, Entry(10))
+    cache.put(2, Entry(10))
+    assert cache.get(1) is not None
+    cache.put(3, Entry(10))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2 and stats["bytes"] == 20
+
+def test_cache_evicts_by_bytes_and_skips_oversized_entries():
+    cache = GraphCache(max_entries=10, max_bytes=100)
+    cache.put(1, Entry(60))
+    cache.put(2, Entry(60))
+    assert cache.get(1) is None
+    cache.put(3, Entry(101))
+    assert cache.get(3) is None
+    assert cache.stats()["bytes"] == 60
+
+def test_cache_rejects_snapshot_loaded_before_invalidation():
+    cache = GraphCache(max_entries=10, max_bytes=100)
+    generation = cache.generation()
+    cache.invalidate(1)
+    cache.put(1, Entry(10), generation)
+    assert cache.get(1) is None
+
+def test_cache_disabled():
+    cache = GraphCache(max_entries=10, max_bytes=100, enabled=False)
+    cache.put(1, Entry(10))
+    assert cache.get(1) is None
+
+def test_read_endpoints_share_cached_graph(client):
+    payload = {"nodes": [{"name": "A"}, {"name": "B"}], "edges": [{"source": "A", "target": "B"}]}
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    before = graph_cache.stats()
+    client.get(f"/api/graph/{graph_id}/")
+    client.get(f"/api/graph/{graph_id}/adjacency_list")
+    client.get(f"/api/graph/{graph_id}/reverse_adjacency_list")
+    after = client.get("/cache/stats").json()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+def test_delete_node_invalidates_cached_graph(client):
+    payload = {"nodes": [{"name": "A"}, {"name": "B"}], "edges": [{"source": "A", "target": "B"}]}
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"] == {"A": ["B"], "B": []}
+    assert client.delete(f"/api/graph/{graph_id}/node/B").status_code == 204
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"] == {"A": []}
+    assert graph_cache.stats()["invalidations"] == 1
+
+def test_writes_through_another_workers_cache_are_seen(client, monkeypatch):
+    # Two workers: each invalidates only its own cache on write.
+    payload = {"nodes": [{"name": "A"}, {"name": "B"}], "edges": [{"source": "A", "target": "B"}]}
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    first, second = GraphCache(max_entries=10, max_bytes=10**6), GraphCache(max_entries=10, max_bytes=10**6)
+    monkeypatch.setattr(main, "graph_cache", first)
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"] == {"A": ["B"], "B": []}
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").status_code == 200
+    assert first.stats()["hits"] == 1 and first.stats()["invalidations"] == 0
+
+    monkeypatch.setattr(main, "graph_cache", second)
+    assert client.delete(f"/api/graph/{graph_id}/node/B").status_code == 204
+    monkeypatch.setattr(main, "graph_cache", first)
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"] == {"A": []}
+    assert first.stats()["invalidations"] == 1
+
+    monkeypatch.setattr(main, "graph_cache", second)
+    assert client.post(f"/api/graph/{graph_id}/node", json={"name": "C"}).status_code == 201
+    monkeypatch.setattr(main, "graph_cache", first)
+    batch = client.post("/api/graph/batch", json={"ids": [graph_id], "view": "adjacency"}).json()["graphs"]
+    assert batch[0]["data"]["adjacency_list"] == {"A": [], "C": []}
+    assert first.stats()["invalidations"] == 2
@@ -0,0 +1,28 @@
+from app.compact import CompactGraph
+
+
+def _graph():
+    names = ["D", "B", "A", "C"]
+    edges = [("D", "C"), ("D", "A"), ("B", "A"), ("D", "B")]
+    index = {name: i for i, name in enumerate(names)}
+    return CompactGraph(7, names, [index[s] for s, _ in edges], [index[t] for _, t in edges])
+
+def test_compact_graph_csr_layout():
+    graph = _graph()
+    assert graph.node_count == 4 and graph.edge_count == 4
+    assert list(graph.fwd_offsets) == [0, 3, 4, 4, 4]
+    assert [graph.names[i] for i in graph.successors(0)] == ["A", "B", "C"]
+    assert [graph.names[i] for i in graph.predecessors(2)] == ["B", "D"]
+    assert graph.index["C"] == 3
+    assert sorted((graph.names[s], graph.names[t]) for s, t in graph.edges()) == [
+        ("B", "A"), ("D", "A"), ("D", "B"), ("D", "C")]
+
+def test_compact_graph_adjacency_lists_are_sorted_by_name():
+    graph = _graph()
+    assert graph.adjacency() == {"D": ["A", "B", "C"], "B": ["A"], "A": [], "C": []}
+    assert graph.reverse_adjacency() == {"D": [], "B": ["D"], "A": ["B", "D"], "C": ["D"]}
+
+def test_compact_graph_empty():
+    graph = CompactGraph(1, [], [], [])
+    assert graph.adjacency() == {}
+    assert list(graph.edges()) == []
@@ -146,3 +146,67 @@ def test_create_multiple_graphs_isolation(client):
     nodes2 = {n["name"] for n in graph2["nodes"]}
     assert nodes1 == {"X", "Y"}
     assert nodes2 == {"X", "Z"}
+
+def test_create_graph_many_nodes_and_edges(client):
+    names = [f"N{i}" for i in range(300)]
+    edges = [(names[i], names[j]) for i in range(300) for j in (i + 1, i + 7) if j < 300]
+    payload = {
+        "nodes": [{"name": n} for n in names],
+        "edges": [{"source": s, "target": t} for s, t in edges]
+    }
+    response = client.post("/api/graph/", json=payload)
+    assert response.status_code == 201
+    data = client.get(f"/api/graph/{response.json()['id']}/").json()
+    assert {n["name"] for n in data["nodes"]} == set(names)
+    assert {(e["source"], e["target"]) for e in data["edges"]} == set(edges)
+
+def test_create_graph_deep_chain(client):
+    names = [f"N{i}" for i in range(5000)]
+    payload = {
+        "nodes": [{"name": n} for n in names],
+        "edges": [{"source": a, "target": b} for a, b in zip(names, names[1:])]
+    }
+    response = client.post("/api/graph/", json=payload)
+    assert response.status_code == 201
+
+def test_create_graph_cycle_message_contains_path(client):
+    payload = {
+        "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+        "edges": [
+            {"source": "A", "target": "B"},
+            {"source": "B", "target": "C"},
+            {"source": "C", "target": "A"}
+        ]
+    }
+    response = client.post("/api/graph/", json=payload)
+    assert response.status_code == 400
+    message = response.json()["message"]
+    assert "cycle" in message.lower()
+    path = message.split(": ", 1)[1].split(" -> ")
+    assert path[0] == path[-1] and set(path) == {"A", "B", "C"}
+
+def test_create_graph_invalid_name_among_valid_ones(client):
+    payload = {
+        "nodes": [{"name": "A"}, {"name": "B-1"}, {"name": "C"}],
+        "edges": []
+    }
+    response = client.post("/api/graph/", json=payload)
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid node name. Names must be 1-255 characters long and use only Latin letters."}
+
+def test_create_graph_malformed_payload_is_422(client):
+    response = client.post("/api/graph/", json={"nodes": [{"name": "A"}]})
+    assert response.status_code == 422
+
+def test_create_graph_error_messages_name_the_culprit(client):
+    nodes = [{"name": "A"}, {"name": "B"}]
+    cases = [
+        ({"nodes": nodes + [{"name": "A"}], "edges": []}, "Duplicate node name 'A'"),
+        ({"nodes": nodes, "edges": [{"source": "A", "target": "B"}, {"source": "A", "target": "B"}]},
+         "Duplicate edge from 'A' to 'B'"),
+        ({"nodes": nodes, "edges": [{"source": "B", "target": "B"}]}, "Self-loop detected on node 'B'"),
+    ]
+    for payload, message in cases:
+        response = client.post("/api/graph/", json=payload)
+        assert response.status_code == 400
+        assert response.json() == {"message": message}
@@ -0,0 +1,44 @@
+from app import main, metrics
+from app.validation import content_hash
+
+GRAPH = {
+    "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+    "edges": [{"source": "A", "target": "B"}, {"source": "B", "target": "C"}],
+}
+SHUFFLED = {
+    "nodes": [{"name": "C"}, {"name": "A"}, {"name": "B"}],
+    "edges": [{"source": "B", "target": "C"}, {"source": "A", "target": "B"}],
+}
+
+
+def test_content_hash_ignores_submission_order():
+    assert content_hash(["A", "B"], ["A"], ["B"]) == content_hash(["B", "A"], ["A"], ["B"])
+    assert content_hash(["A", "B"], ["A"], ["B"]) != content_hash(["A", "B"], ["B"], ["A"])
+    assert content_hash(["A", "B"], [], []) != content_hash(["A", "B", "B"], [], [])
+
+def test_identical_graphs_share_an_id(client, monkeypatch):
+    monkeypatch.setattr(main, "GRAPH_DEDUP", True)
+    before = metrics.GRAPHS_DEDUPLICATED._value.get()
+    first = client.post("/api/graph/", json=GRAPH)
+    second = client.post("/api/graph/", json=SHUFFLED)
+    assert first.status_code == second.status_code == 201
+    assert first.json() == second.json()
+    assert metrics.GRAPHS_DEDUPLICATED._value.get() == before + 1
+
+    other = client.post("/api/graph/", json={"nodes": GRAPH["nodes"], "edges": GRAPH["edges"][:1]})
+    assert other.json()["id"] != first.json()["id"]
+
+def test_mutated_graph_is_not_reused(client, monkeypatch):
+    monkeypatch.setattr(main, "GRAPH_DEDUP", True)
+    graph_id = client.post("/api/graph/", json=GRAPH).json()["id"]
+    assert client.post(f"/api/graph/{graph_id}/node", json={"name": "D"}).status_code == 201
+    assert client.delete(f"/api/graph/{graph_id}/node/D").status_code == 204
+    assert client.post("/api/graph/", json=GRAPH).json()["id"] != graph_id
+
+def test_invalid_graph_is_still_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "GRAPH_DEDUP", True)
+    cyclic = {"nodes": GRAPH["nodes"], "edges": GRAPH["edges"] + [{"source": "C", "target": "A"}]}
+    assert client.post("/api/graph/", json=cyclic).status_code == 400
+
+def test_dedup_is_off_by_default(client):
+    assert client.post("/api/graph/", json=GRAPH).json() != client.post("/api/graph/", json=GRAPH).json()
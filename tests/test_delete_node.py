@@ -41,3 +41,57 @@ def test_delete_node_graph_not_found(client):
     resp = client.delete("/api/graph/99999/node/AnyNode")
     assert resp.status_code == 404
     assert resp.json()["message"] == "Graph not found"
+
+def test_delete_nodes_batch(client):
+    payload = {
+        "nodes": [{"name": n} for n in ["A", "B", "C", "D"]],
+        "edges": [
+            {"source": "A", "target": "B"},
+            {"source": "B", "target": "C"},
+            {"source": "C", "target": "D"},
+            {"source": "A", "target": "D"},
+        ]
+    }
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    client.get(f"/api/graph/{graph_id}/adjacency_list")
+
+    resp = client.post(f"/api/graph/{graph_id}/nodes/delete", json={"names": ["B", "C", "B"]})
+    assert resp.status_code == 204
+    adj = client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"]
+    assert adj == {"A": ["D"], "D": []}
+
+def test_delete_nodes_batch_is_atomic(client):
+    payload = {"nodes": [{"name": "A"}, {"name": "B"}], "edges": [{"source": "A", "target": "B"}]}
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    resp = client.post(f"/api/graph/{graph_id}/nodes/delete", json={"names": ["A", "Missing"]})
+    assert resp.status_code == 404
+    assert resp.json()["message"] == "Node not found"
+    assert len(client.get(f"/api/graph/{graph_id}/").json()["nodes"]) == 2
+
+    resp = client.post("/api/graph/99999/nodes/delete", json={"names": ["A"]})
+    assert resp.status_code == 404
+    assert resp.json()["message"] == "Graph not found"
+    assert client.post(f"/api/graph/{graph_id}/nodes/delete", json={"names": []}).status_code == 422
+
+def test_delete_nodes_batch_round_trips(client):
+    from sqlalchemy import event
+
+    from app import database
+
+    payload = {"nodes": [{"name": n} for n in "ABC"], "edges": [{"source": "A", "target": "B"}]}
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    engine = database.async_engine.sync_engine if database.async_engine is not None else database.engine
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "graphs" in statement or "nodes" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        resp = client.post(f"/api/graph/{graph_id}/nodes/delete", json={"names": ["A", "B"]})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert resp.status_code == 204
+    # The graph lock shares the DELETE on PostgreSQL; SQLite has no data-modifying CTEs.
+    assert len(statements) == (1 if engine.dialect.name == "postgresql" else 2)
@@ -0,0 +1,19 @@
+import json
+
+from app.encoding import dumps, etag_matches, make_etag
+
+
+def test_dumps_is_compact_json():
+    document = {"id": 1, "nodes": [{"name": "A"}], "edges": []}
+    body = dumps(document)
+    assert json.loads(body) == document
+    assert b" " not in body
+
+def test_etag_matches():
+    etag = make_etag(b"{}")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
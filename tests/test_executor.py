@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.executor import cpu_pool
+
+PAYLOAD = {
+    "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+    "edges": [{"source": "A", "target": "B"}, {"source": "A", "target": "C"}, {"source": "B", "target": "C"}],
+}
+
+
+@pytest.fixture
+def offload_everything(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "workers", 1)
+    monkeypatch.setattr(cpu_pool, "min_edges", 0)
+
+def test_offloaded_create_and_read(client, offload_everything):
+    response = client.post("/api/graph/", json=PAYLOAD)
+    assert response.status_code == 201
+    graph_id = response.json()["id"]
+    adjacency = client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"]
+    assert adjacency == {"A": ["B", "C"], "B": ["C"], "C": []}
+
+def test_offloaded_validation_errors(client, offload_everything):
+    cyclic = dict(PAYLOAD, edges=PAYLOAD["edges"] + [{"source": "C", "target": "A"}])
+    response = client.post("/api/graph/", json=cyclic)
+    assert response.status_code == 400
+    assert "cycle" in response.json()["message"]
+    duplicate = dict(PAYLOAD, nodes=PAYLOAD["nodes"] + [{"name": "A"}])
+    response = client.post("/api/graph/", json=duplicate)
+    assert response.status_code == 400
+    assert response.json() == {"message": "Duplicate node name 'A'"}
+
+def test_saturated_pool_answers_503(client, offload_everything, monkeypatch):
+    monkeypatch.setattr(cpu_pool, "max_pending", 0)
+    response = client.post("/api/graph/", json=PAYLOAD)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_snapshots_are_built_off_the_event_loop(client, monkeypatch):
+    from app import main
+    from app.compact import CompactGraph
+
+    on_loop = []
+
+    class RecordingGraph(CompactGraph):
+        __slots__ = ()
+
+        def __init__(self, *args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            super().__init__(*args)
+
+    monkeypatch.setattr(main, "CompactGraph", RecordingGraph)
+    graph_id = client.post("/api/graph/", json=PAYLOAD).json()["id"]
+    assert client.get(f"/api/graph/{graph_id}/").status_code == 200
+    assert client.post("/api/graph/batch", json={"ids": [graph_id + 1, graph_id]}).status_code == 200
+    assert on_loop == [False]
@@ -0,0 +1,108 @@
+import gzip
+import json
+
+import msgpack
+
+from app import formats
+
+MSGPACK = "application/x-msgpack"
+COLUMNAR_JSON = "application/vnd.dag.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.dag.columnar+msgpack"
+
+PAYLOAD = {
+    "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+    "edges": [{"source": "A", "target": "B"}, {"source": "A", "target": "C"}, {"source": "C", "target": "B"}],
+}
+
+def _post(client, content_type, body, accept=None):
+    headers = {"Content-Type": content_type}
+    if accept is not None:
+        headers["Accept"] = accept
+    return client.post("/api/graph/", content=body, headers=headers)
+
+def test_create_from_every_format_reads_back_the_same_graph(client):
+    columnar = {"nodes": ["A", "B", "C"], "sources": [0, 0, 2], "targets": [1, 2, 1]}
+    bodies = {
+        MSGPACK: msgpack.packb(PAYLOAD),
+        COLUMNAR_JSON: json.dumps(columnar).encode(),
+        COLUMNAR_MSGPACK: msgpack.packb(columnar),
+    }
+    expected = client.get(f"/api/graph/{client.post('/api/graph/', json=PAYLOAD).json()['id']}/").json()
+    for content_type, body in bodies.items():
+        response = _post(client, content_type, body)
+        assert response.status_code == 201, content_type
+        graph_id = response.json()["id"]
+        assert client.get(f"/api/graph/{graph_id}/").json() == {**expected, "id": graph_id}
+
+def test_create_answers_in_msgpack_when_asked(client):
+    response = _post(client, MSGPACK, msgpack.packb(PAYLOAD), accept=MSGPACK)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == MSGPACK
+    assert set(msgpack.unpackb(response.content)) == {"id"}
+
+def test_create_rejects_bad_bodies(client):
+    assert _post(client, "text/csv", b"A,B").status_code == 415
+    assert _post(client, MSGPACK, b"\xc1").status_code == 422
+    assert _post(client, MSGPACK, msgpack.packb({"nodes": []})).status_code == 422
+    invalid_name = {"nodes": [{"name": "A b"}], "edges": []}
+    response = _post(client, MSGPACK, msgpack.packb(invalid_name))
+    assert response.status_code == 400
+    assert response.json() == client.post("/api/graph/", json=invalid_name).json()
+
+def test_create_columnar_checks_names_and_indices(client):
+    def columnar(nodes, sources, targets):
+        return _post(client, COLUMNAR_MSGPACK, msgpack.packb({"nodes": nodes, "sources": sources, "targets": targets}))
+    assert columnar(["A", "B"], [0, 1], [1]).status_code == 422
+    assert columnar(["A", "b c"], [], []).status_code == 400
+    assert columnar(["A", "B"], [0], [2]).json() == {"message": "Edge references an undefined node."}
+    assert columnar(["A", "B"], [-1], [0]).status_code == 400
+    assert columnar(["A", "A"], [], []).status_code == 400
+    assert columnar(["A", "B"], [0, 1], [1, 0]).status_code == 400
+
+def test_read_negotiates_format(client):
+    graph_id = client.post("/api/graph/", json=PAYLOAD).json()["id"]
+    as_json = client.get(f"/api/graph/{graph_id}/")
+
+    response = client.get(f"/api/graph/{graph_id}/", headers={"Accept": MSGPACK})
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == as_json.json()
+    assert response.headers["etag"] != as_json.headers["etag"]
+    assert "Accept" in response.headers["vary"]
+
+    response = client.get(f"/api/graph/{graph_id}/", headers={"Accept": COLUMNAR_JSON})
+    assert response.headers["content-type"] == COLUMNAR_JSON
+    assert response.json() == {"id": graph_id, "nodes": ["A", "B", "C"], "sources": [0, 0, 2], "targets": [1, 2, 1]}
+    assert msgpack.unpackb(client.get(f"/api/graph/{graph_id}/", headers={"Accept": COLUMNAR_MSGPACK}).content) \
+        == response.json()
+
+    # Views without a columnar form, and unknown types, fall back.
+    response = client.get(f"/api/graph/{graph_id}/adjacency_list", headers={"Accept": f"{COLUMNAR_JSON}, {MSGPACK};q=0.5"})
+    assert response.headers["content-type"] == MSGPACK
+    response = client.get(f"/api/graph/{graph_id}/", headers={"Accept": "text/html, */*;q=0.1"})
+    assert response.headers["content-type"] == "application/json"
+
+def test_large_responses_are_compressed(client, monkeypatch):
+    graph_id = client.post("/api/graph/", json=PAYLOAD).json()["id"]
+    plain = client.get(f"/api/graph/{graph_id}/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+
+    monkeypatch.setattr(formats, "COMPRESS_MIN_BYTES", 1)
+    raw = client.get(f"/api/graph/{graph_id}/", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["content-encoding"] == "gzip"
+    assert raw.json() == plain.json()
+    assert raw.headers["etag"] != plain.headers["etag"]
+    assert client.get(f"/api/graph/{graph_id}/", headers={"Accept-Encoding": "gzip",
+                                                          "If-None-Match": raw.headers["etag"]}).status_code == 304
+    assert "content-encoding" not in client.get(f"/api/graph/{graph_id}/", headers={"Accept-Encoding": "identity"}).headers
+
+def test_compress_round_trips():
+    body = b'{"nodes": []}' * 100
+    assert gzip.decompress(formats.compress(body, "gzip")) == body
+    if formats.zstandard is not None:
+        assert formats.zstandard.ZstdDecompressor().decompress(formats.compress(body, "zstd")) == body
+
+def test_content_coding_preference():
+    assert formats.content_coding(None) is None
+    assert formats.content_coding("gzip") == "gzip"
+    assert formats.content_coding("gzip;q=0, br") is None
+    assert formats.content_coding("gzip, zstd") == formats.CODINGS[0]
@@ -0,0 +1,43 @@
+import os
+import pstats
+
+from app import metrics
+
+GRAPH = {"nodes": [{"name": "A"}, {"name": "B"}], "edges": [{"source": "A", "target": "B"}]}
+
+
+def _sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+def test_metrics_endpoint_reports_routes_phases_and_rows(client):
+    created = _sample("graph_nodes_count")
+    written = _sample("db_rows_total", operation="written")
+    graph_id = client.post("/api/graph/", json=GRAPH).json()["id"]
+    client.get(f"/api/graph/{graph_id}/adjacency_list")
+
+    assert _sample("graph_nodes_count") == created + 1
+    assert _sample("db_rows_total", operation="written") == written + 3
+    assert _sample("request_phase_duration_seconds_count", route="/api/graph/", phase="toposort") >= 1
+    assert _sample("request_phase_duration_seconds_count",
+                   route="/api/graph/{graph_id}/adjacency_list", phase="serialize") >= 1
+    assert _sample("db_pool_checkout_seconds_count") >= 2
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/graph/",status="201"}' in response.text
+
+def test_server_timing_header(client, monkeypatch):
+    monkeypatch.setattr(metrics, "SERVER_TIMING", True)
+    response = client.post("/api/graph/", json=GRAPH)
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert names == ["validate", "toposort", "insert", "commit", "total"]
+
+def test_profile_header(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+    response = client.post("/api/graph/", json=GRAPH, headers={"X-Profile": "1"})
+    assert "x-profile" not in client.get("/cache/stats").headers
+    path = response.headers["x-profile"]
+    assert os.path.dirname(path) == str(tmp_path)
+    functions = {func for _, _, func in pstats.Stats(path).stats}
+    assert "topological_sort" in functions
@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+from app import main, schemas
+from app.compact import CompactGraph, load_graph_arrays
+from app.database import SessionLocal, engine
+from app.migrations import upgrade
+
+
+def test_upgrade_adds_missing_indexes(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with old.begin() as conn:
+        upgrade(conn)
+        conn.execute(text("DROP INDEX ix_edge_source_target"))
+        conn.execute(text("DROP INDEX ix_edge_target_source"))
+    with old.begin() as conn:
+        assert upgrade(conn) == ["ix_edge_source_target", "ix_edge_target_source"]
+    with old.begin() as conn:
+        assert upgrade(conn) == []
+        names = {index["name"] for index in inspect(conn).get_indexes("edges")}
+    assert {"ix_edge_source_target", "ix_edge_target_source"} <= names
+    old.dispose()
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite syntax")
+@pytest.mark.parametrize("column, index", [
+    ("source_id", "ix_edge_source_target"),
+    ("target_id", "ix_edge_target_source"),
+])
+def test_cascade_lookups_use_covering_index(column, index):
+    # ON DELETE CASCADE from nodes runs exactly this lookup for each endpoint column.
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            text(f"EXPLAIN QUERY PLAN SELECT source_id, target_id FROM edges WHERE {column} = 1")))
+    assert f"USING COVERING INDEX {index}" in plan
+
+def test_load_graph_arrays_round_trips(client):
+    graph_id = client.post("/api/graph/", json={
+        "nodes": [{"name": "A"}, {"name": "B"}, {"name": "C"}],
+        "edges": [{"source": "A", "target": "B"}],
+    }).json()["id"]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with SessionLocal() as db:
+            graph = CompactGraph(graph_id, *load_graph_arrays(db, [graph_id])[graph_id])
+            assert len(statements) == 2
+            assert load_graph_arrays(db, [graph_id + 1]) == {}
+            assert len(statements) == 3
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert graph.names == ("A", "B", "C") and graph.edge_count == 1
+
+def test_load_graph_arrays_reloads_a_graph_written_between_its_statements(client):
+    graph_id = client.post("/api/graph/", json={"nodes": [{"name": "A"}], "edges": []}).json()["id"]
+    patch = schemas.GraphPatch(add_nodes=[{"name": "B"}], add_edges=[{"source": "A", "target": "B"}])
+    written = []
+
+    def write_before_edges(conn, cursor, statement, parameters, context, executemany):
+        if "FROM edges" in statement and not written:
+            written.append(True)
+            with SessionLocal() as other:
+                main._patch_graph(other, graph_id, patch)
+                other.commit()
+
+    event.listen(engine, "before_cursor_execute", write_before_edges)
+    try:
+        with SessionLocal() as db:
+            names, sources, targets, version = load_graph_arrays(db, [graph_id])[graph_id]
+    finally:
+        event.remove(engine, "before_cursor_execute", write_before_edges)
+    assert written
+    assert (names, list(sources), list(targets), version) == (["A", "B"], [0], [1], 1)
+
+def test_upgrade_adds_missing_nullable_columns(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE graphs (id INTEGER NOT NULL PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO graphs (id) VALUES (1)"))
+    with old.begin() as conn:
+        assert upgrade(conn)[:3] == ["graphs.content_hash", "graphs.version", "ix_graph_content_hash"]
+        assert conn.execute(text("SELECT id, content_hash, version FROM graphs")).all() == [(1, None, 0)]
+    old.dispose()
+
+def test_upgrade_backfills_topo_index_of_baseline_nodes(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE graphs (id INTEGER NOT NULL PRIMARY KEY)"))
+        conn.execute(text(
+            "CREATE TABLE nodes (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+            "graph_id INTEGER NOT NULL REFERENCES graphs (id) ON DELETE CASCADE, "
+            "CONSTRAINT uq_node_graph_name UNIQUE (graph_id, name))"))
+        conn.execute(text(
+            "CREATE TABLE edges (id INTEGER NOT NULL PRIMARY KEY, "
+            "graph_id INTEGER NOT NULL REFERENCES graphs (id) ON DELETE CASCADE, "
+            "source_id INTEGER NOT NULL REFERENCES nodes (id) ON DELETE CASCADE, "
+            "target_id INTEGER NOT NULL REFERENCES nodes (id) ON DELETE CASCADE, "
+            "CONSTRAINT uq_edge_graph_src_tgt UNIQUE (graph_id, source_id, target_id))"))
+        conn.execute(text("INSERT INTO graphs (id) VALUES (1), (2)"))
+        # C -> B -> A, inserted in the reverse of that order.
+        conn.execute(text("INSERT INTO nodes (id, name, graph_id) VALUES (1, 'A', 1), (2, 'B', 1), (3, 'C', 1)"))
+        conn.execute(text("INSERT INTO edges (graph_id, source_id, target_id) VALUES (1, 3, 2), (1, 2, 1)"))
+    with old.begin() as conn:
+        assert "nodes.topo_index" in upgrade(conn)
+        positions = dict(conn.execute(text("SELECT name, topo_index FROM nodes")).all())
+    assert positions["C"] < positions["B"] < positions["A"]
+    with old.begin() as conn:
+        assert upgrade(conn) == []
+        assert not next(column for column in inspect(conn).get_columns("nodes")
+                        if column["name"] == "topo_index")["nullable"]
+    old.dispose()
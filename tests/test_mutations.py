@@ -0,0 +1,136 @@
+import random
+
+from sqlalchemy import select
+
+from app import models
+from app.database import SessionLocal
+
+
+def _edges(client, graph_id):
+    return {(e["source"], e["target"]) for e in client.get(f"/api/graph/{graph_id}/").json()["edges"]}
+
+def _assert_topo_order(graph_id):
+    with SessionLocal() as db:
+        position = dict(db.execute(
+            select(models.Node.id, models.Node.topo_index).where(models.Node.graph_id == graph_id)).all())
+        edges = db.execute(
+            select(models.Edge.source_id, models.Edge.target_id).where(models.Edge.graph_id == graph_id)).all()
+    assert len(set(position.values())) == len(position)
+    assert all(position[s] < position[t] for s, t in edges)
+
+def test_add_node(client, create_graph):
+    graph_id = create_graph(["A"])
+    response = client.post(f"/api/graph/{graph_id}/node", json={"name": "B"})
+    assert response.status_code == 201
+    assert response.json() == {"name": "B"}
+    assert client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"] == {"A": [], "B": []}
+    _assert_topo_order(graph_id)
+
+def test_add_node_errors(client, create_graph):
+    graph_id = create_graph(["A"])
+    response = client.post(f"/api/graph/{graph_id}/node", json={"name": "A"})
+    assert response.status_code == 400
+    assert response.json() == {"message": "Duplicate node name 'A'"}
+    response = client.post(f"/api/graph/{graph_id}/node", json={"name": "A-B"})
+    assert response.status_code == 400
+    assert "Invalid node name" in response.json()["message"]
+    response = client.post(f"/api/graph/{graph_id + 1}/node", json={"name": "B"})
+    assert response.status_code == 404
+
+def test_add_edge_reorders_topological_positions(client, create_graph):
+    graph_id = create_graph(["A", "B", "C", "D"], [("A", "B"), ("C", "D")])
+    client.get(f"/api/graph/{graph_id}/adjacency_list")
+    response = client.post(f"/api/graph/{graph_id}/edge", json={"source": "D", "target": "A"})
+    assert response.status_code == 201
+    _assert_topo_order(graph_id)
+    adjacency = client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"]
+    assert adjacency["D"] == ["A"]
+
+def test_add_edge_cycle_is_rejected_with_path(client, create_graph):
+    graph_id = create_graph(["A", "B", "C"], [("A", "B"), ("B", "C")])
+    response = client.post(f"/api/graph/{graph_id}/edge", json={"source": "C", "target": "A"})
+    assert response.status_code == 400
+    assert response.json() == {"message": "Graph contains a cycle and cannot be added: C -> A -> B -> C"}
+    assert _edges(client, graph_id) == {("A", "B"), ("B", "C")}
+
+def test_add_edge_cycle_path_is_shortest_in_the_region(client, create_graph):
+    # N(i) -> N(i+1) and N(i) -> N(i+2); the shortest way back skips every other node.
+    names = [f"N{i}" for i in range(60)]
+    graph_id = create_graph(names, [(names[i], names[j]) for i in range(60) for j in (i + 1, i + 2) if j < 60])
+    response = client.post(f"/api/graph/{graph_id}/edge", json={"source": "N59", "target": "N0"})
+    assert response.status_code == 400
+    path = response.json()["message"].split(": ")[1].split(" -> ")
+    assert path[:2] == ["N59", "N0"] and path[-1] == "N59" and len(path) == 32
+    assert all(int(b[1:]) - int(a[1:]) in (1, 2) for a, b in zip(path[1:], path[2:]))
+
+def test_add_edge_errors(client, create_graph):
+    graph_id = create_graph(["A", "B"], [("A", "B")])
+    cases = [
+        ({"source": "A", "target": "B"}, "Duplicate edge from 'A' to 'B'"),
+        ({"source": "A", "target": "A"}, "Self-loop detected on node 'A'"),
+        ({"source": "A", "target": "X"}, "Edge references an undefined node."),
+    ]
+    for edge, message in cases:
+        response = client.post(f"/api/graph/{graph_id}/edge", json=edge)
+        assert response.status_code == 400
+        assert response.json() == {"message": message}
+
+def test_delete_edge(client, create_graph):
+    graph_id = create_graph(["A", "B", "C"], [("A", "B"), ("B", "C")])
+    assert client.delete(f"/api/graph/{graph_id}/edge/A/B").status_code == 204
+    assert _edges(client, graph_id) == {("B", "C")}
+    response = client.delete(f"/api/graph/{graph_id}/edge/A/B")
+    assert response.status_code == 404
+    assert response.json() == {"message": "Edge not found"}
+
+def test_patch_graph_applies_batch(client, create_graph):
+    graph_id = create_graph(["A", "B", "C"], [("A", "B"), ("B", "C")])
+    response = client.patch(f"/api/graph/{graph_id}/", json={
+        "remove_edges": [{"source": "B", "target": "C"}],
+        "remove_nodes": ["A"],
+        "add_nodes": [{"name": "D"}],
+        "add_edges": [{"source": "C", "target": "B"}, {"source": "D", "target": "C"}],
+    })
+    assert response.status_code == 200
+    assert _edges(client, graph_id) == {("C", "B"), ("D", "C")}
+    _assert_topo_order(graph_id)
+
+def test_patch_graph_is_all_or_nothing(client, create_graph):
+    graph_id = create_graph(["A", "B"], [("A", "B")])
+    response = client.patch(f"/api/graph/{graph_id}/", json={
+        "add_nodes": [{"name": "C"}],
+        "add_edges": [{"source": "B", "target": "C"}, {"source": "C", "target": "A"}],
+    })
+    assert response.status_code == 400
+    assert "cycle" in response.json()["message"]
+    assert {n["name"] for n in client.get(f"/api/graph/{graph_id}/").json()["nodes"]} == {"A", "B"}
+
+def test_random_edge_inserts_keep_topological_order(client, create_graph):
+    rng = random.Random(7)
+    names = [f"N{i}" for i in range(12)]
+    graph_id = create_graph(names)
+    successors = {name: set() for name in names}
+
+    def reaches(start, goal):
+        stack, seen = [start], {start}
+        while stack:
+            node = stack.pop()
+            if node == goal:
+                return True
+            for nxt in successors[node] - seen:
+                seen.add(nxt)
+                stack.append(nxt)
+        return False
+
+    for _ in range(60):
+        source, target = rng.sample(names, 2)
+        response = client.post(f"/api/graph/{graph_id}/edge", json={"source": source, "target": target})
+        if target in successors[source]:
+            assert response.status_code == 400
+        elif reaches(target, source):
+            assert response.status_code == 400
+            assert "cycle" in response.json()["message"]
+        else:
+            assert response.status_code == 201
+            successors[source].add(target)
+        _assert_topo_order(graph_id)
@@ -0,0 +1,73 @@
+import json
+
+
+def _ndjson(names, edges):
+    lines = [{"name": n} for n in names] + [{"source": s, "target": t} for s, t in edges]
+    return "\n".join(json.dumps(line) for line in lines) + "\n"
+
+def _import(client, body):
+    return client.post("/api/graph/import", content=body.encode(),
+                       headers={"Content-Type": "application/x-ndjson"})
+
+def test_ndjson_round_trip(client):
+    names = [f"N{i}" for i in range(50)]
+    edges = [(names[i], names[j]) for i in range(50) for j in (i + 1, i + 3) if j < 50]
+    resp = _import(client, _ndjson(names, edges))
+    assert resp.status_code == 201
+    graph_id = resp.json()["id"]
+
+    exported = client.get(f"/api/graph/{graph_id}/export")
+    assert exported.status_code == 200
+    assert exported.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in exported.text.splitlines()]
+    assert [line["name"] for line in lines if "name" in line] == names
+    assert {(line["source"], line["target"]) for line in lines if "source" in line} == set(edges)
+
+    adj = client.get(f"/api/graph/{graph_id}/adjacency_list").json()["adjacency_list"]
+    assert adj["N0"] == ["N1", "N3"]
+
+def test_ndjson_import_small_batches(client, monkeypatch):
+    monkeypatch.setattr("app.ndjson.NDJSON_BATCH_SIZE", 2)
+    names = ["A", "B", "C", "D", "E"]
+    edges = [("A", "B"), ("B", "C"), ("C", "D"), ("D", "E"), ("A", "E")]
+    graph_id = _import(client, _ndjson(names, edges)).json()["id"]
+    graph = client.get(f"/api/graph/{graph_id}/").json()
+    assert {(e["source"], e["target"]) for e in graph["edges"]} == set(edges)
+    lines = client.get(f"/api/graph/{graph_id}/export").text.splitlines()
+    assert len(lines) == len(names) + len(edges)
+
+def test_ndjson_import_duplicate_edge_across_batches(client, monkeypatch):
+    monkeypatch.setattr("app.ndjson.NDJSON_BATCH_SIZE", 2)
+    resp = _import(client, _ndjson(["A", "B", "C"], [("A", "B"), ("B", "C"), ("A", "C"), ("A", "B")]))
+    assert resp.status_code == 400
+    assert resp.json()["message"] == "Duplicate edge from 'A' to 'B'"
+
+def test_ndjson_import_empty_graph(client):
+    resp = _import(client, "")
+    assert resp.status_code == 201
+    graph = client.get(f"/api/graph/{resp.json()['id']}/").json()
+    assert graph["nodes"] == [] and graph["edges"] == []
+
+def test_ndjson_import_validation_errors(client):
+    cases = [
+        (_ndjson(["A", "A"], []), "Duplicate node name 'A'"),
+        (_ndjson(["Имя"], []), "Invalid node name"),
+        (_ndjson(["A\n"], []), "Invalid node name"),
+        (_ndjson(["A", "B"], [("A", "B"), ("A", "B")]), "Duplicate edge from 'A' to 'B'"),
+        (_ndjson(["A"], [("A", "B")]), "undefined node"),
+        (_ndjson(["A"], [("A", "A")]), "Self-loop"),
+        (_ndjson(["A", "B"], [("A", "B"), ("B", "A")]), "cycle"),
+        ('{"name": "A"}\nnot json\n', "not valid JSON"),
+        ('{"name": "A"}\n{"source": "A", "target": "A"}\n{"name": "B"}\n', "Self-loop"),
+        ('{"name": "A"}\n{"name": "B"}\n{"source": "A", "target": "B"}\n{"name": "C"}\n', "must precede"),
+    ]
+    for body, message in cases:
+        resp = _import(client, body)
+        assert resp.status_code == 400, body
+        assert message in resp.json()["message"], resp.json()
+    assert client.get("/api/graph/1/").status_code == 404
+
+def test_export_graph_not_found(client):
+    resp = client.get("/api/graph/777/export")
+    assert resp.status_code == 404
+    assert resp.json()["message"] == "Graph not found"
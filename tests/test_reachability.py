@@ -0,0 +1,67 @@
+import random
+
+from app import main
+from app.algorithms import shortest_path
+from app.cache import graph_cache
+from app.compact import CompactGraph
+from app.reachability import ClosureIndex, IntervalIndex, build_reach_index
+
+
+def _random_graph(node_count, edge_count, seed):
+    rng = random.Random(seed)
+    order = list(range(node_count))
+    rng.shuffle(order)
+    pairs = set()
+    while len(pairs) < edge_count:
+        a, b = sorted(rng.sample(range(node_count), 2))
+        pairs.add((order[a], order[b]))
+    sources, targets = zip(*pairs) if pairs else ((), ())
+    return CompactGraph(1, [f"N{i}" for i in range(node_count)], list(sources), list(targets))
+
+def test_closure_and_interval_indexes_match_bfs():
+    for seed in range(5):
+        graph = _random_graph(60, 120, seed)
+        closure = build_reach_index(graph)
+        intervals = build_reach_index(graph, max_bytes=0, labels=2)
+        assert isinstance(closure, ClosureIndex) and isinstance(intervals, IntervalIndex)
+        for source in range(graph.node_count):
+            for target in range(graph.node_count):
+                expected = shortest_path(graph.fwd_offsets, graph.fwd_targets, source, target) is not None
+                assert closure.reachable(graph, source, target) is expected
+                assert intervals.reachable(graph, source, target) is expected
+
+def test_index_memory():
+    graph = _random_graph(100, 200, 0)
+    assert build_reach_index(graph).nbytes == 100 * 13
+    assert build_reach_index(graph, max_bytes=0, labels=3).nbytes == 4 * 100 * 7
+    assert build_reach_index(CompactGraph(1, [], [], [])).nbytes == 0
+
+def test_is_reachable_builds_index_once_and_drops_it_on_delete(client):
+    payload = {
+        "nodes": [{"name": n} for n in ["A", "B", "C", "D"]],
+        "edges": [{"source": "A", "target": "B"}, {"source": "B", "target": "C"}],
+    }
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    url = f"/api/graph/{graph_id}/is_reachable"
+    assert client.get(url, params={"source": "A", "target": "C"}).json() == {"reachable": True}
+    graph = graph_cache.get(graph_id)
+    index = graph.reach_index
+    assert index is not None
+    assert client.get(url, params={"source": "C", "target": "A"}).json() == {"reachable": False}
+    assert client.get(url, params={"source": "A", "target": "C", "max_depth": 1}).json() == {"reachable": False}
+    assert graph_cache.get(graph_id).reach_index is index
+
+    assert client.delete(f"/api/graph/{graph_id}/node/B").status_code == 204
+    assert client.get(url, params={"source": "A", "target": "C"}).json() == {"reachable": False}
+    assert graph_cache.get(graph_id).reach_index is not index
+
+def test_is_reachable_without_a_cached_snapshot_uses_bfs(client, create_graph, monkeypatch):
+    def fail(graph):
+        raise AssertionError("index built for an uncached snapshot")
+
+    monkeypatch.setattr(main, "build_reach_index", fail)
+    monkeypatch.setattr(graph_cache, "enabled", False)
+    graph_id = create_graph(["A", "B", "C"], [("A", "B"), ("B", "C")])
+    url = f"/api/graph/{graph_id}/is_reachable"
+    assert client.get(url, params={"source": "A", "target": "C"}).json() == {"reachable": True}
+    assert client.get(url, params={"source": "C", "target": "A"}).json() == {"reachable": False}
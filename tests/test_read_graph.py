@@ -19,3 +19,28 @@ def test_read_graph_not_found(client):
     assert resp.status_code == 404
     error = resp.json()
     assert error["message"] == "Graph not found"
+
+def test_read_graph_etag_revalidation(client):
+    payload = {
+        "nodes": [{"name": "A"}, {"name": "B"}],
+        "edges": [{"source": "A", "target": "B"}]
+    }
+    graph_id = client.post("/api/graph/", json=payload).json()["id"]
+    first = client.get(f"/api/graph/{graph_id}/")
+    etag = first.headers["ETag"]
+    assert first.headers["content-type"] == "application/json"
+
+    cached = client.get(f"/api/graph/{graph_id}/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    adj = client.get(f"/api/graph/{graph_id}/adjacency_list", headers={"If-None-Match": etag})
+    assert adj.status_code == 200
+    assert adj.headers["ETag"] != etag
+
+    client.delete(f"/api/graph/{graph_id}/node/B")
+    changed = client.get(f"/api/graph/{graph_id}/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["nodes"] == [{"name": "A"}]
+    assert changed.headers["ETag"] != etag
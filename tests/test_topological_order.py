@@ -0,0 +1,40 @@
+# Pipeline: fetch -> parse -> {index, stats} -> report, lint isolated
+NODES = ["report", "stats", "index", "parse", "fetch", "lint"]
+EDGES = [("fetch", "parse"), ("parse", "index"), ("parse", "stats"),
+         ("index", "report"), ("stats", "report"), ("fetch", "report")]
+
+
+def test_levels_and_topological_order(client, create_graph):
+    graph_id = create_graph(NODES, EDGES)
+    assert client.get(f"/api/graph/{graph_id}/levels").json() == {
+        "levels": [["fetch", "lint"], ["parse"], ["index", "stats"], ["report"]],
+        "critical_path_length": 4,
+    }
+    assert client.get(f"/api/graph/{graph_id}/topological_order").json() == {
+        "nodes": ["fetch", "lint", "parse", "index", "stats", "report"],
+    }
+
+def test_levels_of_empty_graph(client, create_graph):
+    graph_id = create_graph([])
+    assert client.get(f"/api/graph/{graph_id}/levels").json() == {"levels": [], "critical_path_length": 0}
+    assert client.get(f"/api/graph/{graph_id}/topological_order").json() == {"nodes": []}
+
+def test_levels_are_recomputed_after_mutations(client, create_graph):
+    graph_id = create_graph(NODES, EDGES)
+    url = f"/api/graph/{graph_id}/levels"
+    first = client.get(url)
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    assert client.delete(f"/api/graph/{graph_id}/node/parse").status_code == 204
+    second = client.get(url)
+    assert second.json() == {"levels": [["fetch", "index", "lint", "stats"], ["report"]], "critical_path_length": 2}
+    assert second.headers["etag"] != first.headers["etag"]
+
+    assert client.post(f"/api/graph/{graph_id}/edge", json={"source": "report", "target": "lint"}).status_code == 201
+    assert client.get(url).json()["critical_path_length"] == 3
+
+def test_levels_graph_not_found(client):
+    for view in ("levels", "topological_order"):
+        response = client.get(f"/api/graph/999/{view}")
+        assert response.status_code == 404
+        assert response.json() == {"message": "Graph not found"}
@@ -0,0 +1,106 @@
+import re
+
+import pytest
+
+from app.algorithms import bfs_levels, shortest_path
+
+ENGINES = ["memory", "sql"]
+
+# A -> B -> D -> E, A -> C -> D, F isolated
+NODES = ["A", "B", "C", "D", "E", "F"]
+EDGES = [("A", "B"), ("A", "C"), ("B", "D"), ("C", "D"), ("D", "E")]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_descendants_and_ancestors(client, create_graph, engine):
+    graph_id = create_graph(NODES, EDGES)
+    url = f"/api/graph/{graph_id}/node"
+    assert client.get(f"{url}/A/descendants", params={"engine": engine}).json() == {"nodes": ["B", "C", "D", "E"]}
+    assert client.get(f"{url}/A/descendants", params={"engine": engine, "max_depth": 1}).json() == {"nodes": ["B", "C"]}
+    assert client.get(f"{url}/E/ancestors", params={"engine": engine}).json() == {"nodes": ["A", "B", "C", "D"]}
+    assert client.get(f"{url}/E/ancestors", params={"engine": engine, "max_depth": 2}).json() == {"nodes": ["B", "C", "D"]}
+    assert client.get(f"{url}/F/descendants", params={"engine": engine}).json() == {"nodes": []}
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_shortest_path_and_reachability(client, create_graph, engine):
+    graph_id = create_graph(NODES, EDGES)
+    url = f"/api/graph/{graph_id}"
+
+    def path(source, target, **params):
+        return client.get(f"{url}/shortest_path",
+                          params={"source": source, "target": target, "engine": engine, **params}).json()["path"]
+
+    def reachable(source, target, **params):
+        return client.get(f"{url}/is_reachable",
+                          params={"source": source, "target": target, "engine": engine, **params}).json()["reachable"]
+
+    assert path("A", "E") in (["A", "B", "D", "E"], ["A", "C", "D", "E"])
+    assert path("B", "E") == ["B", "D", "E"]
+    assert path("A", "A") == ["A"]
+    assert path("E", "A") is None
+    assert path("A", "E", max_depth=2) is None
+    assert path("A", "E", max_depth=3) is not None
+    assert reachable("A", "E") is True
+    assert reachable("A", "E", max_depth=2) is False
+    assert reachable("F", "A") is False
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_traversal_on_skip_chain(client, create_graph, engine):
+    # N(i) -> N(i+1) and N(i) -> N(i+2): the number of distinct path lengths to
+    # a node grows with its index, which a depth-carrying CTE has to enumerate.
+    names = [f"N{i}" for i in range(400)]
+    edges = [(names[i], names[j]) for i in range(len(names)) for j in (i + 1, i + 2) if j < len(names)]
+    graph_id = create_graph(names, edges)
+    url = f"/api/graph/{graph_id}"
+    params = {"source": "N0", "target": "N399", "engine": engine}
+
+    path = client.get(f"{url}/shortest_path", params=params).json()["path"]
+    assert len(path) == 201 and path[0] == "N0" and path[-1] == "N399"
+    assert set(zip(path, path[1:])) <= set(edges)
+    assert client.get(f"{url}/shortest_path", params={**params, "max_depth": 199}).json()["path"] is None
+    assert client.get(f"{url}/is_reachable", params={**params, "max_depth": 200}).json()["reachable"] is True
+    assert client.get(f"{url}/is_reachable", params={**params, "max_depth": 199}).json()["reachable"] is False
+    response = client.get(f"{url}/node/N10/descendants", params={"engine": engine, "max_depth": 3})
+    assert response.json() == {"nodes": sorted(f"N{i}" for i in range(11, 17))}
+    response = client.get(f"{url}/node/N399/ancestors", params={"engine": engine, "max_depth": 300})
+    assert len(response.json()["nodes"]) == 399
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_traversal_not_found(client, create_graph, engine):
+    graph_id = create_graph(NODES, EDGES)
+    response = client.get(f"/api/graph/{graph_id + 1}/node/A/descendants", params={"engine": engine})
+    assert response.status_code == 404
+    assert response.json() == {"message": "Graph not found"}
+    response = client.get(f"/api/graph/{graph_id}/shortest_path",
+                          params={"source": "A", "target": "X", "engine": engine})
+    assert response.status_code == 404
+    assert response.json() == {"message": "Node not found"}
+
+def test_traversal_rejects_bad_parameters(client, create_graph):
+    graph_id = create_graph(NODES, EDGES)
+    assert client.get(f"/api/graph/{graph_id}/node/A/descendants", params={"max_depth": 0}).status_code == 422
+    assert client.get(f"/api/graph/{graph_id}/node/A/descendants", params={"engine": "gpu"}).status_code == 422
+
+def test_bfs_levels_and_shortest_path():
+    # 0 -> 1 -> 2, 0 -> 2
+    offsets, targets = [0, 2, 3, 3], [1, 2, 2]
+    assert bfs_levels(offsets, targets, 0) == [[1, 2]]
+    assert bfs_levels(offsets, targets, 1) == [[2]]
+    assert shortest_path(offsets, targets, 0, 2) == [0, 2]
+    assert shortest_path(offsets, targets, 2, 0) is None
+
+def test_recursive_queries_type_their_binds_for_asyncpg():
+    # asyncpg cannot infer the type of an untyped parameter in ``SELECT :start``.
+    from sqlalchemy.dialects.postgresql import asyncpg
+
+    from app import mutations, traversal
+
+    statements = [
+        mutations._FORWARD_REGION_SQL,
+        mutations._BACKWARD_REGION_SQL,
+        traversal._query(traversal._REACH_SQL.format(frm="source_id", to="target_id")),
+        traversal._query(traversal._IS_REACHABLE_SQL),
+    ]
+    for statement in statements:
+        sql = str(statement.compile(dialect=asyncpg.dialect()))
+        assert re.findall(r"\$\d+(?!::INTEGER)\b", sql) == [], sql